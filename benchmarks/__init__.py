@@ -0,0 +1,5 @@
+"""Benchmarks for the trello_cli package
+
+Run a benchmark from the root directory of the project e.g.
+python3 -m benchmarks.bench_memory
+"""
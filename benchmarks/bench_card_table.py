@@ -0,0 +1,55 @@
+"""Benchmark of the columnar board statistics of trello_cli/card_table.py
+
+Reports the time to build a CardTable from json and the throughput of the
+grouped aggregations used by the stats command.
+
+Usage:
+python3 -m benchmarks.bench_card_table [--cards 1000000] [--labels 12]
+"""
+
+# local imports
+from trello_cli.card_table import CardTable
+from benchmarks.synthetic import cards_json, labels_json, lists_json, object_id
+
+# standard library imports
+import argparse
+import time
+
+
+def aggregate(table: CardTable) -> None:
+    """Runs every aggregation of the stats command"""
+    table.cards_per_list()
+    table.comments_per_list()
+    table.cards_per_label()
+    table.comments_per_label()
+    table.unlabelled()
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=1_000_000, help="number of synthetic cards")
+    parser.add_argument("--labels", type=int, default=12, help="number of labels on the board")
+    parser.add_argument("--repeat", type=int, default=5, help="aggregation runs, the best is reported")
+    args = parser.parse_args(argv)
+
+    board_id = object_id(0, "6c")
+    lists, labels = lists_json(board_id), labels_json(board_id, args.labels)
+    cards = cards_json(args.cards, board_id, lists, labels)
+
+    start = time.perf_counter()
+    table = CardTable.from_json(cards, lists, labels)
+    build = time.perf_counter() - start
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        aggregate(table)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"cards:        {args.cards}")
+    print(f"build:        {build:.3f}s ({args.cards / build:,.0f} cards/s)")
+    print(f"aggregations: {best * 1000:.1f}ms ({args.cards / best:,.0f} cards/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Memory benchmark of the trello_cli entity classes
+
+Reports the bytes held per Card when a board's cards are loaded with
+Card.from_json, excluding the decoded json payload itself.
+
+Usage:
+python3 -m benchmarks.bench_memory [--sizes 10000 100000 1000000]
+"""
+
+# local imports
+from trello_cli.trello_data import Card
+from benchmarks.synthetic import cards_json
+
+# standard library imports
+import argparse
+import gc
+import tracemalloc
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def bytes_per_card(count: int) -> float:
+    """Returns the memory allocated per Card when loading count cards"""
+    payload = cards_json(count)
+    gc.collect()
+    tracemalloc.start()
+    cards = [Card.from_json(card) for card in payload]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cards
+    return size / count
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="numbers of cards to load")
+    args = parser.parse_args(argv)
+
+    print(f"{'cards':>10} {'bytes/card':>12}")
+    for count in args.sizes:
+        print(f"{count:>10} {bytes_per_card(count):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
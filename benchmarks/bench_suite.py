@@ -0,0 +1,192 @@
+"""Microbenchmark suite for parsing, entity construction and rendering
+
+Each case runs on synthetic payloads of every size and reports the best
+time of a few runs, the objects handled per second and the peak memory
+allocated by one run:
+
+    decode_cards        json.loads of a GET boards/{id}/cards body
+    card_from_json      Card.from_json over the decoded cards
+    card_view           CardView.from_json over the decoded cards
+    label_from_json     Label.from_json_list over the labels of every card
+    comment_from_json   Comment.from_json over a comment thread
+    comment_repr        Comment.__repr__ of a comment thread
+    render_text         the rich print loop of get-cards
+    render_jsonl        the --output jsonl writer of get-cards
+
+Results are written as json, and compared against a previous results file
+with --baseline; cases slower than the baseline by more than --threshold
+are reported and make the run exit with status 1.
+
+Usage:
+python3 -m benchmarks.bench_suite [--sizes 100 10000 1000000] [--output results.json]
+                                  [--baseline baseline.json] [--threshold 1.2]
+"""
+
+# local imports
+from trello_cli import __version__
+from trello_cli.output import JsonLinesWriter
+from trello_cli.trello_data import Card, CardView, Comment, Label
+from benchmarks.synthetic import cards_json, comments_json
+
+# standard library imports
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+
+# rendering is much slower than parsing, its sizes are capped to keep runs short
+MAX_RENDER_SIZE = 10_000
+
+
+def _render_text(cards) -> None:
+    from rich.console import Console
+    from rich.theme import Theme
+
+    console = Console(file=io.StringIO(), theme=Theme({"id": "blue"}), width=120, force_terminal=True)
+    for card in cards:
+        console.print(f"{card.name}, [id]id: {card.card_id}[/id]")
+
+
+def _render_jsonl(cards) -> None:
+    writer = JsonLinesWriter(io.StringIO())
+    for card in cards:
+        writer.write({'type': 'card', 'id': card.card_id, 'name': card.name, 'comments': card.comments})
+    writer.close()
+
+
+def cases(size: int) -> dict:
+    """
+    Returns the benchmark cases of a payload size
+
+    Returns
+    -------
+    cases: dict
+        name: (objects handled, function running the case once)
+    """
+    cards = cards_json(size)
+    body = json.dumps(cards)
+    views = [CardView.from_json(card) for card in cards]
+    comments = comments_json(size)
+    comment_objects = [Comment.from_json(comment) for comment in comments]
+    label_lists = [card['labels'] for card in cards]
+
+    benchmarks = {
+        'decode_cards': (size, lambda: json.loads(body)),
+        'card_from_json': (size, lambda: [Card.from_json(card) for card in cards]),
+        'card_view': (size, lambda: [CardView.from_json(card) for card in cards]),
+        'label_from_json': (sum(map(len, label_lists)),
+                            lambda: [Label.from_json_list(labels) for labels in label_lists]),
+        'comment_from_json': (size, lambda: [Comment.from_json(comment) for comment in comments]),
+        'comment_repr': (size, lambda: [repr(comment) for comment in comment_objects]),
+    }
+    if size <= MAX_RENDER_SIZE:
+        benchmarks['render_text'] = (size, lambda: _render_text(views))
+        benchmarks['render_jsonl'] = (size, lambda: _render_jsonl(views))
+    return benchmarks
+
+
+def measure(func, repeat: int) -> tuple:
+    """Returns the best time of repeat runs of func and the peak memory of one run"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(sizes, repeat: int = 3, selected=None) -> list:
+    """Runs the cases on every size and returns their results"""
+    results = []
+    for size in sizes:
+        for name, (count, func) in cases(size).items():
+            if selected and name not in selected:
+                continue
+            seconds, peak = measure(func, repeat)
+            results.append({
+                'name': name,
+                'size': size,
+                'objects': count,
+                'seconds': seconds,
+                'objects_per_second': count / seconds if seconds else 0.0,
+                'peak_bytes': peak,
+            })
+    return results
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """
+    Returns (result, baseline seconds, ratio) of the results slower than
+    their baseline by more than threshold
+    """
+    previous = {(result['name'], result['size']): result['seconds'] for result in baseline}
+    regressions = []
+    for result in results:
+        seconds = previous.get((result['name'], result['size']))
+        if seconds:
+            ratio = result['seconds'] / seconds
+            if ratio > threshold:
+                regressions.append((result, seconds, ratio))
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="numbers of cards and comments per payload")
+    parser.add_argument("--cases", nargs="+", help="names of the cases to run, all by default")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the best is reported")
+    parser.add_argument("--output", help="path of the json results file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="slowdown relative to the baseline reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.cases)
+
+    print(f"{'case':<20} {'size':>9} {'ms':>10} {'objects/s':>14} {'peak KiB':>10}")
+    for result in results:
+        print(f"{result['name']:<20} {result['size']:>9} {result['seconds'] * 1000:>10.2f} "
+              f"{result['objects_per_second']:>14,.0f} {result['peak_bytes'] / 1024:>10.0f}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                'meta': {
+                    'trello_cli': __version__,
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'created': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    'repeat': args.repeat,
+                },
+                'results': results,
+            }, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for result, seconds, ratio in regressions:
+            print(f"REGRESSION {result['name']} size {result['size']}: "
+                  f"{seconds * 1000:.2f}ms -> {result['seconds'] * 1000:.2f}ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"no regressions above {args.threshold:.2f}x of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,483 @@
+"""Local stand-in for the Trello API
+
+Serves the endpoints used by trello_cli/trello_api.py from a generated
+in-memory dataset, so commands, benchmarks and tests can run end to end
+over real HTTP without the network:
+
+    GET  members/me/boards
+    GET  boards/{id}, boards/{id}/lists, boards/{id}/labels
+    GET  boards/{id}/cards, boards/{id}/actions      (limit / before pagination)
+    GET  lists/{id}, lists/{id}/cards                (limit / before pagination)
+    GET  cards/{id}, cards/{id}/actions              (limit / before pagination)
+    POST cards, cards/{id}/actions/comments, cards/{id}/idLabels
+    PUT  cards/{id}
+    GET  batch?urls=..., search?query=...
+
+Latency, jitter, 5xx errors and Trello's 429 rate limit can be injected.
+Point the client at the server with TRELLO_API_BASE_URL, e.g.
+
+    python3 -m benchmarks.fake_trello --port 8765 --cards 100000 --latency 0.05
+    TRELLO_API_BASE_URL=http://127.0.0.1:8765/1/ python3 -m trello_cli get-board ...
+
+or start it in-process:
+
+    with FakeTrello(Dataset(cards=10_000), latency=0.01) as server:
+        api = TrelloAPI(..., base_url=server.base_url)
+"""
+
+# local imports
+from benchmarks.synthetic import LABEL_COLORS, cards_json, labels_json, lists_json, object_id
+
+# standard library imports
+import argparse
+import json
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# comment ids of a card are card index * COMMENT_ID_STRIDE + n, so that ids
+# are unique across a board and grow with the card's index
+COMMENT_ID_STRIDE = 10_000
+
+# id prefix of the generated comments, comments added through the API get greater ids
+COMMENT_PREFIX = "6d"
+
+# largest page the API returns for paginated requests
+MAX_LIMIT = 1000
+
+
+class NotFound(Exception):
+    """Raised for unknown ids and paths, answered with a 404"""
+
+
+class Dataset:
+    """
+    Generated board served by FakeTrello
+
+    Attributes
+    ----------
+        board: dict
+            the board
+        lists: list
+            lists of the board
+        labels: list
+            labels of the board
+        cards: dict
+            cards of the board by id, each card has badges.comments comments
+    """
+
+    def __init__(self, cards: int = 1000, lists: int = 8, labels: int = 12, seed: int = 0) -> None:
+        board_id = object_id(0, "6c")
+        self.board = {'id': board_id, 'name': "Benchmark board", 'desc': "", 'closed': False}
+        self.lists = lists_json(board_id, lists)
+        self.labels = labels_json(board_id, labels)
+        self.cards = {}
+        for card in cards_json(cards, board_id, self.lists, self.labels, seed):
+            card.update(idBoard=board_id, closed=False, pos=len(self.cards), due=None, idMembers=[])
+            self.cards[card['id']] = card
+        # ids of the cards in ascending order, created cards have greater ids and are appended
+        self._card_ids = sorted(self.cards)
+        self._comments = {}
+        # comments added through the API, newest first, their ids are greater than the generated ones
+        self._added_comments = []
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _next_id(self, prefix: str) -> str:
+        """Returns a new id, greater than the generated ids of the same prefix"""
+        with self._lock:
+            self._created += 1
+            return object_id(self._created, prefix)
+
+    def card(self, card_id: str) -> dict:
+        try:
+            return self.cards[card_id]
+        except KeyError:
+            raise NotFound(card_id)
+
+    def trello_list(self, list_id: str) -> dict:
+        for trello_list in self.lists:
+            if trello_list['id'] == list_id:
+                return trello_list
+        raise NotFound(list_id)
+
+    def check_board(self, board_id: str) -> None:
+        if board_id != self.board['id']:
+            raise NotFound(board_id)
+
+    def comments(self, card_id: str) -> list:
+        """Returns the commentCard actions of a card, newest first, generated on first use"""
+        comments = self._comments.get(card_id)
+        if comments is None:
+            card = self.card(card_id)
+            base = int(card_id[4:], 16) * COMMENT_ID_STRIDE
+            count = card['badges']['comments']
+            comments = [{
+                'id': object_id(base + number, COMMENT_PREFIX),
+                'type': 'commentCard',
+                'date': time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(1_690_000_000 + number * 3600)),
+                'data': {'text': f"comment {number}", 'card': {'id': card_id, 'name': card['name']}},
+                'memberCreator': {'id': object_id(1, "6e"), 'fullName': "Jane Doe"},
+            } for number in range(count, 0, -1)]
+            comments = self._comments.setdefault(card_id, comments)
+        return comments
+
+    def add_comment(self, card_id: str, text: str) -> dict:
+        card = self.card(card_id)
+        comment = {
+            'type': 'commentCard',
+            'date': time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+            'data': {'text': text, 'card': {'id': card_id, 'name': card['name']}},
+            'memberCreator': {'id': object_id(1, "6e"), 'fullName': "Jane Doe"},
+        }
+        comments = self.comments(card_id)
+        with self._lock:
+            # the id is taken with the lock held so the lists stay ordered newest first
+            self._created += 1
+            comment['id'] = object_id(self._created, "6f")
+            comments.insert(0, comment)
+            self._added_comments.insert(0, comment)
+            card['badges']['comments'] += 1
+        return comment
+
+    def add_card(self, params: dict) -> dict:
+        id_list = params.get('idList')
+        self.trello_list(id_list)
+        label_ids = [label_id for label_id in params.get('idLabels', "").split(",") if label_id]
+        card = {
+            'id': self._next_id("6536"),
+            'name': params.get('name', ""),
+            'desc': params.get('desc', ""),
+            'idList': id_list,
+            'idBoard': self.board['id'],
+            'labels': [label for label in self.labels if label['id'] in label_ids],
+            'badges': {'comments': 0},
+            'closed': False,
+            'pos': params.get('pos', len(self.cards)),
+            'due': params.get('due'),
+            'idMembers': [member for member in params.get('idMembers', "").split(",") if member],
+        }
+        with self._lock:
+            self.cards[card['id']] = card
+            insort(self._card_ids, card['id'])
+        return card
+
+    def update_card(self, card_id: str, params: dict) -> dict:
+        card = self.card(card_id)
+        with self._lock:
+            if 'idList' in params:
+                self.trello_list(params['idList'])
+                card['idList'] = params['idList']
+            if 'closed' in params:
+                card['closed'] = params['closed'].lower() == "true"
+            if 'name' in params:
+                card['name'] = params['name']
+            if 'idLabels' in params:
+                label_ids = params['idLabels'].split(",")
+                card['labels'] = [label for label in self.labels if label['id'] in label_ids]
+        return card
+
+    def add_label(self, card_id: str, label_id: str) -> list:
+        card = self.card(card_id)
+        label = next((label for label in self.labels if label['id'] == label_id), None)
+        if label is None:
+            raise NotFound(label_id)
+        with self._lock:
+            if label not in card['labels']:
+                card['labels'] = card['labels'] + [label]
+        return [label['id'] for label in card['labels']]
+
+    def open_cards(self, list_id: str = None, before: str = None):
+        """
+        Yields the open cards of the board or of a list, newest first
+
+        Only cards with an id below before are yielded if given, the scan
+        starts at before so a page costs its size rather than the board's.
+        """
+        card_ids = self._card_ids
+        end = bisect_left(card_ids, before) if before else len(card_ids)
+        for index in range(end - 1, -1, -1):
+            card = self.cards[card_ids[index]]
+            if not card['closed'] and (list_id is None or card['idList'] == list_id):
+                yield card
+
+    def board_comments(self, before: str = None):
+        """
+        Yields the commentCard actions of the board, newest first
+
+        Only comments with an id below before are yielded if given. Added
+        comments come first, then the generated ones card by card, whose ids
+        descend with the card's index, so the scan of a page starts at the
+        card of before rather than at the newest card.
+        """
+        for comment in self._added_comments:
+            if not before or comment['id'] < before:
+                yield comment
+        end = len(self._card_ids)
+        if before and before[:2] == COMMENT_PREFIX:
+            end = bisect_right(self._card_ids, object_id(int(before[2:], 16) // COMMENT_ID_STRIDE))
+        elif before and before[:2] < COMMENT_PREFIX:
+            return
+        for index in range(end - 1, -1, -1):
+            for comment in self.comments(self._card_ids[index]):
+                if comment['id'][:2] == COMMENT_PREFIX and (not before or comment['id'] < before):
+                    yield comment
+
+
+def paginate(items, params: dict) -> list:
+    """Returns the page of items, ordered newest first, selected by the limit and before params"""
+    limit = min(int(params.get('limit', MAX_LIMIT)), MAX_LIMIT)
+    before = params.get('before')
+    page = []
+    for item in items:
+        if before and item['id'] >= before:
+            continue
+        page.append(item)
+        if len(page) >= limit:
+            break
+    return page
+
+
+class FakeTrello:
+    """
+    HTTP server answering Trello API requests from a Dataset
+
+    Attributes
+    ----------
+        dataset: Dataset
+            the data served
+        latency: float
+            seconds added to every response
+        jitter: float
+            random seconds added on top of latency, uniform in [0, jitter]
+        error_rate: float
+            fraction of requests answered with a random 500, 502 or 503
+        rate_limit: int
+            requests allowed per 10 second window before answering 429,
+            unlimited when 0
+        requests: int
+            number of requests received
+    """
+
+    def __init__(self, dataset: Dataset = None, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: int = 0, seed: int = None) -> None:
+        self.dataset = dataset or Dataset()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._window = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/1/"
+
+    def start(self) -> "FakeTrello":
+        """Serves requests in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeTrello":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def injected_status(self) -> int:
+        """Returns the error status injected into the current request, None to answer it"""
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 10:
+                    self._window.popleft()
+                if len(self._window) >= self.rate_limit:
+                    return 429
+                self._window.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self._random.choice((500, 502, 503))
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        return None
+
+    def route(self, method: str, parts: list, params: dict):
+        """Returns the json body answering a request, raises NotFound for unknown paths"""
+        data = self.dataset
+        if method == "GET":
+            if parts == ["members", "me", "boards"]:
+                return [data.board]
+            if parts == ["batch"]:
+                return self.batch(params.get('urls', ""))
+            if parts == ["search"]:
+                query = params.get('query', "").lower()
+                limit = int(params.get('cards_limit', 10))
+                cards = [card for card in data.open_cards() if query in card['name'].lower()][:limit]
+                return {'cards': cards, 'boards': []}
+        if len(parts) < 2:
+            raise NotFound("/".join(parts))
+
+        resource, object_id_, rest = parts[0], parts[1], parts[2:]
+        if resource == "boards" and method == "GET":
+            data.check_board(object_id_)
+            if not rest:
+                return data.board
+            if rest == ["lists"]:
+                return data.lists
+            if rest == ["labels"]:
+                return data.labels
+            if rest == ["cards"]:
+                return paginate(data.open_cards(before=params.get('before')), params)
+            if rest == ["actions"]:
+                return paginate(data.board_comments(params.get('before')), params)
+        elif resource == "lists" and method == "GET":
+            trello_list = data.trello_list(object_id_)
+            if not rest:
+                return trello_list
+            if rest == ["cards"]:
+                return paginate(data.open_cards(object_id_, params.get('before')), params)
+        elif resource == "cards":
+            if method == "POST" and not rest and object_id_ == "":
+                return data.add_card(params)
+            if method == "GET" and not rest:
+                return data.card(object_id_)
+            if method == "PUT" and not rest:
+                return data.update_card(object_id_, params)
+            if method == "GET" and rest == ["actions"]:
+                return paginate(data.comments(object_id_), params)
+            if method == "POST" and rest == ["actions", "comments"]:
+                return data.add_comment(object_id_, params.get('text', ""))
+            if method == "POST" and rest == ["idLabels"]:
+                return data.add_label(object_id_, params.get('value', ""))
+        raise NotFound("/".join(parts))
+
+    def batch(self, urls: str) -> list:
+        """Answers GET batch, each url is answered as {status: body}"""
+        results = []
+        for url in filter(None, urls.split(",")):
+            split = urlsplit(url)
+            try:
+                body = self.route("GET", _path_parts(split.path), _query(split.query))
+                results.append({'200': body})
+            except NotFound:
+                results.append({'404': {'message': "not found"}})
+        return results
+
+
+def _path_parts(path: str) -> list:
+    """Returns the parts of a request path below /1/, ignoring repeated slashes"""
+    parts = [part for part in path.split("/") if part]
+    if parts and parts[0] == "1":
+        parts = parts[1:]
+    return parts
+
+
+def _query(query: str) -> dict:
+    return {key: values[-1] for key, values in parse_qs(query, keep_blank_values=True).items()}
+
+
+def _handler(server: FakeTrello):
+    """Returns the request handler class of a FakeTrello server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are sent separately, Nagle's algorithm would hold
+        # the body back until the client acknowledges the headers
+        disable_nagle_algorithm = True
+
+        def _answer(self, method: str) -> None:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            split = urlsplit(self.path)
+            parts = _path_parts(split.path)
+            # POST cards is sent as cards/ which leaves no id part
+            if parts == ["cards"]:
+                parts = ["cards", ""]
+
+            status = server.injected_status()
+            if status == 429:
+                body = {'error': "API_TOKEN_LIMIT_EXCEEDED",
+                        'message': "Rate limit exceeded"}
+            elif status is not None:
+                body = {'message': "Injected server error"}
+            else:
+                try:
+                    body, status = server.route(method, parts, _query(split.query)), 200
+                except NotFound as err:
+                    body, status = {'message': f"could not find {err}"}, 404
+                except (ValueError, KeyError) as err:
+                    body, status = {'message': f"invalid request: {err}"}, 400
+
+            content = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            self._answer("GET")
+
+        def do_POST(self):
+            self._answer("POST")
+
+        def do_PUT(self):
+            self._answer("PUT")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cards", type=int, default=1000, help="number of generated cards")
+    parser.add_argument("--lists", type=int, default=8, help="number of generated lists")
+    parser.add_argument("--labels", type=int, default=len(LABEL_COLORS) * 2, help="number of generated labels")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random seconds added on top of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 5xx")
+    parser.add_argument("--rate-limit", type=int, default=0,
+                        help="requests per 10 seconds before answering 429, unlimited by default")
+    args = parser.parse_args(argv)
+
+    server = FakeTrello(Dataset(args.cards, args.lists, args.labels), args.host, args.port,
+                        args.latency, args.jitter, args.error_rate, args.rate_limit)
+    print(f"fake trello serving {args.cards} cards on {server.base_url}")
+    print(f"board id: {server.dataset.board['id']}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
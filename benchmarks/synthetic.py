@@ -0,0 +1,57 @@
+"""Generators of synthetic Trello API payloads for the benchmarks"""
+
+# standard library imports
+import random
+
+LABEL_COLORS = ('green', 'yellow', 'orange', 'red', 'purple', 'blue')
+
+
+def object_id(index: int, prefix: str = "6535") -> str:
+    """Returns a 24 character hex id shaped like a Trello object id"""
+    return f"{prefix}{index:0{24 - len(prefix)}x}"
+
+
+def labels_json(board_id: str, count: int = 12) -> list:
+    """Returns the labels of a board as returned by GET boards/{id}/labels"""
+    return [{'id': object_id(index, "6a"), 'idBoard': board_id, 'name': f"label {index}",
+             'color': LABEL_COLORS[index % len(LABEL_COLORS)], 'uses': 0}
+            for index in range(count)]
+
+
+def lists_json(board_id: str, count: int = 8) -> list:
+    """Returns the lists of a board as returned by GET boards/{id}/lists"""
+    return [{'id': object_id(index, "6b"), 'name': f"list {index}", 'idBoard': board_id}
+            for index in range(count)]
+
+
+def cards_json(count: int, board_id: str = None, lists: list = None, labels: list = None,
+               seed: int = 0) -> list:
+    """Returns cards as returned by GET boards/{id}/cards, spread over lists and labels"""
+    board_id = board_id or object_id(0, "6c")
+    lists = lists or lists_json(board_id)
+    labels = labels or labels_json(board_id)
+    rng = random.Random(seed)
+    cards = []
+    for index in range(count):
+        card_labels = rng.sample(labels, rng.randint(0, 3))
+        cards.append({
+            'id': object_id(index),
+            'name': f"card {index}",
+            'desc': "",
+            'idList': lists[index % len(lists)]['id'],
+            'labels': card_labels,
+            'badges': {'comments': rng.randint(0, 20)},
+        })
+    return cards
+
+
+def comments_json(count: int, card_id: str = None) -> list:
+    """Returns commentCard actions, newest first, as returned by GET cards/{id}/actions"""
+    card_id = card_id or object_id(0)
+    return [{
+        'id': object_id(count - index, "6d"),
+        'type': 'commentCard',
+        'date': f"2023-{1 + (count - index) // 2678400 % 12:02d}-01T00:00:{(count - index) % 60:02d}.000Z",
+        'data': {'text': f"comment {count - index}", 'card': {'id': card_id}},
+        'memberCreator': {'id': object_id(1, "6e"), 'fullName': "Jane Doe"},
+    } for index in range(count)]
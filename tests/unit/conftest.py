@@ -1,10 +1,10 @@
 """Pytest configuration file for unit tests."""
 
 # local imports
-from trello_cli.trello_api import TrelloAPI
-
-# standard library imports
-import os
+from benchmarks.fake_trello import Dataset, FakeTrello
+from trello_cli import cli
+from trello_cli.trello_api import RateLimiter, TrelloAPI
+from trello_cli.settings import get_settings, reset_settings
 
 # Third party imports
 import pytest
@@ -15,10 +15,28 @@ def trello_api():
     """
     Fixture to create a TrelloAPI object for testing.
     """
-    return TrelloAPI(
-        api_key=os.getenv("TRELLO_API_KEY"),
-        api_secret=os.getenv("TRELLO_API_SECRET"),
-        api_token=os.getenv("TRELLO_API_TOKEN"),
-        oauth_token=os.getenv("TRELLO_OAUTH_TOKEN"),
-        oauth_secret=os.getenv("TRELLO_OAUTH_SECRET")
-    )
+    return TrelloAPI.from_settings(get_settings())
+
+
+@pytest.fixture
+def dataset_size():
+    """
+    Size of the board served by the server fixture, override it in a test
+    module or parametrize it for a larger board
+    """
+    return {'cards': 10, 'lists': 2, 'labels': 3}
+
+
+@pytest.fixture
+def server(dataset_size, monkeypatch):
+    """
+    Fixture serving a generated board with benchmarks/fake_trello.py, the
+    settings of the process point at it and requests are not paced.
+    """
+    monkeypatch.setattr("trello_cli.trello_api.rate_limiter", RateLimiter(max_calls=None, period=10))
+    monkeypatch.setattr(cli, "_service", None)
+    with FakeTrello(Dataset(**dataset_size), seed=0) as server:
+        monkeypatch.setenv("TRELLO_API_BASE_URL", server.base_url)
+        reset_settings()
+        yield server
+    reset_settings()
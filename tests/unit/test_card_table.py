@@ -0,0 +1,67 @@
+""" Test module for the columnar statistics of card_table.py """
+
+# local imports
+from trello_cli.card_table import CardTable, WORD_BITS
+
+lists = [{'id': 'todo', 'name': 'To do'}, {'id': 'done', 'name': 'Done'}]
+labels = [{'id': 'red', 'name': '', 'color': 'red'}, {'id': 'bug', 'name': 'bug', 'color': 'blue'}]
+
+
+def card(list_id, label_ids, comments):
+    """Builds the json payload of a board card"""
+    return {'idList': list_id, 'labels': [{'id': label_id} for label_id in label_ids],
+            'badges': {'comments': comments}}
+
+
+def test_grouped_aggregations():
+    table = CardTable.from_json([
+        card('todo', ['red'], 1),
+        card('todo', ['red', 'bug'], 2),
+        card('done', [], 4),
+        card('archived', ['feature'], 8),
+    ], lists, labels)
+
+    assert table.list_names == ['To do', 'Done', 'archived']
+    assert table.label_names == ['red', 'bug', 'feature']
+    assert table.cards_per_list().tolist() == [2, 1, 1]
+    assert table.comments_per_list().tolist() == [3, 4, 8]
+    assert table.cards_per_label().tolist() == [2, 1, 1]
+    assert table.comments_per_label().tolist() == [3, 2, 8]
+    assert table.unlabelled() == 1
+
+
+def test_label_bitsets_span_several_words():
+    many_labels = [{'id': f'l{index}', 'name': f'l{index}'} for index in range(WORD_BITS + 2)]
+    table = CardTable.from_json([card('todo', ['l0', f'l{WORD_BITS + 1}'], 0)], lists, many_labels)
+
+    assert table.label_bits.shape == (1, 2)
+    assert table.cards_per_label().tolist() == [1] + [0] * WORD_BITS + [1]
+
+
+def test_empty_board():
+    table = CardTable.from_json([], lists, labels)
+    assert len(table) == 0
+    assert table.cards_per_list().tolist() == [0, 0]
+    assert table.cards_per_label().tolist() == [0, 0]
+
+
+def test_stats_command(mocker):
+    """Test that the stats command renders the aggregations of a board"""
+    from trello_cli import cli
+    from typer.testing import CliRunner
+
+    responses = {
+        'get_all_lists': lists,
+        'get_labels': labels,
+        'get_board_cards': [card('todo', ['bug'], 3), card('done', [], 1)],
+    }
+    for method, payload in responses.items():
+        mocker.patch(f'trello_cli.trello_api.TrelloAPI.{method}',
+                     return_value=mocker.Mock(json=mocker.Mock(return_value=payload)))
+
+    result = CliRunner().invoke(cli.app, ["stats", "--board-id", "board"])
+
+    assert result.exit_code == 0
+    assert "2 cards, 4 comments, 1 cards without labels" in result.stdout
+    assert "To do: 1 cards, 3 comments" in result.stdout
+    assert "bug: 1 cards, 3 comments" in result.stdout
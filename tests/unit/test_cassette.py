@@ -0,0 +1,110 @@
+""" Test module for recording and replaying API traffic with cassette.py """
+
+# standard library imports
+import json
+
+# 3rd party imports
+import pytest
+from typer.testing import CliRunner
+
+# local imports
+from trello_cli import SUCCESS, TRELLO_WRITE_ERROR, cli, trello_api
+from trello_cli import cassette as cassettes
+from trello_cli.cassette import Cassette, ReplaySession, request_key
+from trello_cli.trello_service import TrelloService
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def server(server, monkeypatch):
+    """The board of conftest.py with fake credentials that recordings must not contain"""
+    from trello_cli.settings import reset_settings
+
+    monkeypatch.setenv("TRELLO_API_KEY", "secret-key")
+    monkeypatch.setenv("TRELLO_API_TOKEN", "secret-token")
+    reset_settings()
+    return server
+
+
+@pytest.fixture(autouse=True)
+def restore_session():
+    yield
+    trello_api.use_session(None)
+
+
+def test_request_key():
+    assert request_key("GET", "https://api.trello.com/1//cards/1?token=abc", {'key': 'k', 'fields': ['id']}) == \
+           request_key("GET", "http://127.0.0.1:8765/1/cards/1?token=def", {'fields': ['id'], 'key': 'x'})
+    assert request_key("GET", "https://api.trello.com/1/cards/1") != \
+           request_key("PUT", "https://api.trello.com/1/cards/1")
+
+
+def test_record_and_replay(server, tmp_path):
+    path = tmp_path / "cassette.json"
+    board_id = server.dataset.board['id']
+    list_id = server.dataset.lists[0]['id']
+
+    cassette = cassettes.start_recording()
+    recorded_board = TrelloService().get_board(board_id).res
+    card = TrelloService().create_card("recorded card", list_id).res
+    cassettes.stop()
+    cassette.save(path)
+
+    text = path.read_text()
+    assert "secret-key" not in text and "secret-token" not in text
+    assert len(json.loads(text)['interactions']) == 2
+
+    server.stop()
+    cassettes.start_replay(str(path))
+    board = TrelloService().get_board(board_id)
+    assert board.status_code == SUCCESS
+    assert board.res.name == recorded_board.name
+    assert TrelloService().create_card("recorded card", list_id).res.card_id == card.card_id
+    # unrecorded requests fail as they would offline
+    assert TrelloService().create_card("another card", list_id).status_code == TRELLO_WRITE_ERROR
+
+
+def test_replay_repeats_the_last_response():
+    url = "https://api.trello.com/1/cards/1"
+    cassette = Cassette([
+        {'request': {'method': "GET", 'url': url, 'params': None},
+         'response': {'status_code': 200, 'headers': {}, 'body': '{"n": 1}', 'elapsed': 0.0}},
+        {'request': {'method': "GET", 'url': url, 'params': None},
+         'response': {'status_code': 200, 'headers': {}, 'body': '{"n": 2}', 'elapsed': 0.0}},
+    ])
+    session = ReplaySession(cassette)
+    assert [session.get(url).json()['n'] for _ in range(3)] == [1, 2, 2]
+
+
+def test_replay_latency():
+    url = "https://api.trello.com/1/cards/1"
+    cassette = Cassette([{'request': {'method': "GET", 'url': url, 'params': None},
+                          'response': {'status_code': 200, 'headers': {}, 'body': '{}', 'elapsed': 0.05}}])
+    assert ReplaySession(cassette, simulate_latency=True).get(url).elapsed.total_seconds() == 0.05
+
+
+def test_cli_record_and_replay(server, tmp_path):
+    path = str(tmp_path / "get_board.json")
+    args = ["get-board", "--board-id", server.dataset.board['id']]
+
+    recorded = runner.invoke(cli.app, ["--record", path] + args)
+    assert recorded.exit_code == 0, recorded.output
+    server.stop()
+
+    replayed = runner.invoke(cli.app, ["--replay", path] + args)
+    assert replayed.exit_code == 0, replayed.output
+    assert replayed.stdout == recorded.stdout
+    assert not isinstance(trello_api.get_session(), ReplaySession)
+
+
+def test_cli_rejects_bad_cassettes(tmp_path):
+    path = tmp_path / "cassette.json"
+    path.write_text("[]")
+    result = runner.invoke(cli.app, ["--replay", str(path), "get-board", "--board-id", "board"])
+    assert result.exit_code == 1
+    assert "not a version 1 cassette" in result.stdout
+
+    result = runner.invoke(cli.app, ["--record", str(path), "--replay", str(path), "get-board",
+                                     "--board-id", "board"])
+    assert result.exit_code == 1
@@ -0,0 +1,112 @@
+"""Unit tests for the resident daemon."""
+
+# local imports
+from trello_cli import daemon, trello_api, __app_name__, __version__
+
+# standard library imports
+import os
+import socket
+import threading
+import time
+
+
+def test_forward_without_daemon(monkeypatch, tmp_path):
+    """Test that commands run in-process when no daemon is listening"""
+    monkeypatch.setenv("TRELLO_CLI_SOCKET", str(tmp_path / "missing.sock"))
+    assert daemon.forward(["--version"]) is None
+
+
+def test_run_requests_input_for_prompts():
+    """Test that a command needing a prompt asks the client for stdin"""
+    assert daemon._run(["prepend-label", "--card-id", "a"]) == {"need_input": True}
+
+    res = daemon._run(["prepend-label", "--card-id", "a"], "a\n")
+    assert res["exit_code"] == 1
+    assert "card_id and label_id cannot be the same" in res["output"]
+
+
+def test_forward_to_daemon(monkeypatch, tmp_path, capsys):
+    """Test that a running daemon executes forwarded commands"""
+    path = str(tmp_path / "daemon.sock")
+    monkeypatch.setenv("TRELLO_CLI_SOCKET", path)
+    # the daemon enables the response cache, restored after the test
+    monkeypatch.setattr(trello_api, "response_cache", None)
+    server = threading.Thread(target=daemon.serve, args=(path,), daemon=True)
+    server.start()
+    for _ in range(100):
+        if os.path.exists(path):
+            break
+        time.sleep(0.05)
+
+    try:
+        # no other user may connect to the socket
+        assert os.stat(path).st_mode & 0o077 == 0
+        assert daemon.forward(["--version"]) == 0
+        assert f"{__app_name__} version {__version__}" in capsys.readouterr().out
+    finally:
+        assert daemon.main(["stop"]) == 0
+        server.join(timeout=5)
+    assert not os.path.exists(path)
+
+
+def test_runs_in_process():
+    """Test that streaming and stateful commands are not forwarded"""
+    assert daemon.runs_in_process(["export", "--board-id", "a", "-"])
+    assert daemon.runs_in_process(["--output", "jsonl", "loadtest"])
+    assert daemon.runs_in_process(["--record=cassette.json", "get-boards"])
+    assert daemon.runs_in_process(["--replay", "cassette.json", "get-boards"])
+    assert daemon.runs_in_process(["shell"])
+    assert daemon.runs_in_process(["--page", "view-card", "--card-id", "a"])
+    assert not daemon.runs_in_process(["--columns", "export", "get-boards"])
+    assert not daemon.runs_in_process(["prepend-comment", "--card-id", "a", "--text", "export"])
+
+
+def test_run_in_client_cwd_and_env(monkeypatch, tmp_path):
+    """Test that a command runs in the client's directory with its environment"""
+    monkeypatch.setenv("TRELLO_CLI_OUTBOX", str(tmp_path / "daemon.jsonl"))
+    client = tmp_path / "client"
+    client.mkdir()
+    cwd = os.getcwd()
+
+    res = daemon._run(["--trace", "trace.json", "outbox-status"], cwd=str(client),
+                      env={"TRELLO_CLI_OUTBOX": "outbox.jsonl"})
+    assert res["exit_code"] == 0, res["output"]
+    assert os.getcwd() == cwd
+    assert (client / "trace.json").exists()
+    assert "outbox.jsonl" in res["output"]
+    assert "daemon.jsonl" not in res["output"]
+    assert os.environ["TRELLO_CLI_OUTBOX"] == str(tmp_path / "daemon.jsonl")
+
+
+def test_forward_refuses_untrusted_sockets(monkeypatch, tmp_path):
+    """Test that credentials are only sent to a socket in a private directory"""
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    path = str(shared / "daemon.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        assert daemon._trusted(path)
+        shared.chmod(0o777)
+        assert not daemon._trusted(path)
+        monkeypatch.setenv("TRELLO_CLI_SOCKET", path)
+        assert daemon.forward(["--version"]) is None
+
+
+def test_serve_keeps_a_running_daemon(monkeypatch, tmp_path, capsys):
+    """Test that a second daemon does not replace a running one"""
+    path = str(tmp_path / "daemon.sock")
+    monkeypatch.setattr(daemon, "_send", lambda message, path=None: {"exit_code": 0, "output": "running\n"})
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        assert daemon.serve(path) == 1
+    assert "already running" in capsys.readouterr().out
+    assert os.path.exists(path)
+
+
+def test_run_keeps_stderr_apart(monkeypatch, tmp_path):
+    """Test that the --stats report does not end up in the records on stdout"""
+    res = daemon._run(["--stats", "--output", "jsonl", "outbox-status", "--all"], cwd=str(tmp_path),
+                      env={"TRELLO_CLI_OUTBOX": "outbox.jsonl"})
+    assert res["exit_code"] == 0, res["stderr"]
+    assert res["output"] == ""
+    assert "render" in res["stderr"]
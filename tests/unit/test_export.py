@@ -0,0 +1,110 @@
+""" Test module for the streaming board export of export.py """
+
+# standard library imports
+import gzip
+import io
+import json
+import threading
+import time
+
+# 3rd party imports
+import pytest
+from typer.testing import CliRunner
+
+# local imports
+from trello_cli import cli
+from trello_cli.export import export_board, pipeline
+from trello_cli.settings import get_settings
+from trello_cli.trello_api import TrelloAPI
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def dataset_size():
+    return {'cards': 250, 'lists': 3, 'labels': 4}
+
+
+def test_export_board(server):
+    dataset = server.dataset
+    stream = io.StringIO()
+    counts = export_board(TrelloAPI.from_settings(get_settings()), dataset.board['id'], stream, page_size=40)
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    comments = sum(card['badges']['comments'] for card in dataset.cards.values())
+    assert counts == {'board': 1, 'list': 3, 'label': 4, 'card': 250, 'comment': comments}
+    assert [record['type'] for record in records[:8]] == ['board'] + ['list'] * 3 + ['label'] * 4
+    assert len({record['id'] for record in records if record['type'] == 'card'}) == 250
+    comment = next(record for record in records if record['type'] == 'comment')
+    assert comment['card_id'] in dataset.cards
+    assert comment['text'].startswith("comment ")
+
+
+def test_pipeline_is_bounded():
+    produced, written = [], []
+
+    def source():
+        for number in range(50):
+            produced.append(number)
+            yield number
+
+    def sink(item):
+        # the producer may only run a few pages ahead of a slow writer
+        assert len(produced) - len(written) <= 2 * 2 + 3
+        time.sleep(0.001)
+        written.append(item)
+
+    pipeline(source, lambda item: item * 2, sink, depth=2)
+    assert written == [number * 2 for number in range(50)]
+
+
+def test_pipeline_raises_stage_errors():
+    def source():
+        yield 1
+        raise ValueError("ERROR - fetch failed")
+
+    threads = threading.active_count()
+    with pytest.raises(ValueError, match="fetch failed"):
+        pipeline(source, lambda item: item, lambda item: None)
+    with pytest.raises(ZeroDivisionError):
+        pipeline(lambda: iter(range(100)), lambda item: 1 / 0, lambda item: None)
+    with pytest.raises(RuntimeError):
+        pipeline(lambda: iter(range(100)), lambda item: item,
+                 lambda item: (_ for _ in ()).throw(RuntimeError("disk full")))
+    assert threading.active_count() == threads
+
+
+def test_export_command(server, tmp_path):
+    path = tmp_path / "board.jsonl.gz"
+    result = runner.invoke(cli.app, ["export", "--board-id", server.dataset.board['id'], str(path),
+                                     "--page-size", "100"])
+    assert result.exit_code == 0, result.output
+    assert "250 cards" in result.stdout
+    with gzip.open(path, "rt") as export:
+        assert sum(json.loads(line)['type'] == 'card' for line in export) == 250
+
+
+def test_export_command_unknown_board(server, tmp_path):
+    result = runner.invoke(cli.app, ["export", "--board-id", "0" * 24, str(tmp_path / "board.jsonl")])
+    assert result.exit_code == 1
+    assert "Error exporting board" in result.stdout
+
+
+def test_export_retries_failed_pages(server, mocker):
+    sleep = mocker.patch('trello_cli.export.time.sleep')
+    server.error_rate = 0.3
+    stream = io.StringIO()
+    counts = export_board(TrelloAPI.from_settings(get_settings()), server.dataset.board['id'], stream,
+                          page_size=40, retries=20)
+    assert counts['card'] == 250
+    assert sleep.called
+
+
+def test_export_command_failing_pages(server, tmp_path, mocker):
+    mocker.patch('trello_cli.export.time.sleep')
+    server.error_rate = 1.0
+    path = tmp_path / "board.jsonl"
+    result = runner.invoke(cli.app, ["export", "--board-id", server.dataset.board['id'], str(path)])
+    assert result.exit_code == 1
+    assert "Error exporting board: ERROR - Could not fetch the details of the board" in result.stdout
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,199 @@
+""" Test module running the client stack against the local Trello stand-in of benchmarks/fake_trello.py """
+
+# 3rd party imports
+import pytest
+
+# local imports
+from benchmarks.fake_trello import Dataset, paginate
+from trello_cli import SUCCESS, TRELLO_READ_ERROR, TRELLO_WRITE_ERROR
+from trello_cli.settings import Settings
+from trello_cli.trello_service import TrelloService
+
+
+@pytest.fixture
+def dataset_size():
+    return {'cards': 40, 'lists': 2, 'labels': 3}
+
+
+def test_base_url_setting(server):
+    from trello_cli.trello_api import TrelloAPI
+
+    assert TrelloAPI.from_settings(Settings(base_url=server.base_url.rstrip("/"))).base_url == server.base_url
+    assert TrelloAPI.from_settings(Settings()).base_url == "https://api.trello.com/1/"
+
+
+def test_reads(server):
+    service = TrelloService()
+    board_id = server.dataset.board['id']
+
+    board = service.get_board(board_id)
+    assert board.status_code == SUCCESS
+    assert board.res.name == "Benchmark board"
+
+    trello_list = service.get_list(server.dataset.lists[0]['id']).res
+    cards = list(trello_list.iter_cards(page_size=7))
+    assert len(cards) == 20
+    assert len({card.card_id for card in cards}) == 20
+
+    card = cards[0]
+    comments = service.get_card(card.card_id).res.get_comments()
+    assert len(comments) == card.comments
+
+
+def test_open_cards_pages_by_before():
+    dataset = Dataset(cards=30, lists=2, labels=3)
+    created = dataset.add_card({'idList': dataset.lists[0]['id'], 'name': "new"})
+    ids = [card['id'] for card in dataset.open_cards()]
+    assert ids == sorted(dataset.cards, reverse=True)
+    assert ids[0] == created['id']
+    page = paginate(dataset.open_cards(before=ids[10]), {'limit': 5, 'before': ids[10]})
+    assert [card['id'] for card in page] == ids[11:16]
+
+
+def test_added_comments_page_by_before():
+    dataset = Dataset(cards=30, lists=2, labels=3)
+    card_ids = sorted(dataset.cards)
+    added = [dataset.add_comment(card_id, "added")['id'] for card_id in (card_ids[0], card_ids[-1], card_ids[0])]
+    expected = [comment['id'] for card_id in card_ids for comment in dataset.comments(card_id)]
+    assert set(added) <= set(expected)
+
+    def page_through(pages):
+        ids, before = [], None
+        while True:
+            params = {'limit': 7, 'before': before} if before else {'limit': 7}
+            page = paginate(pages(before), params)
+            if not page:
+                return ids
+            ids += [comment['id'] for comment in page]
+            before = page[-1]['id']
+
+    ids = page_through(dataset.board_comments)
+    assert ids == sorted(expected, reverse=True)
+    assert ids[:3] == added[::-1]
+    ids = page_through(lambda before: dataset.comments(card_ids[0]))
+    assert ids == sorted(ids, reverse=True)
+    assert ids[:2] == [added[2], added[0]]
+
+
+def test_writes(server):
+    service = TrelloService()
+    list_id = server.dataset.lists[0]['id']
+
+    card = service.create_card("new card", list_id)
+    assert card.status_code == SUCCESS
+    comment = service.create_comment(card.res.card_id, "hello")
+    assert comment.status_code == SUCCESS
+    assert server.dataset.card(card.res.card_id)['badges']['comments'] == 1
+
+    label_id = server.dataset.labels[0]['id']
+    assert service.add_card_label(card.res.card_id, label_id).status_code == SUCCESS
+    assert server.dataset.card(card.res.card_id)['labels'][0]['id'] == label_id
+
+
+def test_add_card_label_reports_api_errors(server, mocker):
+    import requests
+
+    service = TrelloService()
+    card_id = next(iter(server.dataset.cards))
+    assert service.add_card_label(card_id, "0" * 24).status_code == TRELLO_WRITE_ERROR
+    mocker.patch('trello_cli.trello_api.TrelloAPI.add_card_label', side_effect=requests.exceptions.ConnectionError)
+    assert service.add_card_label(card_id, server.dataset.labels[0]['id']).status_code == TRELLO_WRITE_ERROR
+
+
+def test_unknown_ids_are_not_found(server):
+    assert TrelloService().get_board("0" * 24).status_code == TRELLO_READ_ERROR
+
+
+def test_error_injection(server):
+    server.error_rate = 1.0
+    service = TrelloService()
+    card_id = next(iter(server.dataset.cards))
+    assert service.get_board(server.dataset.board['id']).status_code == TRELLO_READ_ERROR
+    assert service.get_card(card_id).status_code == TRELLO_READ_ERROR
+    assert service.create_comment(card_id, "lost").status_code == TRELLO_WRITE_ERROR
+
+
+def test_rate_limit(server):
+    import requests
+
+    server.rate_limit = 1
+    url = f"{server.base_url}boards/{server.dataset.board['id']}"
+    assert requests.get(url).status_code == 200
+    response = requests.get(url)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == "1"
+
+
+def test_populated_card(server):
+    from trello_cli.hooks import RequestCounters
+    from trello_cli.trello_api import TrelloAPI
+
+    dataset = server.dataset
+    label_ids = [label['id'] for label in dataset.labels[:2]]
+    counters = RequestCounters()
+    counters.install(TrelloAPI.hooks)
+    try:
+        card = TrelloService().create_card("populated card", dataset.lists[0]['id'], desc="details",
+                                           label_ids=label_ids, pos="top", due="2023-11-01T12:00:00Z",
+                                           member_ids=["member"], comment="first")
+    finally:
+        counters.uninstall(TrelloAPI.hooks)
+
+    assert card.status_code == SUCCESS
+    assert card.comment.data == "first"
+    created = dataset.card(card.res.card_id)
+    assert (created['desc'], created['pos'], created['due'], created['idMembers']) == \
+           ("details", "top", "2023-11-01T12:00:00Z", ["member"])
+    assert [label['id'] for label in created['labels']] == label_ids
+    # one request for the card and its fields, one for the comment
+    assert counters.requests == {'POST': 2}
+
+
+def test_populated_card_failed_comment(server, mocker):
+    mocker.patch('trello_cli.trello_api.TrelloAPI.create_comment', return_value=None)
+    card = TrelloService().create_card("card", server.dataset.lists[0]['id'], comment="lost")
+
+    assert card.status_code == TRELLO_WRITE_ERROR
+    assert card.comment is None
+    assert server.dataset.card(card.res.card_id)['name'] == "card"
+
+
+def test_populated_card_validation(trello_api):
+    for fields in ({'pos': -1}, {'pos': "middle"}, {'id_labels': "label"}, {'due': 1}):
+        with pytest.raises(ValueError):
+            trello_api.create_card("card", "list", **fields)
+
+
+def test_make_trello_card_command(server):
+    from typer.testing import CliRunner
+    from trello_cli import cli
+
+    label_id = server.dataset.labels[0]['id']
+    result = CliRunner().invoke(cli.app, ["make-trello-card", "--list-id", server.dataset.lists[0]['id'],
+                                          "--name", "cli card", "--desc", "details", "--label-id", label_id,
+                                          "--pos", "2.5", "--comment", "first"])
+    assert result.exit_code == 0, result.output
+    created = next(card for card in server.dataset.cards.values() if card['name'] == "cli card")
+    assert (created['desc'], created['pos'], created['labels'][0]['id']) == ("details", "2.5", label_id)
+    assert server.dataset.comments(created['id'])[0]['data']['text'] == "first"
+
+
+def test_get_cards_command_reports_failed_pages(server, mocker):
+    from typer.testing import CliRunner
+    from trello_cli import cli
+
+    mocker.patch('trello_cli.trello_api.TrelloAPI.get_all_cards', return_value=None)
+    result = CliRunner().invoke(cli.app, ["get-cards", "--list-id", server.dataset.lists[0]['id']])
+    assert result.exit_code == 1
+    assert "Error getting cards: ERROR - Could not fetch the first page" in result.stdout
+
+
+@pytest.mark.parametrize("last", [[], ["--last", "3"]])
+def test_view_card_command_reports_failed_pages(server, mocker, last):
+    from typer.testing import CliRunner
+    from trello_cli import cli
+
+    mocker.patch('trello_cli.trello_api.TrelloAPI.get_actions', return_value=None)
+    result = CliRunner().invoke(cli.app, ["view-card", "--card-id", next(iter(server.dataset.cards))] + last)
+    assert result.exit_code == 1
+    assert "Error getting comments: ERROR - Could not fetch the first page" in result.stdout
@@ -0,0 +1,95 @@
+""" Test module for the request hooks of hooks.py """
+
+# standard library imports
+import json
+
+# 3rd party imports
+import pytest
+import requests
+from requests.models import Response
+
+# local imports
+from trello_cli.hooks import HookRegistry, RequestCounters, redact_params, redact_url
+from trello_cli.trello_api import TrelloAPI
+
+card_id = "65352f31c09f6a38f8df1d59"
+
+
+@pytest.fixture
+def hooks():
+    yield TrelloAPI.hooks
+    TrelloAPI.hooks.clear()
+
+
+@pytest.fixture
+def session(mocker):
+    """Fakes the shared requests session, unknown cards fail with a connection error"""
+    def get(endpoint, **kwargs):
+        if card_id not in endpoint:
+            raise requests.exceptions.ConnectionError("connection refused")
+        response = Response()
+        response.status_code = 200
+        response._content = json.dumps({'id': card_id, 'name': 'card'}).encode()
+        return response
+
+    fake = mocker.Mock(get=mocker.Mock(side_effect=get))
+    mocker.patch('trello_cli.trello_api.get_session', return_value=fake)
+    return fake
+
+
+def test_redaction():
+    assert redact_params({'key': 'k', 'token': 't', 'name': 'card'}) == \
+           {'key': '***', 'token': '***', 'name': 'card'}
+    assert redact_url("https://api.trello.com/1/cards?key=abc&fields=name&token=def") == \
+           "https://api.trello.com/1/cards?key=***&fields=name&token=***"
+
+
+def test_registry():
+    registry = HookRegistry()
+    assert not registry.active
+    callback = print
+    registry.register("after_response", callback)
+    assert registry.active
+    registry.unregister("after_response", callback)
+    assert not registry.active
+    with pytest.raises(ValueError):
+        registry.register("after_request", callback)
+
+
+def test_hooks_receive_redacted_events(hooks, session, trello_api):
+    events = []
+    hooks.register("before_request", lambda event: events.append(("before", event)))
+    hooks.register("after_response", lambda event: events.append(("after", event)))
+
+    trello_api.call_api("GET", f"{trello_api.base_url}cards/{card_id}", {'key': 'secret', 'fields': 'name'})
+
+    assert [name for name, _ in events] == ["before", "after"]
+    after = events[1][1]
+    assert after.params == {'key': '***', 'fields': 'name'}
+    assert after.status_code == 200
+    assert after.response_size == len(json.dumps({'id': card_id, 'name': 'card'}))
+    assert after.elapsed >= 0
+
+
+def test_failing_hook_does_not_fail_the_request(hooks, session, trello_api):
+    def failing(event):
+        raise RuntimeError("hook failed")
+
+    hooks.register("before_request", failing)
+    response = trello_api.call_api("GET", f"{trello_api.base_url}cards/{card_id}")
+    assert response.status_code == 200
+
+
+def test_request_counters(hooks, session, trello_api):
+    counters = RequestCounters()
+    counters.install(hooks)
+
+    trello_api.call_api("GET", f"{trello_api.base_url}cards/{card_id}")
+    trello_api.call_api("GET", f"{trello_api.base_url}boards/unknown")
+
+    assert counters.requests == {'GET': 2}
+    assert counters.statuses == {200: 1}
+    assert counters.errors == 1
+
+    counters.uninstall(hooks)
+    assert not hooks.active
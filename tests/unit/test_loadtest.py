@@ -0,0 +1,96 @@
+""" Test module for the load tests of loadtest.py, run against the local Trello stand-in """
+
+# standard library imports
+import json
+
+# 3rd party imports
+import pytest
+from typer.testing import CliRunner
+
+# local imports
+from trello_cli import cli, trello_api
+from trello_cli.loadtest import LoadTest, Sample, client_overrides, parse_mix, summarize
+from trello_cli.trello_service import TrelloService
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def dataset_size():
+    return {'cards': 20, 'lists': 2, 'labels': 3}
+
+
+def test_parse_mix():
+    assert parse_mix("get_board=3, create_card") == {'get_board': 3.0, 'create_card': 1.0}
+    for mix in ("get_boards=1", "get_board=x", "get_board=-1", "get_board=0", ""):
+        with pytest.raises(ValueError):
+            parse_mix(mix)
+
+
+def test_summarize():
+    samples = [Sample(0.0, 'get_board', latency / 100, latency != 10) for latency in range(1, 11)]
+    summary = summarize(samples, 2.0)
+    assert summary.count == 10
+    assert summary.errors == 1
+    assert summary.throughput == 5.0
+    assert summary.p50 == 0.05
+    assert summary.max == 0.1
+
+
+def test_client_overrides_are_restored(server):
+    limiter, cache = trello_api.rate_limiter, trello_api.response_cache
+    with client_overrides(server.base_url, client_rate_limit=False):
+        assert trello_api.rate_limiter.max_calls is None
+        assert trello_api.response_cache is None
+        assert TrelloService().get_board(server.dataset.board['id']).res.name == "Benchmark board"
+    assert trello_api.rate_limiter is limiter
+    assert trello_api.response_cache is cache
+
+
+def test_run(server):
+    dataset = server.dataset
+    card_ids = list(dataset.cards)[:5]
+    intervals = []
+    with client_overrides(server.base_url, client_rate_limit=False):
+        test = LoadTest(TrelloService(), dataset.board['id'], dataset.lists[0]['id'], card_ids,
+                        parse_mix("get_board,get_all_cards,get_card,create_card,create_comment"), seed=1)
+        summary = test.run(0.5, concurrency=2, interval=0.25,
+                           on_interval=lambda elapsed, window: intervals.append(elapsed))
+
+    assert summary.count == len(test.samples) > 0
+    assert summary.errors == 0
+    assert intervals == [0.25, 0.5]
+    assert set(test.per_operation()) <= set(test.weights)
+
+
+def test_run_at_a_target_rate(server):
+    dataset = server.dataset
+    with client_overrides(server.base_url, client_rate_limit=False):
+        test = LoadTest(TrelloService(), dataset.board['id'], dataset.lists[0]['id'], [],
+                        parse_mix("get_board"))
+        summary = test.run(0.5, rate=20, concurrency=4)
+    assert summary.count == 10
+
+
+def test_needs_cards_for_card_operations(server):
+    with pytest.raises(ValueError):
+        LoadTest(TrelloService(), "board", "list", [], parse_mix("get_card"))
+
+
+def test_loadtest_command(server):
+    result = runner.invoke(cli.app, ["--output", "jsonl", "loadtest", "--board-id", server.dataset.board['id'],
+                                     "--base-url", server.base_url, "--duration", "0.4", "--interval", "0.2",
+                                     "--no-client-rate-limit"])
+    assert result.exit_code == 0, result.output
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [record['type'] for record in records if record['type'] == 'interval'] == ['interval'] * 2
+    total = records[-1]
+    assert total['type'] == 'total'
+    assert total['count'] > 0
+    assert total['error_rate'] == 0.0
+
+
+def test_loadtest_command_rejects_bad_mix():
+    result = runner.invoke(cli.app, ["loadtest", "--board-id", "board", "--mix", "delete_board=1"])
+    assert result.exit_code == 1
+    assert "Unknown operation" in result.stdout
@@ -0,0 +1,188 @@
+""" Test module for the write-behind outbox of outbox.py """
+
+# 3rd party imports
+import pytest
+from typer.testing import CliRunner
+
+# local imports
+from trello_cli import SUCCESS, cli
+from trello_cli.outbox import DONE, FAILED, PENDING, Outbox, OutboxEntry, start_background_flush
+from trello_cli.trello_service import TrelloService
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    path = str(tmp_path / "outbox.jsonl")
+    monkeypatch.setenv("TRELLO_CLI_OUTBOX", path)
+    return Outbox(path)
+
+
+def test_enqueue(outbox):
+    entry = outbox.enqueue('create_comment', {'card_id': "card", 'text': "hello"})
+    assert entry.status == PENDING
+    assert entry.target == "card:card"
+    assert Outbox(outbox.path).entries() == [entry]
+
+    with pytest.raises(ValueError):
+        outbox.enqueue('delete_card', {'card_id': "card"})
+    with pytest.raises(ValueError):
+        outbox.enqueue('create_comment', {'card_id': "card"})
+
+
+def test_idempotency_key(outbox):
+    first = outbox.enqueue('create_comment', {'card_id': "card", 'text': "hello"}, key="step-1")
+    second = outbox.enqueue('create_comment', {'card_id': "card", 'text': "hello"}, key="step-1")
+    assert second == first
+    assert len(outbox.entries()) == 1
+
+
+def test_torn_lines_are_skipped(outbox):
+    entry = outbox.enqueue('add_card_label', {'card_id': "card", 'label_id': "label"})
+    with open(outbox.path, "a") as journal:
+        journal.write('{"op": "done", "id": ')
+    assert outbox.entries() == [entry]
+
+
+def test_service_queues_writes(outbox):
+    response = TrelloService(outbox=outbox).create_card("card", "list", label_ids=["label"], comment="first")
+    assert response.status_code == SUCCESS
+    assert isinstance(response.res, OutboxEntry)
+    assert outbox.entries(PENDING)[0].args == {'name': "card", 'list_id': "list", 'label_ids': ["label"],
+                                               'comment': "first"}
+
+
+def test_flush_delivers_in_order(server, outbox):
+    card_id = next(iter(server.dataset.cards))
+    queued = TrelloService(outbox=outbox)
+    for number in range(5):
+        queued.create_comment(card_id, f"queued {number}")
+    queued.add_card_label(card_id, server.dataset.labels[0]['id'])
+    queued.create_card("queued card", server.dataset.lists[0]['id'])
+
+    entries = outbox.flush(TrelloService())
+
+    assert [entry.status for entry in entries] == [DONE] * 7
+    assert server.dataset.labels[0]['id'] in [label['id'] for label in server.dataset.card(card_id)['labels']]
+    texts = [comment['data']['text'] for comment in server.dataset.comments(card_id)]
+    # comments are listed newest first
+    assert texts[:5] == [f"queued {number}" for number in range(4, -1, -1)]
+    card_entry = next(entry for entry in entries if entry.action == 'create_card')
+    assert server.dataset.card(card_entry.result)['name'] == "queued card"
+    # delivered entries are kept for their idempotency keys until compacted after KEY_RETENTION
+    assert outbox.entries() == entries
+    outbox.compact(retention=0)
+    assert outbox.entries() == []
+
+
+def test_delivered_keys_are_retained(server, outbox):
+    card_id = next(iter(server.dataset.cards))
+    queued = TrelloService(outbox=outbox)
+    queued.create_comment(card_id, "once", idempotency_key="step-1")
+    delivered, = outbox.flush(TrelloService())
+
+    again = queued.create_comment(card_id, "once", idempotency_key="step-1").res
+    assert again == delivered
+    assert again.status == DONE and again.result and again.delivered
+    assert outbox.flush(TrelloService()) == []
+    assert [comment['data']['text'] for comment in server.dataset.comments(card_id)].count("once") == 1
+
+
+def test_flush_retries_and_fails(server, outbox):
+    card_id = next(iter(server.dataset.cards))
+    queued = TrelloService(outbox=outbox)
+    queued.create_comment(card_id, "first")
+    queued.create_comment(card_id, "second")
+
+    server.error_rate = 1.0
+    entries = outbox.flush(TrelloService(), max_attempts=2, retries=0, retry_delay=0)
+    # the second comment waits for the first
+    assert [(entry.args['text'], entry.status, entry.attempts) for entry in entries] == [("first", PENDING, 1)]
+
+    entries = outbox.flush(TrelloService(), max_attempts=2, retries=0, retry_delay=0)
+    assert [entry.status for entry in entries] == [FAILED, PENDING]
+    assert entries[0].error
+    assert len(outbox.entries(FAILED)) == 1
+
+    server.error_rate = 0.0
+    assert len(outbox.retry_failed()) == 1
+    entries = outbox.flush(TrelloService())
+    assert [entry.status for entry in entries] == [DONE, DONE]
+
+
+def test_defer_and_flush_commands(server, outbox, mocker):
+    background = mocker.patch('trello_cli.outbox.start_background_flush')
+    card_id = next(iter(server.dataset.cards))
+
+    result = runner.invoke(cli.app, ["--defer", "--idempotency-key", "step-1", "prepend-comment",
+                                     "--card-id", card_id, "--text", "deferred"])
+    assert result.exit_code == 0, result.output
+    assert "queued" in result.stdout
+    background.assert_called_once_with(outbox.path)
+    runner.invoke(cli.app, ["--defer", "--idempotency-key", "step-1", "prepend-comment",
+                            "--card-id", card_id, "--text", "deferred"])
+
+    result = runner.invoke(cli.app, ["outbox-status"])
+    assert result.exit_code == 0
+    assert "1 pending, 0 failed" in result.stdout
+
+    result = runner.invoke(cli.app, ["--output", "jsonl", "outbox-flush"])
+    assert result.exit_code == 0, result.output
+    assert '"status": "done"' in result.stdout
+    assert server.dataset.comments(card_id)[0]['data']['text'] == "deferred"
+    assert [entry.status for entry in Outbox(outbox.path).entries()] == [DONE]
+
+
+def test_background_flush_bypasses_daemon(outbox, mocker):
+    popen = mocker.patch('trello_cli.outbox.subprocess.Popen')
+    start_background_flush(outbox.path)
+    env = popen.call_args.kwargs['env']
+    assert env['TRELLO_CLI_NO_DAEMON'] == "1"
+    assert env['TRELLO_CLI_OUTBOX'] == outbox.path
+
+
+def test_flush_delivers_writes_queued_meanwhile(server, outbox, mocker):
+    card_id = next(iter(server.dataset.cards))
+    queued = TrelloService(outbox=outbox)
+    queued.create_comment(card_id, "first")
+    deliver = Outbox._deliver
+
+    def deliver_and_queue(service, entry):
+        if entry.args['text'] == "first":
+            queued.create_comment(card_id, "during flush")
+        return deliver(service, entry)
+
+    mocker.patch.object(Outbox, '_deliver', staticmethod(deliver_and_queue))
+    entries = outbox.flush(TrelloService())
+    assert [(entry.args['text'], entry.status) for entry in entries] == [("first", DONE), ("during flush", DONE)]
+    assert outbox.entries(PENDING) == []
+
+
+def test_flush_queues_the_first_comment_of_a_card(server, outbox):
+    queued = TrelloService(outbox=outbox)
+    queued.create_card("queued card", server.dataset.lists[0]['id'], idempotency_key="card", comment="first")
+
+    card_entry, comment_entry = outbox.flush(TrelloService())
+    assert (card_entry.status, comment_entry.status) == (DONE, DONE)
+    assert comment_entry.key == "card:comment"
+    assert comment_entry.args == {'card_id': card_entry.result, 'text': "first"}
+    assert [comment['data']['text'] for comment in server.dataset.comments(card_entry.result)] == ["first"]
+
+
+def test_card_is_not_resent_if_its_comment_cannot_be_queued(server, outbox, mocker):
+    list_id = server.dataset.lists[0]['id']
+    TrelloService(outbox=outbox).create_card("queued card", list_id, comment="first")
+    enqueue = Outbox.enqueue
+
+    def failing_enqueue(self, action, args, key=None):
+        if action == 'create_comment':
+            raise OSError("disk full")
+        return enqueue(self, action, args, key)
+
+    mocker.patch.object(Outbox, 'enqueue', failing_enqueue)
+    card_entry, = outbox.flush(TrelloService())
+    assert card_entry.status == DONE
+    assert "disk full" in card_entry.error
+    assert outbox.flush(TrelloService()) == []
+    assert [card['name'] for card in server.dataset.cards.values()].count("queued card") == 1
@@ -0,0 +1,82 @@
+""" Test module for the machine readable output formats of output.py """
+
+# standard library imports
+import io
+import json
+
+# local imports
+from trello_cli.output import OutputFormat, make_writer
+
+records = [
+    {'type': 'card', 'id': 'a', 'name': 'first\tcard'},
+    {'type': 'card', 'id': 'b', 'name': 'second'},
+]
+
+
+def write(output_format, columns=None):
+    """Writes the test records and returns the output"""
+    stream = io.StringIO()
+    writer = make_writer(output_format, columns, stream)
+    for record in records:
+        writer.write(record)
+    writer.close()
+    return stream.getvalue()
+
+
+def test_text_has_no_writer():
+    assert make_writer(OutputFormat.text) is None
+
+
+def test_jsonl_writer():
+    lines = write(OutputFormat.jsonl).splitlines()
+    assert [json.loads(line) for line in lines] == records
+
+
+def test_json_writer():
+    assert json.loads(write(OutputFormat.json)) == records
+
+    stream = io.StringIO()
+    make_writer(OutputFormat.json, stream=stream).close()
+    assert json.loads(stream.getvalue()) == []
+
+
+def test_tsv_writer_escapes_and_selects_columns():
+    assert write(OutputFormat.tsv, ['id', 'name']) == "id\tname\na\tfirst\\tcard\nb\tsecond\n"
+
+
+def test_tsv_writer_starts_a_table_per_record_type():
+    stream = io.StringIO()
+    writer = make_writer(OutputFormat.tsv, stream=stream)
+    for record in [records[0], {'type': 'comment', 'id': 'c', 'text': 'hi'},
+                   {'type': 'comment', 'id': 'd', 'text': 'ho'},
+                   {'type': 'label', 'id': 'e', 'name': 'urgent', 'color': 'red'}]:
+        writer.write(record)
+    writer.close()
+    assert stream.getvalue() == ("type\tid\tname\ncard\ta\tfirst\\tcard\n\n"
+                                 "type\tid\ttext\ncomment\tc\thi\ncomment\td\tho\n\n"
+                                 "type\tid\tname\tcolor\nlabel\te\turgent\tred\n")
+
+
+def test_get_board_jsonl(mocker):
+    """Test that --output jsonl writes plain records without rich markup"""
+    from trello_cli import cli
+    from typer.testing import CliRunner
+
+    responses = {
+        'get_board': {'id': 'board', 'name': 'Board'},
+        'get_all_lists': [{'id': 'todo', 'name': 'To do', 'idBoard': 'board'}],
+        'get_labels': [{'id': 'red', 'name': 'urgent', 'color': 'red', 'idBoard': 'board'}],
+    }
+    for method, payload in responses.items():
+        mocker.patch(f'trello_cli.trello_api.TrelloAPI.{method}',
+                     return_value=mocker.Mock(status_code=200, json=mocker.Mock(return_value=payload)))
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli.app, ["--output", "jsonl", "--columns", "type,id", "get-board", "--board-id", "board"])
+
+    assert result.exit_code == 0
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        {'type': 'board', 'id': 'board'},
+        {'type': 'list', 'id': 'todo'},
+        {'type': 'label', 'id': 'red'},
+    ]
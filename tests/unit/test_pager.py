@@ -0,0 +1,74 @@
+""" Test module for the terminal pager of pager.py """
+
+# standard library imports
+import io
+
+# 3rd party imports
+import pytest
+from rich.console import Console
+
+# local imports
+from trello_cli.pager import Pager, PagerQuit
+
+
+def make_pager(keys, height=11):
+    """Returns a pager of a 10 line screen reading the given key presses"""
+    console = Console(file=io.StringIO(), width=40, height=height)
+    keys = iter(keys)
+    return Pager(console, read_key=lambda: next(keys))
+
+
+def produce(pager, count):
+    """Adds lines to the pager and returns how many were produced"""
+    produced = 0
+    try:
+        for index in range(count):
+            produced += 1
+            pager.add(f"line {index}")
+    except PagerQuit:
+        pass
+    return produced
+
+
+def test_stops_producing_until_scrolled():
+    pager = make_pager(["q"])
+    assert produce(pager, 1000) == 11
+    pager.close()
+
+
+def test_scrolling_pulls_more_lines():
+    pager = make_pager([" ", "j", "j", "q"])
+    assert produce(pager, 1000) == 23
+    assert pager.top == 12
+
+
+def test_scrolling_back_does_not_pull_lines():
+    pager = make_pager([" ", "b", "b", "q"])
+    assert produce(pager, 1000) == 21
+    assert pager.top == 0
+
+
+def test_end_key_pulls_every_line():
+    pager = make_pager(["G", "k", "q"])
+    assert produce(pager, 100) == 100
+    pager.close()
+    assert pager.top == 89
+
+
+def test_short_output_is_printed_without_paging():
+    pager = make_pager([])
+    produce(pager, 3)
+    pager.rule("done")
+    pager.close()
+    output = pager.console.file.getvalue()
+    assert "line 2" in output and "done" in output
+
+
+def test_keyboard_interrupt_quits():
+    def interrupt():
+        raise KeyboardInterrupt()
+
+    pager = Pager(Console(file=io.StringIO(), height=5), read_key=interrupt)
+    with pytest.raises(PagerQuit):
+        for index in range(10):
+            pager.add(f"line {index}")
@@ -0,0 +1,58 @@
+""" Test module for the --profile option of profiling.py """
+
+# standard library imports
+import os
+import pstats
+
+# 3rd party imports
+import pytest
+
+# local imports
+from trello_cli.profiling import frame_group, summary
+
+board_id = "65352f31c09f6a38f8df1d0a"
+
+
+def test_frame_group():
+    assert frame_group(os.path.join("site-packages", "trello_cli", "trello_api.py")) == "trello_api"
+    assert frame_group(os.path.join("site-packages", "rich", "console.py")) == "rich"
+    assert frame_group("<built-in>") == "other"
+
+
+def test_summary_lists_top_functions_per_group():
+    from rich.console import Console
+
+    self_times = {(os.path.join("trello_cli", "trello_data.py"), f"func_{index}"): index / 1000
+                  for index in range(10)}
+    console = Console(width=80, record=True)
+    console.print(summary(self_times, top=2))
+    text = console.export_text()
+
+    assert "func_9" in text and "func_8" in text and "func_7" not in text
+    assert "45.0" in text
+
+
+@pytest.mark.parametrize("file_name", ["get_board.prof", "get_board.collapsed"])
+def test_profile_option(mocker, tmp_path, file_name):
+    """Test that --profile writes the profile and prints the summary to stderr"""
+    from trello_cli import cli
+    from typer.testing import CliRunner
+
+    responses = {
+        'get_board': {'id': board_id, 'name': 'Board'},
+        'get_all_lists': [{'id': 'todo', 'name': 'To do', 'idBoard': board_id}],
+        'get_labels': [],
+    }
+    for method, payload in responses.items():
+        mocker.patch(f'trello_cli.trello_api.TrelloAPI.{method}',
+                     return_value=mocker.Mock(status_code=200, json=mocker.Mock(return_value=payload)))
+    path = str(tmp_path / file_name)
+
+    result = CliRunner(mix_stderr=False).invoke(
+        cli.app, ["--profile", path, "get-board", "--board-id", board_id])
+
+    assert result.exit_code == 0
+    assert "trello_data" in result.stderr
+    assert os.path.exists(path)
+    if path.endswith(".prof"):
+        assert pstats.Stats(path).total_calls > 0
@@ -0,0 +1,53 @@
+"""Unit tests for the settings module."""
+
+# local imports
+from trello_cli import settings
+from trello_cli.settings import Settings, load_settings
+
+# standard library imports
+import os
+
+# third party imports
+import pytest
+
+
+@pytest.fixture
+def env_file(tmp_path, monkeypatch):
+    """Writes a .env file and isolates the environment and cache directory"""
+    for env_var in settings.ENV_VARS.values():
+        monkeypatch.delenv(env_var, raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    path = tmp_path / ".env"
+    path.write_text("TRELLO_API_KEY = key\nTRELLO_API_TOKEN=token\n")
+    return str(path)
+
+
+def test_load_settings(env_file):
+    assert load_settings(env_file, use_cache=False) == Settings(api_key="key", api_token="token")
+
+
+def test_environment_takes_precedence(env_file, monkeypatch):
+    monkeypatch.setenv("TRELLO_API_KEY", "env key")
+    assert load_settings(env_file, use_cache=False).api_key == "env key"
+
+
+def test_cache_is_keyed_on_env_file(env_file, mocker):
+    load_settings(env_file, use_cache=True)
+    assert os.stat(settings._cache_path()).st_mode & 0o777 == 0o600
+
+    dotenv_values = mocker.patch("dotenv.dotenv_values", return_value={"TRELLO_API_KEY": "new key"})
+    assert load_settings(env_file, use_cache=True).api_key == "key"
+    dotenv_values.assert_not_called()
+
+    with open(env_file, "a") as file:
+        file.write("TRELLO_API_SECRET=secret\n")
+    assert load_settings(env_file, use_cache=True).api_key == "new key"
+    dotenv_values.assert_called_once_with(env_file)
+
+
+def test_get_settings_is_parsed_once(monkeypatch, mocker):
+    monkeypatch.setattr(settings, "_settings", None)
+    load = mocker.patch("trello_cli.settings.load_settings", return_value=Settings())
+    assert settings.get_settings() is settings.get_settings()
+    load.assert_called_once()
+    settings.reset_settings()
@@ -0,0 +1,49 @@
+"""Unit tests for the interactive shell."""
+
+# local imports
+from trello_cli import trello_api
+from trello_cli.shell import Shell
+
+# third party imports
+import pytest
+
+
+@pytest.fixture
+def shell(monkeypatch):
+    """Shell with the response cache restored after the test"""
+    monkeypatch.setattr(trello_api, "response_cache", None)
+    return Shell()
+
+
+def test_use_sets_context(shell, capsys):
+    assert shell.execute("use board b1")
+    assert shell.context == {"board": "b1"}
+    assert shell.prompt() == "trello_cli (board b1)> "
+
+
+def test_context_fills_missing_options(shell, capsys):
+    shell.execute("use card c1")
+    shell.execute("prepend-label --label-id c1")
+    assert "card_id and label_id cannot be the same" in capsys.readouterr().out
+
+
+def test_explicit_option_overrides_context(shell):
+    shell.context["card"] = "c1"
+    assert shell._with_context(["prepend-label", "--card-id=c2"]) == ["prepend-label", "--card-id=c2"]
+
+
+def test_successful_command_updates_context(shell):
+    shell._update_context(["get-cards", "--list-id", "l1"])
+    assert shell.context == {"list": "l1"}
+
+
+def test_unexpected_errors_keep_the_shell_running(shell, capsys, mocker):
+    mocker.patch('trello_cli.cli._get_service', side_effect=RuntimeError("connection pool closed"))
+    assert shell.execute("get-board --board-id b1")
+    assert "Error: RuntimeError: connection pool closed" in capsys.readouterr().out
+    assert shell.execute("use board b2")
+
+
+def test_exit(shell):
+    assert shell.execute("--version")
+    assert not shell.execute("exit")
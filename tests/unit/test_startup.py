@@ -0,0 +1,50 @@
+"""Startup benchmarks for the CLI entry point.
+
+These fail when importing the CLI pulls the heavy dependencies back in or
+when the cold start import time regresses past a budget. The budget can be
+raised for slow machines with TRELLO_CLI_IMPORT_BUDGET_MS.
+"""
+
+# standard library imports
+import os
+import subprocess
+import sys
+
+# third party imports
+import pytest
+
+# modules only needed once a command talks to Trello
+DEFERRED_MODULES = ('requests', 'requests_oauthlib', 'oauthlib', 'dotenv')
+
+IMPORT_BUDGET_MS = float(os.getenv("TRELLO_CLI_IMPORT_BUDGET_MS", 250))
+
+
+def import_times(*args) -> dict:
+    """Runs python -X importtime and returns the cumulative import time per module in microseconds"""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args],
+                            capture_output=True, text=True, check=True,
+                            env={**os.environ, "TRELLO_CLI_NO_DAEMON": "1"})
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["trello_cli.cli", "trello_cli.__main__"])
+def test_import_defers_heavy_dependencies(module):
+    times = import_times("-c", f"import {module}")
+    assert not set(DEFERRED_MODULES).intersection(times)
+
+
+def test_version_does_not_import_typer():
+    times = import_times("-m", "trello_cli", "--version")
+    assert "typer" not in times
+    assert "trello_cli.cli" not in times
+
+
+def test_cli_import_time_budget():
+    best = min(import_times("-c", "import trello_cli.cli")["trello_cli.cli"] for _ in range(3))
+    assert best / 1000 < IMPORT_BUDGET_MS, f"importing trello_cli.cli took {best / 1000:.0f}ms"
@@ -0,0 +1,113 @@
+""" Test module for the network statistics of stats.py """
+
+# standard library imports
+import json
+
+# 3rd party imports
+import pytest
+from requests.models import Response
+
+# local imports
+from trello_cli import stats
+from trello_cli.stats import endpoint_template, percentile
+
+board_id = "65352f31c09f6a38f8df1d0a"
+
+
+def make_response(payload, status_code=200):
+    """Builds a requests Response holding a json payload"""
+    response = Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+@pytest.fixture
+def session(mocker):
+    """Fakes the shared requests session with responses for a board"""
+    payloads = {
+        f"boards/{board_id}/lists": [{'id': 'todo', 'name': 'To do', 'idBoard': board_id}],
+        f"boards/{board_id}/labels": [{'id': 'red', 'name': 'urgent', 'color': 'red', 'idBoard': board_id}],
+        f"boards/{board_id}": {'id': board_id, 'name': 'Board'},
+    }
+
+    def get(endpoint, **kwargs):
+        path = endpoint.split("/1/", 1)[1].strip("/")
+        return make_response(payloads[path]) if path in payloads else make_response({}, 404)
+
+    fake = mocker.Mock(get=mocker.Mock(side_effect=get))
+    mocker.patch('trello_cli.trello_api.get_session', return_value=fake)
+    yield fake
+    stats.disable_stats()
+
+
+def test_endpoint_template():
+    url = f"https://api.trello.com/1//cards/{board_id}/idLabels?value=x"
+    assert endpoint_template("POST", url) == "POST cards/{id}/idLabels"
+    assert endpoint_template("GET", "https://api.trello.com/1/members/me/boards/?filter=all") \
+           == "GET members/me/boards"
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile([], 0.5) == 0.0
+
+
+def test_disabled_by_default(session, trello_api):
+    response = trello_api.get_board(board_id)
+    assert stats.collector is None
+    assert response.json()['name'] == 'Board'
+
+
+def test_requests_are_recorded(session, trello_api):
+    collector = stats.enable_stats()
+    stats.decode(trello_api.get_board(board_id))
+    trello_api.get_board(board_id)
+    trello_api.get_card("65352f31c09f6a38f8df1d59")
+
+    board = collector.endpoints["GET boards/{id}"]
+    assert board.count == 2
+    assert board.statuses[200] == 2
+    assert board.bytes_in == 2 * len(json.dumps({'id': board_id, 'name': 'Board'}))
+    assert collector.endpoints["GET cards/{id}"].statuses[404] == 1
+    assert collector.phases["decode"] > 0
+
+
+def test_decoding_is_timed_at_the_call_site(session, trello_api):
+    collector = stats.enable_stats()
+    response = trello_api.get_board(board_id)
+    # the response is left as requests returned it
+    assert 'json' not in vars(response)
+    assert stats.decode(response)['name'] == 'Board'
+    assert collector.phases["decode"] > 0
+
+
+def test_paged_rendering_is_timed():
+    from io import StringIO
+    from rich.console import Console
+    from trello_cli.pager import Pager
+
+    collector = stats.enable_stats()
+    try:
+        pager = Pager(Console(file=StringIO(), height=10), read_key=lambda: "q")
+        pager.add("a line")
+        pager.close()
+    finally:
+        stats.disable_stats()
+    assert collector.phases["render"] > 0
+
+
+def test_stats_option(session):
+    """Test that --stats reports the requests of a command on stderr"""
+    from trello_cli import cli
+    from typer.testing import CliRunner
+
+    result = CliRunner(mix_stderr=False).invoke(cli.app, ["--stats", "get-board", "--board-id", board_id])
+
+    assert result.exit_code == 0
+    assert "GET boards/{id}/lists" in result.stderr
+    assert "render" in result.stderr
+    assert "GET boards" not in result.stdout
+    assert stats.collector is None
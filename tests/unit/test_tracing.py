@@ -0,0 +1,86 @@
+""" Test module for the spans of tracing.py """
+
+# standard library imports
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party imports
+import pytest
+from requests.models import Response
+
+# local imports
+from trello_cli import tracing
+
+board_id = "65352f31c09f6a38f8df1d0a"
+
+
+@pytest.fixture
+def tracer():
+    yield tracing.enable_tracing()
+    tracing.disable_tracing()
+
+
+def test_disabled_by_default():
+    assert tracing.tracer is None
+    with tracing.span("ignored") as span:
+        assert span is None
+    assert tracing.traced(lambda: 1)() == 1
+
+
+def test_spans_nest_across_threads(tracer):
+    @tracing.traced
+    def work(item):
+        return item * 2
+
+    with tracing.span("outer", items=2) as outer:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert list(executor.map(tracing.propagate(work), [1, 2])) == [2, 4]
+
+    spans = {span.name: span for span in tracer.spans}
+    inner = [span for span in tracer.spans if span.name.endswith("work")]
+    assert len(inner) == 2
+    assert all(span.parent_id == outer.span_id for span in inner)
+    assert spans["outer"].parent_id is None
+    assert all(span.trace_id == tracer.trace_id for span in tracer.spans)
+
+
+def test_errors_mark_the_span(tracer):
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError("bad id")
+
+    exported = tracer.to_otlp()['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+    assert exported['status'] == {'code': tracing.STATUS_ERROR, 'message': "ValueError: bad id"}
+
+
+def test_trace_option(mocker, tmp_path):
+    """Test that --trace writes the call tree of a command as OTLP/JSON"""
+    from trello_cli import cli
+    from typer.testing import CliRunner
+
+    payloads = {
+        f"boards/{board_id}/lists": [{'id': 'todo', 'name': 'To do', 'idBoard': board_id}],
+        f"boards/{board_id}/labels": [],
+        f"boards/{board_id}": {'id': board_id, 'name': 'Board'},
+    }
+
+    def get(endpoint, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response._content = json.dumps(payloads[endpoint.split("/1/", 1)[1].strip("/")]).encode()
+        return response
+
+    mocker.patch('trello_cli.trello_api.get_session', return_value=mocker.Mock(get=get))
+    path = tmp_path / "trace.json"
+
+    result = CliRunner().invoke(cli.app, ["--trace", str(path), "get-board", "--board-id", board_id])
+
+    assert result.exit_code == 0
+    assert tracing.tracer is None
+    spans = json.loads(path.read_text())['resourceSpans'][0]['scopeSpans'][0]['spans']
+    by_name = {span['name']: span for span in spans}
+    root = by_name["cli get-board"]
+    assert by_name["TrelloService.get_board"]['parentSpanId'] == root['spanId']
+    lists = by_name["GET boards/{id}/lists"]
+    assert lists['parentSpanId'] == by_name["Board.get_all_lists"]['spanId']
+    assert {'key': 'http.response.status_code', 'value': {'intValue': '200'}} in lists['attributes']
@@ -0,0 +1,151 @@
+""" Test module for the trello objects of trello_data.py """
+
+# standard library imports
+import sys
+
+# local imports
+from trello_cli.trello_data import Board, TrelloList, Card, CardView, Comment, Label
+
+# third party imports
+import pytest
+
+label_json = {'id': 'l1', 'name': 'urgent', 'color': 'red', 'idBoard': 'b1'}
+card_json = {'id': 'c1', 'name': 'card', 'labels': [label_json], 'desc': 'desc', 'badges': {'comments': 2}}
+
+
+@pytest.mark.parametrize("trello_object", [
+    Board(board_id='b1', name='board'),
+    TrelloList(list_id='l1', name='list'),
+    Card.from_json(card_json),
+    CardView.from_json(card_json),
+    Comment(comment_id='a1', data='text', member_creator='Jane', date='2023-10-22T10:00:00.000Z'),
+    Label.from_json(label_json),
+])
+def test_trello_objects_are_compact(trello_object):
+    """Test that trello objects use slots and share a single client"""
+    assert not hasattr(trello_object, '__dict__')
+    assert trello_object.client is Board(board_id='b2', name='board').client
+
+
+def test_card_from_json():
+    """Test that a card keeps its public attributes and shares label dicts"""
+    card = Card.from_json(card_json)
+    other = Card.from_json({**card_json, 'id': 'c2', 'labels': [dict(label_json)]})
+
+    assert (card.card_id, card.name, card.desc, card.comments) == ('c1', 'card', 'desc', 2)
+    assert card.labels == [label_json]
+    assert other.labels[0] is card.labels[0]
+    assert repr(card) == f" (id = c1, name=card, labels={[label_json]})"
+    assert [label.label_id for label in card.get_labels()] == ['l1']
+
+
+def test_shared_labels_are_read_only_and_released():
+    """Test that shared label dicts cannot be changed and are dropped with the last card"""
+    from trello_cli import trello_data
+
+    card = Card.from_json({**card_json, 'labels': [{**label_json, 'id': 'l9'}]})
+    with pytest.raises(TypeError):
+        card.labels[0]['name'] = 'changed'
+    assert label_json['name'] == 'urgent'
+    key = tuple(card.labels[0].items())
+    assert key in trello_data._labels
+
+    del card
+    assert key not in trello_data._labels
+
+
+def test_card_view_reads_fields_on_access():
+    """Test that a card view matches a card and only reads the fields used"""
+    view = CardView.from_json(card_json)
+    card = Card.from_json(card_json)
+
+    assert (view.card_id, view.name, view.desc, view.comments) == (card.card_id, card.name, card.desc, card.comments)
+    assert repr(view) == repr(card)
+    assert view.get_labels() is view.get_labels()
+    assert CardView.from_json({'id': 'c3', 'name': 'partial'}).name == 'partial'
+    assert not isinstance(view, Card)
+    assert sys.getsizeof(view) < sys.getsizeof(card)
+
+
+def test_get_all_cards_view(mocker):
+    """Test that get_all_cards returns views over the decoded json"""
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.get_all_cards',
+        return_value=mocker.Mock(json=mocker.Mock(return_value=[card_json]))
+    )
+    cards = TrelloList(list_id='l1', name='list').get_all_cards(view=True)
+    assert isinstance(cards[0], CardView)
+    assert cards[0]._data is card_json
+
+
+def comment_json(index):
+    """Builds a commentCard action, higher indexes are newer"""
+    return {'id': f'a{index:03d}', 'data': {'text': f'comment {index}'},
+            'memberCreator': {'fullName': 'Jane'}, 'date': f'2023-10-22T10:{index // 60:02d}:{index % 60:02d}.000Z'}
+
+
+@pytest.fixture
+def get_actions(mocker):
+    """Mocks GET cards/{id}/actions over 25 comments, newest first"""
+    actions = [comment_json(index) for index in reversed(range(25))]
+
+    def get_page(card_id, limit=50, before=None):
+        start = 0 if before is None else [action['id'] for action in actions].index(before) + 1
+        return mocker.Mock(status_code=200, json=mocker.Mock(return_value=actions[start:start + limit]))
+
+    return mocker.patch('trello_cli.trello_api.TrelloAPI.get_actions', side_effect=get_page)
+
+
+def test_iter_comments_pages_through_history(get_actions):
+    """Test that every comment is returned by following the before cursor"""
+    comments = list(Card.from_json(card_json).iter_comments(page_size=10))
+
+    assert [comment.data for comment in comments] == [f'comment {index}' for index in reversed(range(25))]
+    assert [call.kwargs['before'] for call in get_actions.call_args_list] == [None, 'a015', 'a005']
+
+
+@pytest.mark.parametrize("card_class", [Card, CardView])
+def test_get_latest_comments(get_actions, card_class):
+    """Test that only the requested number of comments is fetched"""
+    comments = card_class.from_json(card_json).get_latest_comments(3)
+
+    assert [comment.data for comment in comments] == ['comment 24', 'comment 23', 'comment 22']
+    get_actions.assert_called_once_with('c1', limit=3, before=None)
+
+
+def test_iter_comments_raises_for_failed_pages(mocker):
+    """Test that a page without a 200 response raises instead of being decoded"""
+    mocker.patch('trello_cli.trello_api.TrelloAPI.get_actions', return_value=None)
+
+    with pytest.raises(ValueError, match="first page"):
+        list(Card.from_json(card_json).iter_comments())
+
+
+@pytest.fixture
+def get_board_cards(mocker):
+    """Mocks GET boards/{id}/cards over 25 cards, newest first"""
+    cards = [{**card_json, 'id': f'c{index:03d}'} for index in reversed(range(25))]
+
+    def get_page(board_id, limit=None, before=None):
+        page = [card for card in cards if before is None or card['id'] < before][:limit]
+        return mocker.Mock(status_code=200, json=mocker.Mock(return_value=page))
+
+    return mocker.patch('trello_cli.trello_api.TrelloAPI.get_board_cards', side_effect=get_page)
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_cards_pages_through_board(get_board_cards, prefetch):
+    """Test that every card of a board is streamed with the before cursor"""
+    cards = Board(board_id='b1', name='board').iter_cards(page_size=10, view=True, prefetch=prefetch)
+
+    assert [card.card_id for card in cards] == [f'c{index:03d}' for index in reversed(range(25))]
+    assert [call.kwargs['before'] for call in get_board_cards.call_args_list] == [None, 'c015', 'c005']
+
+
+def test_iter_cards_prefetches_next_page(get_board_cards):
+    """Test that the next page is requested before the current one is consumed"""
+    cards = Board(board_id='b1', name='board').iter_cards(page_size=10)
+
+    assert next(cards).card_id == 'c024'
+    cards.close()
+    assert get_board_cards.call_count == 2
@@ -0,0 +1,161 @@
+""" Test module for the bulk operations of trello_service.py using mock responses """
+
+# local imports
+from trello_cli import (SUCCESS, TRELLO_WRITE_ERROR)
+from trello_cli.trello_service import TrelloService
+
+# third party imports
+import pytest
+
+
+def card_json(card_id, label_ids=()):
+    """Builds the json payload of a card as returned by the Trello API"""
+    return {
+        'id': card_id,
+        'name': f'card {card_id}',
+        'labels': [{'id': label_id, 'name': '', 'color': 'red', 'idBoard': 'board'} for label_id in label_ids],
+        'desc': '',
+        'badges': {'comments': 0},
+    }
+
+
+@pytest.fixture
+def mock_response(mocker):
+    """Factory for mocked requests.Response objects"""
+
+    def make(payload=None, status_code=200):
+        return mocker.Mock(status_code=status_code, json=mocker.Mock(return_value=payload))
+
+    return make
+
+
+def test_bulk_add_card_labels_merges_and_skips(mocker, mock_response):
+    """Test that labels are merged into one PUT per card and labelled cards are skipped"""
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.get_all_cards',
+        return_value=mock_response([card_json('a', ['l1']), card_json('b', ['l1', 'l2'])])
+    )
+    set_labels = mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.set_card_labels',
+        return_value=mock_response({})
+    )
+
+    res = TrelloService().bulk_add_card_labels(['l1', 'l2'], list_id='list')
+
+    assert res.status_code == SUCCESS
+    assert [(r.card_id, r.skipped) for r in res.res] == [('a', False), ('b', True)]
+    set_labels.assert_called_once_with('a', ['l1', 'l2'])
+
+
+def test_bulk_add_card_labels_replace(mocker, mock_response):
+    """Test that replace sets exactly the given labels"""
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.get_card',
+        return_value=mock_response(card_json('a', ['l1', 'l3']))
+    )
+    set_labels = mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.set_card_labels',
+        return_value=mock_response({})
+    )
+
+    res = TrelloService().bulk_add_card_labels(['l2'], card_ids=['a'], replace=True)
+
+    assert res.status_code == SUCCESS
+    set_labels.assert_called_once_with('a', ['l2'])
+
+
+def test_bulk_add_card_labels_reports_failures(mocker, mock_response):
+    """Test that a failed PUT is reported per card"""
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.get_card',
+        side_effect=lambda card_id: mock_response(card_json(card_id))
+    )
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.set_card_labels',
+        side_effect=lambda card_id, label_ids: mock_response({}, 200 if card_id == 'a' else 400)
+    )
+
+    res = TrelloService().bulk_add_card_labels(['l1'], card_ids=['a', 'b'])
+
+    assert res.status_code == TRELLO_WRITE_ERROR
+    assert [r.status_code for r in res.res] == [SUCCESS, TRELLO_WRITE_ERROR]
+
+
+def test_bulk_create_comments_without_fetching_cards(mocker, mock_response):
+    """Test that a card_id only template posts without reading the cards"""
+    get_card = mocker.patch('trello_cli.trello_api.TrelloAPI.get_card')
+    create_comment = mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.create_comment',
+        return_value=mock_response({})
+    )
+
+    res = TrelloService().bulk_create_comments("done {card_id}", card_ids=['a', 'b'])
+
+    assert res.status_code == SUCCESS
+    get_card.assert_not_called()
+    assert sorted(call.args for call in create_comment.call_args_list) == [('a', 'done a'), ('b', 'done b')]
+
+
+def test_bulk_create_comments_substitutes_card_fields(mocker, mock_response):
+    """Test that card fields are substituted for every card of a list"""
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.get_all_cards',
+        return_value=mock_response([card_json('a'), card_json('b')])
+    )
+    create_comment = mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.create_comment',
+        side_effect=lambda card_id, text: mock_response({}, 200 if card_id == 'a' else 500)
+    )
+
+    res = TrelloService().bulk_create_comments("released {name}", list_id='list')
+
+    assert res.status_code == TRELLO_WRITE_ERROR
+    assert [r.status_code for r in res.res] == [SUCCESS, TRELLO_WRITE_ERROR]
+    assert ('a', 'released card a') in [call.args for call in create_comment.call_args_list]
+
+
+def test_bulk_create_comments_unknown_field():
+    """Test that an unknown template field raises a ValueError"""
+    with pytest.raises(ValueError) as exc_info:
+        TrelloService().bulk_create_comments("{owner}", card_ids=['a'])
+    assert str(exc_info.value) == "ERROR - Unknown template field(s): owner"
+
+
+def test_bulk_update_cards_by_label(mocker, mock_response):
+    """Test that cards selected by board and label are moved with one PUT each"""
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.get_board_cards',
+        return_value=mock_response([card_json('a', ['l1']), card_json('b'), card_json('c', ['l1'])])
+    )
+    update_card = mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.update_card',
+        return_value=mock_response({})
+    )
+
+    res = TrelloService().bulk_update_cards(board_id='board', label_id='l1', id_list='done', closed=True)
+
+    assert res.status_code == SUCCESS
+    assert [r.card_id for r in res.res] == ['a', 'c']
+    assert res.calls == 3
+    update_card.assert_any_call('a', {'idList': 'done', 'closed': 'true'})
+
+
+def test_bulk_update_cards_dry_run(mocker, mock_response):
+    """Test that a dry run reports renames without sending updates"""
+    mocker.patch(
+        'trello_cli.trello_api.TrelloAPI.get_all_cards',
+        return_value=mock_response([card_json('a')])
+    )
+    update_card = mocker.patch('trello_cli.trello_api.TrelloAPI.update_card')
+
+    res = TrelloService().bulk_update_cards(list_id='list', name="{name} (v2)", dry_run=True)
+
+    update_card.assert_not_called()
+    assert res.calls == 1
+    assert res.res[0].changes == {'name': 'card a (v2)'}
+
+
+def test_bulk_update_cards_requires_update():
+    """Test that a ValueError is raised when no update is given"""
+    with pytest.raises(ValueError):
+        TrelloService().bulk_update_cards(list_id='list')
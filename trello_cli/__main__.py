@@ -1,10 +1,22 @@
 """Main entry point for trello_cli"""
+import sys
 
 # local imports
-from trello_cli import cli, __app_name__
+from trello_cli import daemon, __app_name__, __version__
 
 
 def main():
+    # answered before typer is imported, the output matches the --version option in cli.py
+    if sys.argv[1:] in (["--version"], ["-v"]):
+        print(f"{__app_name__} version {__version__}")
+        return
+
+    # a running daemon executes the command without paying for startup
+    exit_code = daemon.forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from trello_cli import cli
     cli.app(prog_name=__app_name__)
 
 
@@ -0,0 +1,151 @@
+"""Module for columnar board statistics
+
+A CardTable stores the cards of a board as numpy arrays, one entry per card:
+the index of the card's list, a bitset of the card's labels and its number
+of comments. Statistics are grouped aggregations over these arrays instead
+of loops over Card objects.
+
+numpy is only imported by this module, which the stats command loads when
+it runs.
+"""
+
+# third party imports
+import numpy as np
+
+# labels stored per bitset word
+WORD_BITS = 64
+
+
+class CardTable:
+    """
+    Columnar table of the cards of a board
+
+    Attributes
+    ----------
+        list_ids: list
+            ids of the board's lists, list_index refers to positions in it
+        list_names: list
+            names of the board's lists
+        label_ids: list
+            ids of the board's labels, bit i of label_bits is label_ids[i]
+        label_names: list
+            display names of the board's labels
+        list_index: np.ndarray
+            int32 index of each card's list
+        label_bits: np.ndarray
+            uint64 array of shape (cards, words) holding each card's labels
+        comments: np.ndarray
+            int32 number of comments on each card
+
+    Methods
+    -------
+        from_json(cls, cards, lists, labels): builds a table from json data
+        cards_per_list(self): number of cards in each list
+        comments_per_list(self): number of comments in each list
+        cards_per_label(self): number of cards carrying each label
+        comments_per_label(self): number of comments on cards carrying each label
+        unlabelled(self): number of cards without labels
+    """
+
+    __slots__ = ('list_ids', 'list_names', 'label_ids', 'label_names',
+                 'list_index', 'label_bits', 'comments')
+
+    def __init__(self, list_ids, list_names, label_ids, label_names, list_index, label_bits, comments):
+        self.list_ids = list_ids
+        self.list_names = list_names
+        self.label_ids = label_ids
+        self.label_names = label_names
+        self.list_index = list_index
+        self.label_bits = label_bits
+        self.comments = comments
+
+    @classmethod
+    def from_json(cls, cards, lists=(), labels=()):
+        """
+        Builds a table from json data
+
+        Lists and labels referenced by cards but missing from lists / labels,
+        e.g. archived lists, are added with their id as name.
+
+        Parameters
+        ----------
+            cards: list
+                json dicts of cards as returned by GET boards/{id}/cards
+            lists: list
+                json dicts of the board's lists
+            labels: list
+                json dicts of the board's labels
+        """
+        list_ids = [trello_list['id'] for trello_list in lists]
+        list_names = [trello_list['name'] for trello_list in lists]
+        list_positions = {list_id: index for index, list_id in enumerate(list_ids)}
+        label_ids = [label['id'] for label in labels]
+        label_names = [label.get('name') or label.get('color') or label['id'] for label in labels]
+        label_positions = {label_id: index for index, label_id in enumerate(label_ids)}
+
+        def list_position(list_id):
+            if list_id not in list_positions:
+                list_positions[list_id] = len(list_ids)
+                list_ids.append(list_id)
+                list_names.append(list_id)
+            return list_positions[list_id]
+
+        def label_mask(card_labels):
+            mask = 0
+            for label in card_labels:
+                label_id = label['id']
+                if label_id not in label_positions:
+                    label_positions[label_id] = len(label_ids)
+                    label_ids.append(label_id)
+                    label_names.append(label.get('name') or label.get('color') or label_id)
+                mask |= 1 << label_positions[label_id]
+            return mask
+
+        count = len(cards)
+        list_index = np.fromiter((list_position(card['idList']) for card in cards), dtype=np.int32, count=count)
+        comments = np.fromiter((card['badges']['comments'] for card in cards), dtype=np.int32, count=count)
+        masks = [label_mask(card['labels']) for card in cards]
+
+        words = max(1, -(-len(label_ids) // WORD_BITS))
+        label_bits = np.empty((count, words), dtype=np.uint64)
+        word_mask = (1 << WORD_BITS) - 1
+        for word in range(words):
+            shift = word * WORD_BITS
+            label_bits[:, word] = np.fromiter(((mask >> shift) & word_mask for mask in masks),
+                                              dtype=np.uint64, count=count)
+
+        return cls(list_ids, list_names, label_ids, label_names, list_index, label_bits, comments)
+
+    def __len__(self):
+        return len(self.list_index)
+
+    def __repr__(self):
+        return f'(cards = {len(self)}, lists = {len(self.list_ids)}, labels = {len(self.label_ids)})'
+
+    def _has_label(self, position) -> np.ndarray:
+        """Returns a boolean array of the cards carrying the label at position"""
+        word, bit = divmod(position, WORD_BITS)
+        return ((self.label_bits[:, word] >> np.uint64(bit)) & np.uint64(1)) == 1
+
+    def cards_per_list(self) -> np.ndarray:
+        """Returns the number of cards in each list, ordered as list_ids"""
+        return np.bincount(self.list_index, minlength=len(self.list_ids))
+
+    def comments_per_list(self) -> np.ndarray:
+        """Returns the number of comments on the cards of each list, ordered as list_ids"""
+        return np.bincount(self.list_index, weights=self.comments,
+                           minlength=len(self.list_ids)).astype(np.int64)
+
+    def cards_per_label(self) -> np.ndarray:
+        """Returns the number of cards carrying each label, ordered as label_ids"""
+        return np.array([np.count_nonzero(self._has_label(position))
+                         for position in range(len(self.label_ids))], dtype=np.int64)
+
+    def comments_per_label(self) -> np.ndarray:
+        """Returns the number of comments on the cards carrying each label, ordered as label_ids"""
+        return np.array([self.comments[self._has_label(position)].sum(dtype=np.int64)
+                         for position in range(len(self.label_ids))], dtype=np.int64)
+
+    def unlabelled(self) -> int:
+        """Returns the number of cards without labels"""
+        return int(np.count_nonzero(~self.label_bits.any(axis=1)))
@@ -0,0 +1,221 @@
+"""Module for recording API traffic to cassettes and replaying it
+
+A cassette is a json file of the request/response pairs of a run. Recording
+wraps the shared requests session of trello_api.py, every request is sent
+to Trello as usual and its response is kept. Secrets are redacted from the
+recorded urls and params, request headers (holding the OAuth signature)
+are not recorded at all.
+
+Replaying swaps the shared session for one answering from an in-memory
+index of the cassette, keyed on the method, path, query and params of the
+request, so a replayed run never touches the network. Identical requests
+are answered with their recorded responses in order, the last one is
+repeated when the cassette runs out. Requests missing from the cassette
+fail with a connection error, as they would offline. With
+simulate_latency the recorded response times are slept through.
+
+    python3 -m trello_cli --record board.json get-board --board-id <board_id>
+    python3 -m trello_cli --replay board.json get-board --board-id <board_id>
+"""
+
+# local imports
+from trello_cli import trello_api
+from trello_cli.hooks import redact_params, redact_url
+
+# 3rd party imports
+import requests
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+# standard library imports
+import datetime
+import json
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+VERSION = 1
+
+# response headers kept in a cassette
+RECORDED_HEADERS = ("Content-Type", "Retry-After")
+
+
+class UnrecordedRequest(requests.exceptions.ConnectionError):
+    """Raised when a replayed run sends a request missing from the cassette"""
+
+
+def request_key(method: str, url: str, params=None) -> str:
+    """
+    Returns the key a request is recorded and replayed under
+
+    The scheme and host are left out so that a cassette recorded against
+    a local stand-in replays against any base url.
+    """
+    parts = urlsplit(redact_url(url))
+    path = re.sub(r"/{2,}", "/", parts.path)
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{method} {path}{query} {json.dumps(redact_params(params), sort_keys=True, default=str)}"
+
+
+class Cassette:
+    """
+    Recorded request/response pairs
+
+    Attributes
+    ----------
+        interactions: list
+            dicts of the request and response of every recorded call, in order
+    """
+
+    def __init__(self, interactions: list = None) -> None:
+        self.interactions = interactions if interactions is not None else []
+        self._lock = threading.Lock()
+
+    def record(self, method: str, url: str, params, response: Response, elapsed: float) -> None:
+        """Records the response of a request"""
+        interaction = {
+            'request': {
+                'method': method,
+                'url': redact_url(url),
+                'params': redact_params(params),
+            },
+            'response': {
+                'status_code': response.status_code,
+                'headers': {name: response.headers[name] for name in RECORDED_HEADERS
+                            if name in response.headers},
+                'body': response.content.decode("utf-8", errors="replace") if response.content else "",
+                'elapsed': round(elapsed, 6),
+            },
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def save(self, path: str) -> None:
+        """Writes the cassette to path"""
+        with self._lock:
+            interactions = list(self.interactions)
+        with open(path, "w") as cassette_file:
+            json.dump({'version': VERSION, 'interactions': interactions}, cassette_file, indent=1, default=str)
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """
+        Reads a cassette written by save
+
+        Raises
+        ------
+        ValueError
+            if path is not a cassette of this version
+        """
+        with open(path) as cassette_file:
+            data = json.load(cassette_file)
+        if not isinstance(data, dict) or data.get('version') != VERSION:
+            raise ValueError(f"ERROR - {path} is not a version {VERSION} cassette")
+        return cls(data['interactions'])
+
+
+class RecordingSession:
+    """
+    Session sending requests through another session and recording them
+
+    Attributes
+    ----------
+        session: requests.Session
+            session the requests are sent through
+        cassette: Cassette
+            cassette the responses are recorded to
+    """
+
+    def __init__(self, session, cassette: Cassette) -> None:
+        self.session = session
+        self.cassette = cassette
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        started = time.perf_counter()
+        response = self.session.request(method, url, **kwargs)
+        self.cassette.record(method, url, kwargs.get('params'), response, time.perf_counter() - started)
+        return response
+
+    def get(self, url: str, **kwargs) -> Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, data=None, **kwargs) -> Response:
+        return self.request("POST", url, data=data, **kwargs)
+
+    def put(self, url: str, data=None, **kwargs) -> Response:
+        return self.request("PUT", url, data=data, **kwargs)
+
+
+class ReplaySession:
+    """
+    Session answering requests from a cassette
+
+    Attributes
+    ----------
+        cassette: Cassette
+            cassette the responses are replayed from
+        simulate_latency: bool
+            if True each response is delayed by its recorded response time
+    """
+
+    def __init__(self, cassette: Cassette, simulate_latency: bool = False) -> None:
+        self.cassette = cassette
+        self.simulate_latency = simulate_latency
+        self._index = {}
+        for interaction in cassette.interactions:
+            request = interaction['request']
+            key = request_key(request['method'], request['url'], request['params'])
+            self._index.setdefault(key, deque()).append(interaction['response'])
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        key = request_key(method, url, kwargs.get('params'))
+        with self._lock:
+            recorded = self._index.get(key)
+            if not recorded:
+                raise UnrecordedRequest(f"No recorded response for {redact_url(url)} ({method})")
+            # the last response of a request is kept for any further identical request
+            recorded = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        if self.simulate_latency:
+            time.sleep(recorded['elapsed'])
+
+        response = Response()
+        response.status_code = recorded['status_code']
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response._content = recorded['body'].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = url
+        response.reason = "Replayed"
+        response.elapsed = datetime.timedelta(seconds=recorded['elapsed'])
+        return response
+
+    def get(self, url: str, **kwargs) -> Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, data=None, **kwargs) -> Response:
+        return self.request("POST", url, data=data, **kwargs)
+
+    def put(self, url: str, data=None, **kwargs) -> Response:
+        return self.request("PUT", url, data=data, **kwargs)
+
+
+def start_recording() -> Cassette:
+    """Records every request of the process until stop is called"""
+    cassette = Cassette()
+    trello_api.use_session(RecordingSession(trello_api.get_session(), cassette))
+    return cassette
+
+
+def start_replay(path: str, simulate_latency: bool = False) -> Cassette:
+    """Answers every request of the process from the cassette at path until stop is called"""
+    cassette = Cassette.load(path)
+    trello_api.use_session(ReplaySession(cassette, simulate_latency))
+    return cassette
+
+
+def stop() -> None:
+    """Restores the session of the process to the network"""
+    session = trello_api.get_session()
+    trello_api.use_session(session.session if isinstance(session, RecordingSession) else None)
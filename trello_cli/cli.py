@@ -1,16 +1,24 @@
 """ Module to define the CLI commands for the trello_cli package"""
+import logging
 import sys
 
 # local imports
-from trello_cli import (ERRORS, SUCCESS, TRELLO_WRITE_ERROR, __app_name__, __version__, config)
-from trello_cli.trello_service import TrelloService
+from trello_cli import (ERRORS, SUCCESS, TRELLO_WRITE_ERROR, __app_name__, __version__)
+from trello_cli.stats import StatsCollector, disable_stats, enable_stats, phase
+from trello_cli.output import OutputFormat, make_writer
+from trello_cli.pager import Pager, PagerQuit, can_page
 
 # 3rd party imports
 import typer
 from typing_extensions import Annotated
 from rich.console import Console
 from rich.theme import Theme
-from typing import Optional
+from typing import List, Optional, TYPE_CHECKING
+
+# the service pulls in requests, oauthlib and dotenv, it is imported by the
+# commands that talk to Trello so that --help and --version start quickly
+if TYPE_CHECKING:
+    from trello_cli.trello_service import TrelloService
 
 app = typer.Typer(rich_markup_mode="markdown", add_completion=False)
 
@@ -19,6 +27,73 @@ custom_theme = Theme({
 })
 console = Console(theme=custom_theme)
 
+# reused by every command run in the same process e.g. by trello_cli/daemon.py
+_service = None
+
+# record writer of the --output option, None for rich text output
+_writer = None
+
+# pager of the --page option, None when the output is not paged
+_pager = None
+
+# outbox of the --defer option, None when writes are sent at once
+_outbox = None
+
+# idempotency key of a write queued with --defer
+_idempotency_key = None
+
+
+def _get_service() -> "TrelloService":
+    """Returns the TrelloService shared by the commands of this process"""
+    global _service
+    if _service is None:
+        from trello_cli.trello_service import TrelloService
+        _service = TrelloService()
+    return _service
+
+
+def _write(method: str, *args, **kwargs):
+    """Runs a write method of the service, queued in the outbox with --defer"""
+    if _outbox is None:
+        return getattr(_get_service(), method)(*args, **kwargs)
+    from trello_cli.trello_service import TrelloService
+    return getattr(TrelloService(outbox=_outbox), method)(*args, idempotency_key=_idempotency_key, **kwargs)
+
+
+def _print(text: str) -> None:
+    """Prints rich text, through the pager when the output is paged"""
+    if _pager is None:
+        with phase("render"):
+            console.print(text)
+        return
+    try:
+        _pager.add(text)
+    except PagerQuit:
+        raise typer.Exit()
+
+
+def _emit(record: dict, text: str) -> None:
+    """Outputs a row as a record for --output formats or as rich text"""
+    if _writer is not None:
+        with phase("render"):
+            _writer.write(record)
+    else:
+        _print(text)
+
+
+def _rule(title: str) -> None:
+    """Prints a section title, only in rich text output"""
+    if _writer is not None:
+        return
+    if _pager is None:
+        with phase("render"):
+            console.rule(title)
+        return
+    try:
+        _pager.rule(title)
+    except PagerQuit:
+        raise typer.Exit()
+
 
 @app.command(rich_help_panel="1. Getting started")
 def app_init() -> None:
@@ -34,6 +109,8 @@ def app_init() -> None:
 
 
     """
+    from trello_cli import config
+
     app_init_status = config.init()
     if app_init_status:
         typer.secho(
@@ -42,7 +119,10 @@ def app_init() -> None:
         )
         raise typer.Exit(1)
 
-    service_res = TrelloService().get_trello_boards()
+    # credentials may have changed, rebuild the shared service
+    global _service
+    _service = None
+    service_res = _get_service().get_trello_boards()
     if service_res.status_code != SUCCESS:
         typer.secho(
             f'Error initializing service: {ERRORS[service_res.status_code]}',
@@ -52,9 +132,25 @@ def app_init() -> None:
 
     else:
         boards = service_res.res
-        console.rule(f"Trello boards")
+        _rule(f"Trello boards")
         for board in boards:
-            console.print(f"{board.name}, [id]id: {board.board_id}[/id]")
+            _emit({'type': 'board', 'id': board.board_id, 'name': board.name},
+                  f"{board.name}, [id]id: {board.board_id}[/id]")
+
+
+@app.command(rich_help_panel="1. Getting started")
+def shell() -> None:
+    """Starts an interactive shell for running trello_cli commands
+
+    Commands in the shell share one connection and cache, and use the
+    current board, list and card set with `use board|list|card <id>`.
+
+    Usage:
+    python3 -m trello_cli shell
+
+    """
+    from trello_cli.shell import Shell
+    Shell(prog_name=__app_name__).run()
 
 
 @app.command(rich_help_panel="2. Retrieve your trello object ID's")
@@ -72,7 +168,7 @@ def get_board(
     python3 -m trello_cli get-board "65352f31c09f6a38f8df1d0a"
 
     """
-    board = TrelloService().get_board(board_id)
+    board = _get_service().get_board(board_id)
     if board.status_code != SUCCESS:
         typer.secho(
             f'Error getting board: {ERRORS[board.status_code]}',
@@ -83,16 +179,18 @@ def get_board(
         board = board.res
         lists = board.get_all_lists()
         labels = board.get_labels()
-        console.print(f"loaded {board.name}: [id]id: {board.board_id}[/id]")
+        _emit({'type': 'board', 'id': board.board_id, 'name': board.name},
+              f"loaded {board.name}: [id]id: {board.board_id}[/id]")
 
-        console.rule(f"lists of {board.name}")
+        _rule(f"lists of {board.name}")
         for list in lists:
-            console.print(f"{list.name}, [id]id: {list.list_id}[/id]")
+            _emit({'type': 'list', 'id': list.list_id, 'name': list.name},
+                  f"{list.name}, [id]id: {list.list_id}[/id]")
 
-        console.rule(f"labels of {board.name}")
+        _rule(f"labels of {board.name}")
         for label in labels:
-            color = label.color
-            console.print(f"label: {label.color}, [id]id: {label.label_id}[/id]")
+            _emit({'type': 'label', 'id': label.label_id, 'name': label.name, 'color': label.color},
+                  f"label: {label.color}, [id]id: {label.label_id}[/id]")
 
 
 @app.command(rich_help_panel="2. Retrieve your trello object ID's")
@@ -107,7 +205,7 @@ def get_cards(
     Usage: python3 -m trello_cli get-list "65352f31c09f6a38f8df1d0c"
 
     """
-    trello_list = TrelloService().get_list(str(list_id))
+    trello_list = _get_service().get_list(str(list_id))
     if trello_list.status_code != SUCCESS:
         typer.secho(
             f'Error getting list: {ERRORS[trello_list.status_code]}',
@@ -116,28 +214,37 @@ def get_cards(
         raise typer.Exit(1)
     else:
         trello_list = trello_list.res
-        console.print(f"loaded {trello_list.name}: [id]id: {trello_list.list_id}[/id]")
-        cards = trello_list.get_all_cards()
-        console.rule(f"cards of {trello_list.name}")
-        for card in cards:
-            console.print(f"{card.name}, [id]id: {card.card_id}[/id]")
+        _emit({'type': 'list', 'id': trello_list.list_id, 'name': trello_list.name},
+              f"loaded {trello_list.name}: [id]id: {trello_list.list_id}[/id]")
+        _rule(f"cards of {trello_list.name}")
+        try:
+            for card in trello_list.iter_cards(view=True):
+                _emit({'type': 'card', 'id': card.card_id, 'name': card.name, 'comments': card.comments},
+                      f"{card.name}, [id]id: {card.card_id}[/id]")
+        except ValueError as err:
+            # a page of cards could not be fetched
+            typer.secho(f'Error getting cards: {err}', fg=typer.colors.RED)
+            raise typer.Exit(1)
 
 
 @app.command(rich_help_panel="2. Retrieve your trello object ID's")
 def view_card(
-        card_id: Annotated[str, typer.Option(prompt=True)]
+        card_id: Annotated[str, typer.Option(prompt=True)],
+        last: Annotated[Optional[int], typer.Option(help="only show the latest N comments")] = None,
 ) -> None:
     """Gets a card from a given trello list
 
     :param card_id: can be sourced from the parent list by running the get-list command
     :type card_id: str
+    :param last: number of latest comments to show, all comments are shown by default
+    :type last: int
 
     Usage:
     python3 -m trello_cli get-card "65352f31c09f6a38f8df1d59"
 
     """
-    typer.echo("Getting card...")
-    card = TrelloService().get_card(str(card_id))
+    typer.echo("Getting card...", err=_writer is not None)
+    card = _get_service().get_card(str(card_id))
     if card.status_code != SUCCESS:
         typer.secho(
             f'Error getting card: {ERRORS[card.status_code]}',
@@ -146,28 +253,90 @@ def view_card(
         raise typer.Exit(1)
     else:
         card = card.res
-        comments = card.get_comments()
+        try:
+            comments = card.get_comments() if last is None else card.get_latest_comments(last)
+        except ValueError as err:
+            # a page of comments could not be fetched
+            typer.secho(f'Error getting comments: {err}', fg=typer.colors.RED)
+            raise typer.Exit(1)
         labels = card.get_labels()
 
-        console.print(f"loaded {card.name}: [id]id: {card.card_id}[/id]")
+        _emit({'type': 'card', 'id': card.card_id, 'name': card.name, 'desc': card.desc,
+               'comments': card.comments},
+              f"loaded {card.name}: [id]id: {card.card_id}[/id]")
 
-        console.rule(f"comments of {card.name}")
+        _rule(f"comments of {card.name}")
         for comment in comments:
-            console.print(f"{comment}")
+            _emit({'type': 'comment', 'id': comment.comment_id, 'member': comment.member_creator,
+                   'date': comment.date, 'text': comment.data},
+                  f"{comment}")
 
-        console.rule(f"labels of {card.name}")
+        _rule(f"labels of {card.name}")
         for label in labels:
             color = label.color
-            console.print(f"{color},[id]id: {label.label_id}[/id]")
+            _emit({'type': 'label', 'id': label.label_id, 'name': label.name, 'color': color},
+                  f"{color},[id]id: {label.label_id}[/id]")
+
+
+@app.command(rich_help_panel="2. Retrieve your trello object ID's")
+def stats(
+        board_id: Annotated[str, typer.Option(prompt=True)]
+) -> None:
+    """Shows card and comment counts per list and per label of a board
+
+    :param board_id: id of a trello board (sourced from running trello_cli app-init)
+    :type board_id: str
+
+    Usage:
+    python3 -m trello_cli stats --board-id "65352f31c09f6a38f8df1d0a"
+
+    """
+    table = _get_service().get_card_table(board_id)
+    if table.status_code != SUCCESS:
+        typer.secho(
+            f'Error getting board statistics: {ERRORS[table.status_code]}',
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(1)
+
+    table = table.res
+    _emit({'type': 'board', 'id': board_id, 'cards': len(table), 'comments': int(table.comments.sum()),
+           'unlabelled': table.unlabelled()},
+          f"{len(table)} cards, {int(table.comments.sum())} comments, "
+          f"{table.unlabelled()} cards without labels")
+
+    _rule("lists")
+    for name, list_id, cards, comments in zip(table.list_names, table.list_ids,
+                                              table.cards_per_list(), table.comments_per_list()):
+        _emit({'type': 'list', 'id': list_id, 'name': name, 'cards': int(cards), 'comments': int(comments)},
+              f"{name}: {cards} cards, {comments} comments, [id]id: {list_id}[/id]")
+
+    _rule("labels")
+    for name, label_id, cards, comments in zip(table.label_names, table.label_ids,
+                                               table.cards_per_label(), table.comments_per_label()):
+        _emit({'type': 'label', 'id': label_id, 'name': name, 'cards': int(cards), 'comments': int(comments)},
+              f"{name}: {cards} cards, {comments} comments, [id]id: {label_id}[/id]")
 
 
 @app.command(rich_help_panel="3. Create trello objects")
 def make_trello_card(
         list_id: Annotated[str, typer.Option(prompt=True)],
-        name: Annotated[str, typer.Option(prompt=True)]
+        name: Annotated[str, typer.Option(prompt=True)],
+        desc: Annotated[Optional[str], typer.Option(help="description of the card")] = None,
+        label_id: Annotated[Optional[List[str]], typer.Option(help="label of the card, repeat for "
+                                                                   "several labels")] = None,
+        pos: Annotated[Optional[str], typer.Option(help="position in the list, top, bottom or a "
+                                                        "positive number")] = None,
+        due: Annotated[Optional[str], typer.Option(help="due date e.g. 2023-11-01T12:00:00Z")] = None,
+        member_id: Annotated[Optional[List[str]], typer.Option(help="member of the card, repeat for "
+                                                                    "several members")] = None,
+        comment: Annotated[Optional[str], typer.Option(help="first comment on the card")] = None,
 ) -> None:
     """Creates a new card on a trello list
 
+    The card is created with its description, labels, position, due date
+    and members in a single request, a first comment takes a second one.
+
     :param list_id: can be sourced from the parent board by running the get-board command
     :type list_id: str
 
@@ -175,20 +344,35 @@ def make_trello_card(
     python3 -m trello_cli create-card "65352f31c09f6a38f8df1d0c"
 
     """
-    card = TrelloService().create_card(name, list_id)
-
-    if card.status_code != SUCCESS:
+    if pos is not None and pos not in ("top", "bottom"):
+        try:
+            pos = float(pos)
+        except ValueError:
+            pos = 0
+        if pos <= 0:
+            typer.secho('Error creating card: pos should be top, bottom or a positive number',
+                        fg=typer.colors.RED)
+            raise typer.Exit(1)
+    card = _write('create_card', name, list_id, desc=desc, label_ids=label_id or None, pos=pos, due=due,
+                  member_ids=member_id or None, comment=comment)
+
+    if card.res is None:
         typer.secho(
             f'Error creating card: {ERRORS[card.status_code]}',
             fg=typer.colors.RED,
         )
         raise typer.Exit(1)
+    elif _outbox is not None:
+        typer.secho(f"your card has been queued: {card.res.entry_id}", fg=typer.colors.GREEN)
     else:
-        card = card.res
         typer.secho(
-            f"your card has been created :{card}",
+            f"your card has been created :{card.res}",
             fg=typer.colors.GREEN,
         )
+        if card.status_code != SUCCESS:
+            # the card exists, only its first comment failed
+            typer.secho(f'Error creating comment: {ERRORS[card.status_code]}', fg=typer.colors.RED)
+            raise typer.Exit(1)
 
 
 @app.command(rich_help_panel="3. Create trello objects")
@@ -205,13 +389,15 @@ def prepend_comment(
     python3 -m trello_cli create-comment "65352f31c09f6a38f8df1d59"
     """
 
-    comment = TrelloService().create_comment(card_id, text)
+    comment = _write('create_comment', card_id, text)
     if comment.status_code != SUCCESS:
         typer.secho(
             f'Error creating comment: {ERRORS[comment.status_code]}',
             fg=typer.colors.RED,
         )
         raise typer.Exit(1)
+    elif _outbox is not None:
+        typer.secho(f"your comment has been queued: {comment.res.entry_id}", fg=typer.colors.GREEN)
     else:
         typer.secho(
             f"your comment has been created :{comment.res}",
@@ -243,7 +429,7 @@ def prepend_label(
         )
         raise typer.Exit(1)
 
-    card_res = TrelloService().add_card_label(str(card_id), str(label_id))
+    card_res = _write('add_card_label', str(card_id), str(label_id))
     
     if card_res.status_code != SUCCESS:
         typer.secho(
@@ -251,6 +437,8 @@ def prepend_label(
             fg=typer.colors.RED,
         )
         raise typer.Exit(1)
+    elif _outbox is not None:
+        typer.secho(f"your label has been queued: {card_res.res.entry_id}", fg=typer.colors.GREEN)
     else:
         typer.secho(
             f"your label has been added",
@@ -258,6 +446,314 @@ def prepend_label(
         )
 
 
+def _emit_bulk_result(result, done: str, skipped: str = "skipped") -> None:
+    """Outputs the outcome of a bulk operation on a card"""
+    if result.status_code != SUCCESS:
+        status, text = "failed", f"[red]failed[/red] {ERRORS[result.status_code]}"
+    elif result.skipped:
+        status, text = "skipped", skipped
+    else:
+        status, text = "done", done
+    _emit({'type': 'result', 'id': result.card_id, 'status': status, 'changes': result.changes},
+          f"{text}, [id]id: {result.card_id}[/id]")
+
+
+@app.command(rich_help_panel="4. Bulk operations")
+def bulk_label(
+        label_id: Annotated[List[str], typer.Option(help="label to add, repeat for several labels")],
+        card_id: Annotated[Optional[List[str]], typer.Option(help="card to label, repeat for several cards")] = None,
+        list_id: Annotated[Optional[str], typer.Option(help="label every card in this list")] = None,
+        replace: Annotated[bool, typer.Option(help="replace the card's labels instead of merging")] = False,
+) -> None:
+    """Adds one or more labels to many trello cards at once
+
+    Each card is updated with a single request carrying all of its labels,
+    cards that already carry the labels are skipped.
+
+    Usage:
+    python3 -m trello_cli bulk-label --list-id "65352f31c09f6a38f8df1d0c" --label-id "65352f31c09f6a38f8df1d65"
+
+    """
+    if not card_id and not list_id:
+        typer.secho(
+            f'Error adding labels: a card_id or list_id is required',
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(1)
+
+    bulk_res = _get_service().bulk_add_card_labels(label_id, card_ids=card_id, list_id=list_id,
+                                                   replace=replace)
+    for result in bulk_res.res:
+        _emit_bulk_result(result, "labelled", "skipped")
+
+    if bulk_res.status_code != SUCCESS:
+        raise typer.Exit(1)
+
+
+@app.command(rich_help_panel="4. Bulk operations")
+def bulk_comment(
+        text: Annotated[str, typer.Option(prompt=True,
+                                          help="comment template, may use {card_id}, {name}, {desc}, {comments}")],
+        card_id: Annotated[Optional[List[str]], typer.Option(help="card to comment on, repeat for several cards")] = None,
+        list_id: Annotated[Optional[str], typer.Option(help="comment on every card in this list")] = None,
+) -> None:
+    """Posts the same comment on many trello cards at once
+
+    The text is a template that is filled in for every card, comments are
+    posted concurrently within Trello's rate limits.
+
+    Usage:
+    python3 -m trello_cli bulk-comment --list-id "65352f31c09f6a38f8df1d0c" --text "released: {name}"
+
+    """
+    if not card_id and not list_id:
+        typer.secho(
+            f'Error creating comments: a card_id or list_id is required',
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(1)
+
+    try:
+        bulk_res = _get_service().bulk_create_comments(text, card_ids=card_id, list_id=list_id)
+    except ValueError as err:
+        typer.secho(
+            f'Error creating comments: {err}',
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(1)
+
+    _rule("comments")
+    for result in bulk_res.res:
+        _emit_bulk_result(result, "commented")
+
+    if _writer is None:
+        succeeded = sum(result.status_code == SUCCESS for result in bulk_res.res)
+        _print(f"{succeeded} of {len(bulk_res.res)} comments created")
+    if bulk_res.status_code != SUCCESS:
+        raise typer.Exit(1)
+
+
+@app.command(rich_help_panel="4. Bulk operations")
+def bulk_update(
+        list_id: Annotated[Optional[str], typer.Option(help="select every card in this list")] = None,
+        board_id: Annotated[Optional[str], typer.Option(help="select every open card on this board")] = None,
+        label_id: Annotated[Optional[str], typer.Option(help="only select cards carrying this label")] = None,
+        card_id: Annotated[Optional[List[str]], typer.Option(help="select this card, repeat for several cards")] = None,
+        move_to: Annotated[Optional[str], typer.Option(help="id of the list to move the cards to")] = None,
+        archive: Annotated[Optional[bool], typer.Option("--archive/--unarchive",
+                                                        help="archive or unarchive the cards")] = None,
+        rename: Annotated[Optional[str], typer.Option(help="new card name, may use {card_id}, {name}, "
+                                                           "{desc}, {comments}")] = None,
+        dry_run: Annotated[bool, typer.Option(help="show the changes without applying them")] = False,
+) -> None:
+    """Moves, archives or renames many trello cards at once
+
+    Cards are selected by list, board, label or card id and updated
+    concurrently with one request per card.
+
+    Usage:
+    python3 -m trello_cli bulk-update --list-id "65352f31c09f6a38f8df1d0c" --move-to "65352f31c09f6a38f8df1d0d"
+
+    """
+    try:
+        bulk_res = _get_service().bulk_update_cards(list_id=list_id, board_id=board_id, label_id=label_id,
+                                                    card_ids=card_id, id_list=move_to, closed=archive,
+                                                    name=rename, dry_run=dry_run)
+    except ValueError as err:
+        typer.secho(
+            f'Error updating cards: {err}',
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(1)
+
+    _rule("dry run" if dry_run else "updates")
+    for result in bulk_res.res:
+        _emit_bulk_result(result, str(result.changes), "unchanged")
+
+    if _writer is None:
+        updated = sum(result.status_code == SUCCESS and not result.skipped for result in bulk_res.res)
+        failed = sum(result.status_code != SUCCESS for result in bulk_res.res)
+        _print(f"{updated} cards {'to update' if dry_run else 'updated'}, {failed} failed, "
+               f"{bulk_res.calls} api calls in {bulk_res.elapsed:.2f}s")
+    if bulk_res.status_code != SUCCESS:
+        raise typer.Exit(1)
+
+
+@app.command(rich_help_panel="5. Performance")
+def loadtest(
+        board_id: Annotated[str, typer.Option(prompt=True)],
+        list_id: Annotated[Optional[str], typer.Option(help="list read by get_all_cards and receiving new "
+                                                            "cards, the board's first list by default")] = None,
+        mix: Annotated[Optional[str], typer.Option(help="weighted operations e.g. get_board=3,create_card=1, "
+                                                        "default get_board=3,get_all_cards=2,get_card=3,"
+                                                        "create_card=1,create_comment=1")] = None,
+        duration: Annotated[float, typer.Option(help="seconds to run for")] = 10.0,
+        rate: Annotated[float, typer.Option(help="target operations per second, 0 runs as fast as possible")] = 0.0,
+        concurrency: Annotated[int, typer.Option(help="number of concurrent workers")] = 4,
+        interval: Annotated[float, typer.Option(help="seconds per progress report")] = 1.0,
+        base_url: Annotated[Optional[str], typer.Option(help="API root to test against e.g. "
+                                                             "http://127.0.0.1:8765/1/")] = None,
+        client_rate_limit: Annotated[bool, typer.Option(help="pace requests to Trello's 100 requests "
+                                                             "per 10 seconds")] = True,
+) -> None:
+    """Runs a weighted mix of reads and writes and reports throughput and latency
+
+    Writes create real cards and comments, run it against a test board or
+    the local stand-in server of benchmarks/fake_trello.py.
+
+    Usage:
+    python3 -m trello_cli loadtest --board-id "65352f31c09f6a38f8df1d0a" --rate 20 --duration 30
+
+    """
+    from trello_cli.loadtest import DEFAULT_MIX, LoadTest, client_overrides, parse_mix
+    from trello_cli.trello_service import TrelloService
+
+    try:
+        weights = parse_mix(mix or DEFAULT_MIX)
+    except ValueError as err:
+        typer.secho(f'Error starting load test: {err}', fg=typer.colors.RED)
+        raise typer.Exit(1)
+
+    with client_overrides(base_url, client_rate_limit):
+        service = TrelloService()
+        board = service.get_board(board_id)
+        if board.status_code != SUCCESS:
+            typer.secho(f'Error getting board: {ERRORS[board.status_code]}', fg=typer.colors.RED)
+            raise typer.Exit(1)
+        if list_id is None:
+            lists = board.res.get_all_lists()
+            if not lists:
+                typer.secho('Error starting load test: the board has no lists', fg=typer.colors.RED)
+                raise typer.Exit(1)
+            list_id = lists[0].list_id
+        trello_list = service.get_list(list_id)
+        card_ids = [card.card_id for card in trello_list.res.get_all_cards()] \
+            if trello_list.status_code == SUCCESS else []
+
+        try:
+            test = LoadTest(service, board_id, list_id, card_ids, weights)
+        except ValueError as err:
+            typer.secho(f'Error starting load test: {err}', fg=typer.colors.RED)
+            raise typer.Exit(1)
+
+        def report(elapsed, summary):
+            _emit({'type': 'interval', 'elapsed': elapsed, **summary._asdict()},
+                  f"{elapsed:>6.1f}s {summary.throughput:>8.1f} ops/s  p50 {summary.p50 * 1000:>7.1f}ms  "
+                  f"p95 {summary.p95 * 1000:>7.1f}ms  errors {summary.errors}")
+
+        _rule(f"load test, {duration:g}s, {concurrency} workers"
+              + (f", {rate:g} ops/s" if rate else ""))
+        total = test.run(duration, rate, concurrency, interval, on_interval=report)
+
+    _rule("operations")
+    for name, summary in sorted(test.per_operation().items()):
+        _emit({'type': 'operation', 'operation': name, **summary._asdict()},
+              f"{name}: {summary.count} ops, p50 {summary.p50 * 1000:.1f}ms, p95 {summary.p95 * 1000:.1f}ms, "
+              f"p99 {summary.p99 * 1000:.1f}ms, max {summary.max * 1000:.1f}ms, {summary.errors} errors")
+    error_rate = total.errors / total.count if total.count else 0.0
+    _emit({'type': 'total', **total._asdict(), 'error_rate': error_rate},
+          f"{total.count} ops, {total.throughput:.1f} ops/s, p50 {total.p50 * 1000:.1f}ms, "
+          f"p95 {total.p95 * 1000:.1f}ms, p99 {total.p99 * 1000:.1f}ms, {error_rate:.1%} errors")
+
+
+def _emit_entry(entry) -> None:
+    """Outputs an entry of the outbox"""
+    args = ", ".join(f"{name}={value}" for name, value in entry.args.items())
+    error = f", [red]{entry.error}[/red]" if entry.error else ""
+    _emit({'type': 'entry', 'id': entry.entry_id, 'key': entry.key, 'action': entry.action, 'args': entry.args,
+           'status': entry.status, 'attempts': entry.attempts, 'error': entry.error, 'result': entry.result},
+          f"{entry.status} {entry.action}({args}), {entry.attempts} failed attempts{error}, "
+          f"[id]id: {entry.entry_id}[/id]")
+
+
+@app.command(rich_help_panel="6. Outbox")
+def outbox_status(
+        show_all: Annotated[bool, typer.Option("--all", help="also list delivered writes not yet "
+                                                             "compacted away")] = False,
+) -> None:
+    """Lists the writes queued with --defer that are pending or failed
+
+    Usage:
+    python3 -m trello_cli outbox-status
+
+    """
+    from trello_cli.outbox import DONE, FAILED, PENDING, Outbox
+
+    outbox = Outbox()
+    entries = outbox.entries()
+    for entry in entries:
+        if show_all or entry.status != DONE:
+            _emit_entry(entry)
+    counts = {status: sum(entry.status == status for entry in entries) for status in (PENDING, FAILED)}
+    _rule(f"{counts[PENDING]} pending, {counts[FAILED]} failed in {outbox.path}")
+
+
+@app.command(rich_help_panel="6. Outbox")
+def outbox_flush(
+        retry_failed: Annotated[bool, typer.Option(help="queue the failed writes again before "
+                                                        "flushing")] = False,
+) -> None:
+    """Delivers the writes queued with --defer
+
+    Writes to a card are delivered in the order they were queued, failed
+    writes are retried a few times before they are marked failed.
+
+    Usage:
+    python3 -m trello_cli outbox-flush --retry-failed
+
+    """
+    from trello_cli.outbox import DONE, Outbox
+    from trello_cli.trello_service import TrelloService
+
+    outbox = Outbox()
+    if retry_failed:
+        outbox.retry_failed()
+    entries = outbox.flush(TrelloService())
+    if entries is None:
+        typer.secho("the outbox is being flushed by another process", fg=typer.colors.YELLOW)
+        return
+    for entry in entries:
+        _emit_entry(entry)
+    if any(entry.status != DONE for entry in entries):
+        raise typer.Exit(1)
+
+
+@app.command(rich_help_panel="7. Export")
+def export(
+        board_id: Annotated[str, typer.Option(prompt=True)],
+        path: Annotated[str, typer.Argument(help="file to write, - for stdout")] = "-",
+        compress: Annotated[Optional[bool], typer.Option("--gzip/--no-gzip", help="gzip the output, by default "
+                                                                                 "when PATH ends with .gz")] = None,
+        page_size: Annotated[int, typer.Option(min=1, max=1000, help="cards and comments fetched "
+                                                                     "per request")] = 1000,
+) -> None:
+    """Streams a board with its lists, labels, cards and comments to JSON Lines
+
+    Records are fetched, converted and written a page at a time so memory
+    stays flat however large the board is.
+
+    Usage:
+    python3 -m trello_cli export --board-id "65352f31c09f6a38f8df1d0a" board.jsonl.gz
+
+    """
+    from trello_cli.export import export_board, open_output
+    from trello_cli.settings import get_settings
+    from trello_cli.trello_api import TrelloAPI
+
+    # keeps stdout clean when the records are written to it
+    to_stderr = path == "-"
+    try:
+        with open_output(path, compress) as stream:
+            counts = export_board(TrelloAPI.from_settings(get_settings()), board_id, stream, page_size)
+    except (OSError, ValueError) as err:
+        # a file is only written to PATH once complete, stdout has received part of the board
+        incomplete = ", the records written to stdout are incomplete" if to_stderr else ""
+        typer.secho(f'Error exporting board: {err}{incomplete}', fg=typer.colors.RED, err=to_stderr)
+        raise typer.Exit(1)
+    summary = ", ".join(f"{count} {record_type}s" for record_type, count in counts.items())
+    typer.secho(f"exported {summary} to {path}", fg=typer.colors.GREEN, err=to_stderr)
+
+
 def _version_callback(value: bool) -> None:
     """Callback for the version option
     :param value: bool value to check if version is requested
@@ -267,14 +763,146 @@ def _version_callback(value: bool) -> None:
         raise typer.Exit()
 
 
+def _close_writer() -> None:
+    """Flushes the record writer once the command has finished"""
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+def _report_stats(collector: StatsCollector) -> None:
+    """Prints the statistics collected for --stats to stderr and stops collecting"""
+    disable_stats()
+    Console(stderr=True).print(collector.report())
+
+
+def _export_trace(tracer, root, path: str) -> None:
+    """Closes the command's span, writes the trace for --trace and stops tracing"""
+    from trello_cli import tracing
+    tracing.end_span(root)
+    tracing.disable_tracing()
+    tracer.export(path)
+
+
+def _save_cassette(cassette, path: str) -> None:
+    """Writes the requests recorded for --record to path and stops recording"""
+    from trello_cli import cassette as cassettes
+    cassettes.stop()
+    cassette.save(path)
+
+
+def _close_outbox() -> None:
+    """Starts delivering the writes queued for --defer in the background"""
+    global _outbox, _idempotency_key
+    from trello_cli.outbox import PENDING, start_background_flush
+    if _outbox is not None and _outbox.entries(PENDING):
+        start_background_flush(_outbox.path)
+    _outbox = _idempotency_key = None
+
+
+def _close_pager() -> None:
+    """Lets the user page through the rest of the output once the command has finished"""
+    global _pager
+    if _pager is not None:
+        _pager.close()
+        _pager = None
+
+
 @app.callback(invoke_without_command=True)
 def main(
+        ctx: typer.Context,
         version: Optional[bool] = typer.Option(
             None,
             "--version",
             "-v",
             help="Show the application's version and exit.",
             callback=_version_callback,
-            is_eager=True)
+            is_eager=True),
+        output: OutputFormat = typer.Option(
+            OutputFormat.text,
+            "--output",
+            "-o",
+            help="Output format, jsonl/tsv/json write plain records for other tools."),
+        columns: Optional[str] = typer.Option(
+            None,
+            help="Comma separated record fields to output e.g. id,name, all by default."),
+        page: bool = typer.Option(
+            False,
+            "--page",
+            help="Show long text output one screen at a time, fetching more as you scroll."),
+        show_stats: bool = typer.Option(
+            False,
+            "--stats",
+            help="Print request counts, latencies, bytes and time per phase to stderr at exit."),
+        profile: Optional[str] = typer.Option(
+            None,
+            metavar="PATH",
+            help="Profile the command into PATH, a pstats file or collapsed stacks of all threads "
+                 "for *.collapsed, and print the hottest functions to stderr."),
+        trace: Optional[str] = typer.Option(
+            None,
+            metavar="PATH",
+            help="Write the spans of the command, its service calls and requests to PATH as OTLP/JSON."),
+        record: Optional[str] = typer.Option(
+            None,
+            metavar="PATH",
+            help="Record the requests and responses of the command to the cassette PATH, secrets redacted."),
+        replay: Optional[str] = typer.Option(
+            None,
+            metavar="PATH",
+            help="Answer the requests of the command from the cassette PATH instead of the network."),
+        replay_latency: bool = typer.Option(
+            False,
+            "--replay-latency",
+            help="Delay replayed responses by their recorded response times."),
+        defer: bool = typer.Option(
+            False,
+            "--defer",
+            help="Queue card, comment and label writes in the outbox and deliver them in the background."),
+        idempotency_key: Optional[str] = typer.Option(
+            None,
+            help="With --defer, do not queue the write again if a write with this key is in the outbox."),
 ) -> None:
-    return
+    global _writer, _pager, _outbox, _idempotency_key
+    logging.basicConfig(level=logging.INFO)
+
+    # registered first so that they run after the output has been flushed
+    if profile:
+        from trello_cli.profiling import start_profile, stop_profile
+        profiler = start_profile(profile)
+        ctx.call_on_close(lambda: stop_profile(profiler, profile, Console(stderr=True)))
+    if trace:
+        from trello_cli import tracing
+        tracer = tracing.enable_tracing()
+        root = tracing.start_span(f"cli {ctx.invoked_subcommand}", command=ctx.invoked_subcommand or "")
+        ctx.call_on_close(lambda: _export_trace(tracer, root, trace))
+    if record and replay:
+        typer.secho('Error: --record and --replay cannot be used together', fg=typer.colors.RED)
+        raise typer.Exit(1)
+    if record:
+        from trello_cli import cassette as cassettes
+        recording = cassettes.start_recording()
+        ctx.call_on_close(lambda: _save_cassette(recording, record))
+    elif replay:
+        from trello_cli import cassette as cassettes
+        try:
+            cassettes.start_replay(replay, replay_latency)
+        except (OSError, ValueError) as err:
+            typer.secho(f'Error loading cassette: {err}', fg=typer.colors.RED)
+            raise typer.Exit(1)
+        ctx.call_on_close(cassettes.stop)
+    if defer:
+        from trello_cli.outbox import Outbox
+        _outbox, _idempotency_key = Outbox(), idempotency_key
+        ctx.call_on_close(_close_outbox)
+    if show_stats:
+        collector = enable_stats()
+        ctx.call_on_close(lambda: _report_stats(collector))
+
+    _writer = make_writer(output, columns.split(",") if columns else None)
+    if _writer is not None:
+        ctx.call_on_close(_close_writer)
+    elif page and can_page(console):
+        _pager = Pager(console)
+        ctx.call_on_close(_close_pager)
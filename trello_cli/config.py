@@ -4,11 +4,10 @@
 from trello_cli import (
     SUCCESS, TRELLO_AUTHENTICATION_ERROR, OAUTH1_ERROR)
 from trello_cli.models import GetOAuthTokenResponse
+from trello_cli.settings import find_env_file, get_settings, reset_settings
 
-# third party imports
-import os
-from dotenv import find_dotenv, set_key, load_dotenv
-from requests_oauthlib import OAuth1Session
+# dotenv and requests_oauthlib are imported where they are used so that
+# commands which never touch the configuration do not pay for them
 
 # Trello API URLs
 REQUEST_TOKEN_URL = 'https://trello.com/1/OAuthGetRequestToken'
@@ -46,8 +45,8 @@ def init_trello_api() -> int:
     status code: int
         representing the status of the authentication process
     """
-    load_dotenv()
-    if not os.getenv("TRELLO_API_TOKEN") and not os.getenv("TRELLO_API_SECRET"):
+    settings = get_settings()
+    if not settings.api_token and not settings.api_secret:
         print("Please visit https://trello.com/app-key to obtain your API key and secret.")
         return TRELLO_AUTHENTICATION_ERROR
     return SUCCESS
@@ -63,12 +62,12 @@ def _load_oauth_token_env_var() -> int:
     status code: int
         representing the status of the authentication process
     """
-    # loads env variables for get_user_oauth_token()
-    load_dotenv()
-    if not os.getenv("TRELLO_OAUTH_TOKEN"):
+    from dotenv import set_key
+
+    if not get_settings().oauth_token:
         res = get_user_oauth_token()
         if res.status_code == SUCCESS:
-            dotenv_path = find_dotenv()
+            dotenv_path = find_env_file()
             set_key(
                 dotenv_path=dotenv_path,
                 key_to_set="TRELLO_OAUTH_TOKEN",
@@ -79,12 +78,13 @@ def _load_oauth_token_env_var() -> int:
                 key_to_set="TRELLO_OAUTH_SECRET",
                 value_to_set=res.secret
             )
+            # settings parsed before the tokens were written are stale
+            reset_settings()
 
         else:
             print("User denied access.")
             _load_oauth_token_env_var()
 
-    load_dotenv()
     return SUCCESS
 
 
@@ -135,10 +135,12 @@ def create_oauth_token(verbose=False) -> dict:
     access_token: dict
         dictionary containing the user's oauth token and secret
     """
+    from requests_oauthlib import OAuth1Session
+
     expiration = '30days'
     scope = 'read,write'
-    trello_key = os.getenv("TRELLO_API_KEY")
-    trello_secret = os.getenv("TRELLO_API_SECRET")
+    trello_key = get_settings().api_key
+    trello_secret = get_settings().api_secret
     name = 'trello_cli'
 
     # Step 1: Get a request token.
@@ -0,0 +1,305 @@
+"""Resident daemon that runs trello_cli commands in a warm process
+
+Starting the CLI pays for importing typer, rich and requests, loading the
+.env file and opening a TLS connection to Trello. The daemon does this once
+and then executes the commands forwarded by trello_cli/__main__.py over a
+local unix socket, keeping the TrelloService, connection pool and a short
+lived response cache alive between commands. A forwarded command runs in
+the client's working directory with its TRELLO_* variables, commands that
+stream their output, keep state or need the terminal (export, loadtest,
+shell, --record, --replay and --page) always run in the client's process.
+A forwarded command's stdout and stderr are written to the client's.
+
+Usage:
+    python3 -m trello_cli.daemon start    # runs in the foreground
+    python3 -m trello_cli.daemon status
+    python3 -m trello_cli.daemon stop
+
+The client side of this module only uses the standard library so that
+forwarding a command does not import any of the heavy dependencies.
+"""
+
+# standard library imports
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+
+# seconds GET responses are served from the daemon's cache
+CACHE_TTL = 30
+
+# seconds the client waits for the daemon before running in-process
+CONNECT_TIMEOUT = 0.5
+
+# commands that stream their output or keep state across requests, run in-process
+IN_PROCESS_COMMANDS = ("export", "loadtest", "shell")
+IN_PROCESS_OPTIONS = ("--record", "--replay", "--page")
+
+# options of the app that take a value, skipped when looking for the command
+VALUE_OPTIONS = ("--output", "-o", "--columns", "--profile", "--trace", "--record", "--replay",
+                 "--idempotency-key")
+
+# environment variables of the client a forwarded command runs with
+FORWARDED_ENV_PREFIXES = ("TRELLO_", "XDG_STATE_HOME", "XDG_CACHE_HOME")
+
+
+def socket_path() -> str:
+    """Returns the path of the daemon's unix socket
+
+    The socket lives in $XDG_RUNTIME_DIR, or else in a private directory
+    of the temp dir, so other local users cannot put a socket in its place.
+    Can be overridden with the TRELLO_CLI_SOCKET environment variable
+    """
+    if os.getenv("TRELLO_CLI_SOCKET"):
+        return os.getenv("TRELLO_CLI_SOCKET")
+    directory = os.getenv("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"trello_cli-{os.getuid()}")
+    return os.path.join(directory, "trello_cli.sock")
+
+
+def _private_directory(path: str) -> bool:
+    """Returns True if the directory of path is owned by this user and only writable by it"""
+    try:
+        directory = os.stat(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return False
+    return directory.st_uid == os.getuid() and not directory.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _trusted(path: str) -> bool:
+    """Returns True if path is a socket of this user in a private directory
+
+    The client sends its credentials to the daemon, so it only connects to
+    a socket no other user can have created.
+    """
+    try:
+        sock = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(sock.st_mode) and sock.st_uid == os.getuid() and _private_directory(path)
+
+
+def _send(message: dict, path: str = None) -> dict:
+    """Sends a message to the daemon and returns its reply
+
+    Raises OSError if the daemon cannot be reached
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path or socket_path())
+        sock.settimeout(None)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as reply:
+            return json.loads(reply.read())
+
+
+def runs_in_process(argv: list) -> bool:
+    """Returns True if the command of argv has to run in the client's process"""
+    arguments = iter(argv)
+    for argument in arguments:
+        if not argument.startswith("-"):
+            return argument in IN_PROCESS_COMMANDS
+        option = argument.split("=", 1)[0]
+        if option in IN_PROCESS_OPTIONS:
+            return True
+        if option in VALUE_OPTIONS and "=" not in argument:
+            next(arguments, None)
+    return False
+
+
+def _environment(environ=os.environ) -> dict:
+    """Returns the variables of environ a forwarded command runs with"""
+    return {name: value for name, value in environ.items() if name.startswith(FORWARDED_ENV_PREFIXES)}
+
+
+def forward(argv: list) -> int:
+    """Runs a command in the daemon and writes its output to stdout
+
+    Returns
+    -------
+    exit_code: int
+        exit code of the command or None if the daemon is not available and
+        the command has to run in-process
+    """
+    if os.getenv("TRELLO_CLI_NO_DAEMON") or not _trusted(socket_path()) or runs_in_process(argv):
+        return None
+    message = {"argv": argv, "input": None, "cwd": os.getcwd(), "env": _environment()}
+    try:
+        reply = _send(message)
+        if reply.get("need_input"):
+            # prompts can only be answered interactively in-process
+            if sys.stdin.isatty():
+                return None
+            reply = _send(dict(message, input=sys.stdin.read()))
+    except (OSError, ValueError):
+        return None
+
+    sys.stdout.write(reply["output"])
+    sys.stdout.flush()
+    sys.stderr.write(reply.get("stderr", ""))
+    sys.stderr.flush()
+    return reply["exit_code"]
+
+
+class _InputStream(io.BytesIO):
+    """stdin of a forwarded command
+
+    Reading past the end raises EOFError, which click turns into an abort,
+    rather than returning empty lines that click would prompt again for.
+    """
+
+    eof = False
+
+    def _check(self, data, size):
+        if not data and size != 0:
+            self.eof = True
+            raise EOFError
+        return data
+
+    def read(self, size=-1):
+        return self._check(super().read(size), size)
+
+    def read1(self, size=-1):
+        return self._check(super().read1(size), size)
+
+    def readline(self, size=-1):
+        return self._check(super().readline(size), size)
+
+
+# environment of the last forwarded command, the settings are reloaded when it changes
+_last_env = None
+
+
+def _run(argv: list, stdin: str = None, cwd: str = None, env: dict = None) -> dict:
+    """
+    Runs a command of the typer app and captures its output
+
+    The command runs in the client's working directory cwd with the
+    client's variables env in place of the daemon's forwarded variables.
+    """
+    global _last_env
+    # deferred so only the daemon process pays for these imports
+    from typer.testing import CliRunner
+    from trello_cli import cli, trello_api, __app_name__
+    from trello_cli.settings import reset_settings
+
+    if env is None:
+        env = _environment()
+    # variables the daemon has but the client has not are unset for the command
+    overrides = {name: None for name in _environment()}
+    overrides.update(env)
+    if env != _last_env:
+        # settings, service and cached responses belong to the previous environment
+        reset_settings()
+        cli._service = None
+        if trello_api.response_cache is not None:
+            trello_api.response_cache.clear()
+        _last_env = env
+
+    stream = _InputStream((stdin or "").encode())
+    previous_cwd = os.getcwd()
+    try:
+        if cwd:
+            os.chdir(cwd)
+        # stderr is kept apart so that it does not end up in piped records
+        result = CliRunner(mix_stderr=False).invoke(cli.app, argv, input=stream, prog_name=__app_name__,
+                                                    env=overrides)
+    except OSError as err:
+        return {"exit_code": 1, "output": "", "stderr": f"Error running the command in {cwd}: {err}\n"}
+    finally:
+        os.chdir(previous_cwd)
+    if stdin is None and stream.eof and result.exit_code != 0:
+        return {"need_input": True}
+    return {"exit_code": result.exit_code, "output": result.stdout, "stderr": result.stderr}
+
+
+def serve(path: str = None) -> int:
+    """Serves forwarded commands until a stop message is received
+
+    Commands are executed one at a time as they share the process' stdout
+
+    Returns
+    -------
+    exit_code: int
+        0 once stopped, 1 if another daemon is listening on path or its
+        directory is not private
+    """
+    path = path or socket_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+    if not _private_directory(path):
+        print(f"{os.path.dirname(os.path.abspath(path))} is writable by other users, not listening there")
+        return 1
+    if os.path.exists(path):
+        try:
+            _send({"command": "status"}, path)
+        except (OSError, ValueError):
+            # left behind by a daemon that did not stop cleanly
+            os.unlink(path)
+        else:
+            print(f"trello_cli daemon already running on {path}")
+            return 1
+
+    # deferred so only the daemon process pays for these imports
+    global _last_env
+    from trello_cli import trello_api, cli
+
+    trello_api.enable_cache(CACHE_TTL)
+    cli._get_service()
+    _last_env = _environment()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # the socket is created without access for other users
+    umask = os.umask(0o077)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen()
+    print(f"trello_cli daemon listening on {path}")
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile("rb") as request:
+                try:
+                    message = json.loads(request.read())
+                except ValueError:
+                    continue
+                if message.get("command") == "stop":
+                    conn.sendall(json.dumps({"exit_code": 0, "output": "stopped\n"}).encode())
+                    break
+                if message.get("command") == "status":
+                    reply = {"exit_code": 0, "output": f"running, pid {os.getpid()}\n"}
+                else:
+                    reply = _run(message.get("argv", []), message.get("input"), message.get("cwd"),
+                                 message.get("env"))
+                conn.sendall(json.dumps(reply).encode())
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+    return 0
+
+
+def main(argv: list = None) -> int:
+    """Entry point of python3 -m trello_cli.daemon"""
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "start"
+    if command == "start":
+        return serve()
+    if command in ("stop", "status"):
+        try:
+            reply = _send({"command": command})
+        except OSError:
+            print("not running")
+            return 1
+        sys.stdout.write(reply["output"])
+        return 0
+    print("usage: python3 -m trello_cli.daemon [start|stop|status]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Module for streaming a board to JSON Lines with the export command
+
+An export writes one record per line, in this order:
+
+    {"type": "board", "id": ..., "name": ...}
+    {"type": "list", "id": ..., "name": ...}
+    {"type": "label", "id": ..., "name": ..., "color": ...}
+    {"type": "card", "id": ..., "name": ..., "desc": ..., "list_id": ..., "label_ids": [...], "comments": ...}
+    {"type": "comment", "id": ..., "card_id": ..., "text": ..., "author": ..., "date": ...}
+
+Cards and comments are fetched a page at a time. Fetching, turning pages
+into records and writing them run as three stages connected by queues of
+at most `depth` pages, so memory holds a few pages whatever the size of the
+board, and a slow disk holds back the requests instead of piling up pages.
+"""
+
+# local imports
+from trello_cli import stats
+from trello_cli.tracing import propagate
+from trello_cli.trello_data import MAX_PAGE_SIZE, _iter_pages
+
+# standard library imports
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+
+# pages held between two stages of the pipeline
+PIPELINE_DEPTH = 4
+
+# retries of a request answered with 429 or 5xx or not at all, and seconds
+# before the first one, doubled per retry
+RETRIES = 3
+RETRY_DELAY = 1.0
+
+# marks the end of the pages passed between stages
+_END = object()
+
+
+class _Failure:
+    """Passes the exception of a stage on to the writing thread"""
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _json(response, what: str):
+    """Returns the decoded body of a successful response"""
+    if getattr(response, 'status_code', None) != 200:
+        raise ValueError(f"ERROR - Could not fetch the {what} of the board")
+    return stats.decode(response)
+
+
+def _retrying(request, retries: int = RETRIES, retry_delay: float = RETRY_DELAY):
+    """
+    Returns request retried while it gets no response, which the client
+    returns for 429 and 5xx answers and connection errors
+    """
+
+    def call(*args, **kwargs):
+        for retry in range(retries):
+            response = request(*args, **kwargs)
+            if response is not None:
+                return response
+            time.sleep(retry_delay * 2 ** retry)
+        return request(*args, **kwargs)
+
+    return call
+
+
+def board_pages(client, board_id: str, page_size: int = MAX_PAGE_SIZE, retries: int = RETRIES,
+                retry_delay: float = RETRY_DELAY):
+    """
+    Yields (record type, page of json dicts) for the board, its lists,
+    labels, cards and comments
+
+    Parameters
+    ----------
+    client: TrelloAPI
+        client the pages are requested with
+    board_id: str
+        id of the board
+    page_size: int
+        number of cards and comments requested per page
+    retries: int
+        retries of a request answered with 429 or 5xx or not at all
+    retry_delay: float
+        seconds before the first retry, doubled for every further retry
+
+    Raises
+    ------
+    ValueError
+        if a request still fails after the retries
+    """
+
+    def retrying(request):
+        return _retrying(request, retries, retry_delay)
+
+    yield 'board', [_json(retrying(client.get_board)(board_id), "details")]
+    yield 'list', _json(retrying(client.get_all_lists)(board_id), "lists")
+    yield 'label', _json(retrying(client.get_labels)(board_id), "labels")
+    for page in _iter_pages(partial(retrying(client.get_board_cards), board_id), page_size):
+        yield 'card', page
+    for page in _iter_pages(partial(retrying(client.get_board_actions), board_id), page_size):
+        yield 'comment', page
+
+
+def to_records(record_type: str, page: list) -> list:
+    """Returns the export records of a page of json dicts"""
+    if record_type == 'board':
+        return [{'type': 'board', 'id': item['id'], 'name': item['name']} for item in page]
+    if record_type == 'list':
+        return [{'type': 'list', 'id': item['id'], 'name': item['name']} for item in page]
+    if record_type == 'label':
+        return [{'type': 'label', 'id': item['id'], 'name': item.get('name'), 'color': item.get('color')}
+                for item in page]
+    if record_type == 'card':
+        return [{'type': 'card', 'id': item['id'], 'name': item['name'], 'desc': item.get('desc', ""),
+                 'list_id': item.get('idList'), 'label_ids': [label['id'] for label in item.get('labels', ())],
+                 'comments': item.get('badges', {}).get('comments', 0)} for item in page]
+    return [{'type': 'comment', 'id': item['id'], 'card_id': item['data']['card']['id'],
+             'text': item['data']['text'], 'author': item.get('memberCreator', {}).get('fullName'),
+             'date': item['date']} for item in page]
+
+
+def _put(pipe: queue.Queue, item, stop: threading.Event) -> bool:
+    """Waits for room in pipe, returns False if the pipeline was stopped meanwhile"""
+    while not stop.is_set():
+        try:
+            pipe.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def pipeline(source, transform, sink, depth: int = PIPELINE_DEPTH) -> None:
+    """
+    Runs source, transform and sink as stages connected by bounded queues
+
+    source is iterated in a thread, transform is applied to each of its
+    items in a second thread and sink is called with the results in the
+    calling thread. An exception of any stage stops the pipeline and is
+    raised in the calling thread.
+    """
+    fetched, transformed = queue.Queue(depth), queue.Queue(depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in source():
+                if not _put(fetched, item, stop):
+                    return
+            _put(fetched, _END, stop)
+        except Exception as err:
+            _put(fetched, _Failure(err), stop)
+
+    def convert():
+        while True:
+            item = fetched.get()
+            if item is _END or isinstance(item, _Failure):
+                _put(transformed, item, stop)
+                return
+            try:
+                result = transform(item)
+            except Exception as err:
+                _put(transformed, _Failure(err), stop)
+                return
+            if not _put(transformed, result, stop):
+                return
+
+    threads = [threading.Thread(target=propagate(stage), daemon=True) for stage in (produce, convert)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = transformed.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            sink(item)
+    finally:
+        stop.set()
+        # unblocks convert if it waits for a page that will not come
+        try:
+            fetched.put_nowait(_END)
+        except queue.Full:
+            pass
+        for thread in threads:
+            thread.join()
+
+
+@contextmanager
+def open_output(path: str, compress: bool = None):
+    """
+    Opens path for writing text, gzip compressed if compress or, when
+    compress is None, if path ends with .gz; "-" is stdout
+
+    A file is written as path.partial and renamed to path once the block
+    completes, if it raises the partial file is removed so a truncated
+    export is never left at path.
+    """
+    if compress is None:
+        compress = path.endswith(".gz")
+    if path == "-":
+        if compress:
+            with gzip.open(sys.stdout.buffer, "wt", encoding="utf-8") as stream:
+                yield stream
+        else:
+            yield sys.stdout
+        return
+    opener = gzip.open if compress else open
+    partial_path = path + ".partial"
+    try:
+        with opener(partial_path, "wt", encoding="utf-8") as stream:
+            yield stream
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    os.replace(partial_path, path)
+
+
+def export_board(client, board_id: str, stream, page_size: int = MAX_PAGE_SIZE,
+                 depth: int = PIPELINE_DEPTH, retries: int = RETRIES, retry_delay: float = RETRY_DELAY) -> Counter:
+    """
+    Writes a board to stream as JSON Lines
+
+    Parameters
+    ----------
+    client: TrelloAPI
+        client the board is requested with
+    board_id: str
+        id of the board
+    stream: TextIO
+        text stream the records are written to
+    page_size: int
+        number of cards and comments requested per page
+    depth: int
+        pages held between two stages
+    retries: int
+        retries of a request answered with 429 or 5xx or not at all
+    retry_delay: float
+        seconds before the first retry, doubled for every further retry
+
+    Returns
+    -------
+    counts: Counter
+        number of records written per record type
+
+    Raises
+    ------
+    ValueError
+        if a request still fails after the retries, the records written so
+        far are an incomplete export
+    """
+    counts = Counter()
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+    def transform(item):
+        with stats.phase("entity"):
+            return to_records(*item)
+
+    def write(records):
+        with stats.phase("render"):
+            stream.write("".join(dumps(record) + "\n" for record in records))
+        if records:
+            counts[records[0]['type']] += len(records)
+
+    pipeline(partial(board_pages, client, board_id, page_size, retries, retry_delay), transform, write, depth)
+    return counts
@@ -0,0 +1,181 @@
+"""Module for the request lifecycle hooks of TrelloAPI
+
+Callbacks registered on TrelloAPI.hooks are run for every request sent to
+Trello, e.g. to add metrics, logging or auditing:
+
+    before_request   before the request is sent
+    after_response   once a response arrived, whatever its status code
+    on_error         when the request failed, with the exception
+
+Each callback receives a RequestEvent. Secrets are redacted from its url and
+params. Requests answered by the response cache are not sent and do not run
+the hooks. While no callback is registered TrelloAPI only checks
+`hooks.active` per request.
+
+    from trello_cli.hooks import RequestCounters
+    from trello_cli.trello_api import TrelloAPI
+
+    counters = RequestCounters()
+    counters.install(TrelloAPI.hooks)
+    ...
+    print(counters.requests, counters.errors)
+"""
+
+# standard library imports
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Any, NamedTuple, Optional
+
+EVENTS = ("before_request", "after_response", "on_error")
+
+# request parameters holding credentials
+SECRET_PARAMS = frozenset(("key", "token", "api_key", "api_token", "oauth_token", "oauth_secret",
+                           "oauth_signature"))
+
+REDACTED = "***"
+
+_SECRET_QUERY = re.compile(r"([?&](?:%s)=)[^&#]*" % "|".join(sorted(SECRET_PARAMS)))
+
+
+class RequestEvent(NamedTuple):
+    """Model passed to the request hooks
+
+    Attributes
+        method (str): request type e.g. GET
+        url (str): endpoint of the request, secrets redacted
+        params (dict): query parameters of the request, secrets redacted
+        elapsed (float): seconds since the request was sent, 0 before it was sent
+        status_code (int): status code of the response, None without a response
+        response_size (int): bytes of the response body, 0 without a response
+        error (Exception): exception of a failed request, None otherwise
+    """
+    method: str
+    url: str
+    params: Optional[dict] = None
+    elapsed: float = 0.0
+    status_code: Optional[int] = None
+    response_size: int = 0
+    error: Optional[Exception] = None
+
+
+def redact_url(url: str) -> str:
+    """Returns url with the values of secret query parameters replaced"""
+    return _SECRET_QUERY.sub(r"\g<1>" + REDACTED, url)
+
+
+def redact_params(params: Any) -> Any:
+    """Returns a copy of request params with the values of secrets replaced"""
+    if not isinstance(params, dict):
+        return params
+    return {key: REDACTED if key in SECRET_PARAMS else value for key, value in params.items()}
+
+
+class HookRegistry:
+    """
+    Callbacks run for every request of TrelloAPI
+
+    Attributes
+    ----------
+        active: bool
+            True while at least one callback is registered
+    """
+
+    def __init__(self) -> None:
+        self._callbacks = {event: () for event in EVENTS}
+        self._lock = threading.Lock()
+        self.active = False
+
+    def register(self, event: str, callback) -> None:
+        """
+        Adds a callback for an event
+
+        Raises
+        ------
+        ValueError
+            for an unknown event
+        """
+        if event not in self._callbacks:
+            raise ValueError(f"ERROR - Unknown hook event: {event}, expected one of {', '.join(EVENTS)}")
+        with self._lock:
+            # callbacks are stored as tuples so requests iterate them without locking
+            self._callbacks[event] += (callback,)
+            self.active = True
+
+    def unregister(self, event: str, callback) -> None:
+        """Removes a callback added by register()"""
+        with self._lock:
+            callbacks = list(self._callbacks.get(event, ()))
+            if callback in callbacks:
+                callbacks.remove(callback)
+            self._callbacks[event] = tuple(callbacks)
+            self.active = any(self._callbacks.values())
+
+    def clear(self) -> None:
+        """Removes every callback"""
+        with self._lock:
+            self._callbacks = {event: () for event in EVENTS}
+            self.active = False
+
+    def emit(self, event: str, request_event: RequestEvent) -> None:
+        """Runs the callbacks of an event, errors of a callback are logged and do not fail the request"""
+        for callback in self._callbacks[event]:
+            try:
+                callback(request_event)
+            except Exception:
+                logging.exception("ERROR - %s hook %r failed", event, callback)
+
+
+class RequestCounters:
+    """
+    In-memory counters of the requests sent to Trello, a reference plugin
+    for the request hooks
+
+    Attributes
+    ----------
+        requests: Counter
+            requests sent per method
+        statuses: Counter
+            responses per status code
+        errors: int
+            requests that failed without a response
+        bytes_in: int
+            bytes of the response bodies
+        elapsed: float
+            seconds spent waiting for responses
+    """
+
+    def __init__(self) -> None:
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.errors = 0
+        self.bytes_in = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self, event: RequestEvent) -> None:
+        with self._lock:
+            self.requests[event.method] += 1
+
+    def after_response(self, event: RequestEvent) -> None:
+        with self._lock:
+            self.statuses[event.status_code] += 1
+            self.bytes_in += event.response_size
+            self.elapsed += event.elapsed
+
+    def on_error(self, event: RequestEvent) -> None:
+        if event.status_code is None:
+            with self._lock:
+                self.errors += 1
+                self.elapsed += event.elapsed
+
+    def install(self, registry: HookRegistry) -> None:
+        """Registers the counters' callbacks"""
+        for event in EVENTS:
+            registry.register(event, getattr(self, event))
+
+    def uninstall(self, registry: HookRegistry) -> None:
+        """Removes the counters' callbacks"""
+        for event in EVENTS:
+            registry.unregister(event, getattr(self, event))
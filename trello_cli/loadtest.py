@@ -0,0 +1,296 @@
+"""Module for load testing the client stack with the loadtest command
+
+A load test runs a weighted mix of operations through TrelloService for a
+fixed duration, either as fast as `concurrency` workers allow or at a
+target rate of operations per second. Every operation is timed and the
+results are summarised per interval and for the whole run.
+
+    get_board        TrelloService.get_board
+    get_all_cards    TrelloService.get_list + TrelloList.get_all_cards
+    get_card         TrelloService.get_card + Card.get_comments
+    create_card      TrelloService.create_card
+    create_comment   TrelloService.create_comment
+
+Writes create real cards and comments, so point the test at a test board
+or at the local stand-in of benchmarks/fake_trello.py.
+"""
+
+# local imports
+from trello_cli import SUCCESS
+from trello_cli.stats import percentile
+
+# standard library imports
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import NamedTuple
+
+OPERATIONS = ('get_board', 'get_all_cards', 'get_card', 'create_card', 'create_comment')
+
+DEFAULT_MIX = "get_board=3,get_all_cards=2,get_card=3,create_card=1,create_comment=1"
+
+
+class Sample(NamedTuple):
+    """Model of a timed operation
+
+    Attributes
+        started (float): seconds since the start of the test
+        operation (str): name of the operation
+        latency (float): seconds taken by the operation
+        ok (bool): True if the operation succeeded
+    """
+    started: float
+    operation: str
+    latency: float
+    ok: bool
+
+
+class Summary(NamedTuple):
+    """Model of the summary of a set of samples
+
+    Attributes
+        count (int): number of operations
+        errors (int): number of failed operations
+        throughput (float): operations per second
+        p50 (float): median latency in seconds
+        p95 (float): 95th percentile latency in seconds
+        p99 (float): 99th percentile latency in seconds
+        max (float): highest latency in seconds
+    """
+    count: int
+    errors: int
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+def summarize(samples: list, seconds: float) -> Summary:
+    """Returns the summary of samples taken over seconds"""
+    latencies = sorted(sample.latency for sample in samples)
+    return Summary(
+        count=len(samples),
+        errors=sum(not sample.ok for sample in samples),
+        throughput=len(samples) / seconds if seconds > 0 else 0.0,
+        p50=percentile(latencies, 0.5),
+        p95=percentile(latencies, 0.95),
+        p99=percentile(latencies, 0.99),
+        max=latencies[-1] if latencies else 0.0,
+    )
+
+
+def parse_mix(mix: str) -> dict:
+    """
+    Parses a workload mix e.g. get_board=3,create_card=1
+
+    Returns
+    -------
+    weights: dict
+        weight of each operation
+
+    Raises
+    ------
+    ValueError
+        for unknown operations or weights that are not positive numbers
+    """
+    weights = {}
+    for part in filter(None, (part.strip() for part in mix.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"ERROR - Unknown operation: {name}, expected one of {', '.join(OPERATIONS)}")
+        try:
+            weights[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"ERROR - Weight of {name} is not a number: {weight}")
+        if weights[name] < 0:
+            raise ValueError(f"ERROR - Weight of {name} is negative: {weight}")
+    if not weights or not any(weights.values()):
+        raise ValueError("ERROR - The mix needs at least one operation with a positive weight")
+    return weights
+
+
+@contextmanager
+def client_overrides(base_url: str = None, client_rate_limit: bool = True):
+    """
+    Points the client stack at base_url and disables the response cache,
+    and the client rate limiter unless client_rate_limit, for the duration
+    of the block
+    """
+    from trello_cli import trello_api
+    from trello_cli.settings import reset_settings
+
+    previous_url = os.environ.get("TRELLO_API_BASE_URL")
+    previous_limiter, previous_cache = trello_api.rate_limiter, trello_api.response_cache
+    if base_url:
+        os.environ["TRELLO_API_BASE_URL"] = base_url
+        reset_settings()
+    if not client_rate_limit:
+        trello_api.rate_limiter = trello_api.RateLimiter(max_calls=None, period=previous_limiter.period)
+    trello_api.response_cache = None
+    try:
+        yield
+    finally:
+        trello_api.rate_limiter, trello_api.response_cache = previous_limiter, previous_cache
+        if base_url:
+            if previous_url is None:
+                os.environ.pop("TRELLO_API_BASE_URL", None)
+            else:
+                os.environ["TRELLO_API_BASE_URL"] = previous_url
+            reset_settings()
+
+
+class LoadTest:
+    """
+    Weighted workload run against a board
+
+    Attributes
+    ----------
+        service: TrelloService
+            service the operations are run through
+        board_id: str
+            board read by get_board
+        list_id: str
+            list read by get_all_cards and receiving created cards
+        card_ids: list
+            cards read by get_card and receiving comments
+        weights: dict
+            weight of each operation
+        samples: list
+            timed operations of the run
+    """
+
+    def __init__(self, service, board_id: str, list_id: str, card_ids: list, weights: dict,
+                 seed: int = None) -> None:
+        self.service = service
+        self.board_id = board_id
+        self.list_id = list_id
+        self.card_ids = list(card_ids)
+        self.weights = weights
+        self.samples = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._created = itertools.count(1)
+        if not self.card_ids and (weights.get('get_card') or weights.get('create_comment')):
+            raise ValueError("ERROR - get_card and create_comment need a list with at least one card")
+
+    def _pick(self) -> tuple:
+        """Returns the next operation and the card it works on"""
+        with self._lock:
+            operation = self._random.choices(list(self.weights), weights=list(self.weights.values()))[0]
+            card_id = self._random.choice(self.card_ids) if self.card_ids else None
+        return operation, card_id
+
+    def run_operation(self, operation: str, card_id: str = None) -> bool:
+        """Runs an operation, returns True if it succeeded"""
+        service = self.service
+        if operation == 'get_board':
+            return service.get_board(self.board_id).status_code == SUCCESS
+        if operation == 'get_all_cards':
+            response = service.get_list(self.list_id)
+            if response.status_code != SUCCESS:
+                return False
+            response.res.get_all_cards()
+            return True
+        if operation == 'get_card':
+            response = service.get_card(card_id)
+            if response.status_code != SUCCESS:
+                return False
+            response.res.get_comments()
+            return True
+        if operation == 'create_card':
+            return service.create_card(f"loadtest card {next(self._created)}", self.list_id).status_code == SUCCESS
+        if operation == 'create_comment':
+            return service.create_comment(card_id, "loadtest comment").status_code == SUCCESS
+        raise ValueError(f"ERROR - Unknown operation: {operation}")
+
+    def _timed(self, start: float, scheduled: float = None) -> None:
+        operation, card_id = self._pick()
+        began = time.perf_counter()
+        try:
+            ok = self.run_operation(operation, card_id)
+        except Exception:
+            ok = False
+        ended = time.perf_counter()
+        # with a target rate, latency counts from the scheduled time so that a
+        # saturated client does not hide its queueing delay
+        latency = ended - (scheduled if scheduled is not None else began)
+        sample = Sample(began - start, operation, latency, ok)
+        with self._lock:
+            self.samples.append(sample)
+
+    def run(self, duration: float, rate: float = 0.0, concurrency: int = 4, interval: float = 1.0,
+            on_interval=None) -> Summary:
+        """
+        Runs the workload
+
+        Parameters
+        ----------
+        duration: float
+            seconds the test runs for
+        rate: float
+            target operations per second, as fast as possible when 0
+        concurrency: int
+            number of worker threads
+        interval: float
+            seconds per interval passed to on_interval
+        on_interval: callable
+            called with (interval end in seconds, Summary) after each interval
+
+        Returns
+        -------
+        summary: Summary
+            summary of the whole run
+        """
+        start = time.perf_counter()
+        deadline = start + duration
+        tickets = itertools.count()
+        stop = threading.Event()
+
+        def worker():
+            while not stop.is_set():
+                scheduled = None
+                if rate:
+                    scheduled = start + next(tickets) / rate
+                    if scheduled >= deadline:
+                        return
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0 and stop.wait(delay):
+                        return
+                elif time.perf_counter() >= deadline:
+                    return
+                self._timed(start, scheduled)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            workers = [executor.submit(worker) for _ in range(concurrency)]
+            pending, reported = workers, 0
+            try:
+                while pending:
+                    _, pending = wait(pending, timeout=max(0.0, start + (reported + 1) * interval
+                                                           - time.perf_counter()))
+                    elapsed = time.perf_counter() - start
+                    while elapsed >= (reported + 1) * interval:
+                        low, high = reported * interval, (reported + 1) * interval
+                        if on_interval is not None:
+                            with self._lock:
+                                window = [sample for sample in self.samples if low <= sample.started < high]
+                            on_interval(high, summarize(window, interval))
+                        reported += 1
+            finally:
+                stop.set()
+            for future in workers:
+                future.result()
+
+        return summarize(self.samples, time.perf_counter() - start)
+
+    def per_operation(self) -> dict:
+        """Returns the Summary of each operation of the run"""
+        elapsed = max((sample.started + sample.latency for sample in self.samples), default=0.0)
+        operations = {}
+        for sample in self.samples:
+            operations.setdefault(sample.operation, []).append(sample)
+        return {name: summarize(samples, elapsed) for name, samples in operations.items()}
@@ -73,11 +73,15 @@ class CreateCardResponse(NamedTuple):
 
     Attributes
         res (Card): card
-        status_code (int): success / error
+        status_code (int): success / error, an error with res set means the
+            card was created but its comment was not
+        comment (Comment): first comment of the card if one was requested
+            and created, None otherwise
 
     """
     res: Card
     status_code: int
+    comment: Comment = None
 
 
 class CreateCommentResponse(NamedTuple):
@@ -102,3 +106,47 @@ class AddCardLabelResponse(NamedTuple):
     """
     res: str
     status_code: int
+
+
+class BulkCardResult(NamedTuple):
+    """Model to store the outcome of a bulk operation on a single card
+
+    Attributes
+        card_id (str): id of the card
+        status_code (int): success / error
+        skipped (bool): True if the card needed no change
+        changes (dict): fields sent, or that would be sent on a dry run
+
+    """
+    card_id: str
+    status_code: int
+    skipped: bool = False
+    changes: dict = None
+
+
+class BulkResponse(NamedTuple):
+    """Model to store response of a bulk operation over many cards
+
+    Attributes
+        res (List[BulkCardResult]): per card outcome, in input order
+        status_code (int): success if every card succeeded / error
+        calls (int): number of requests made to the Trello API
+        elapsed (float): wall clock time of the operation in seconds
+
+    """
+    res: List[BulkCardResult]
+    status_code: int
+    calls: int = 0
+    elapsed: float = 0.0
+
+
+class GetCardTableResponse(NamedTuple):
+    """Model to store response when building the card table of a board
+
+    Attributes
+        res (CardTable): columnar table of the board's cards
+        status_code (int): success / error
+
+    """
+    res: "CardTable"
+    status_code: int
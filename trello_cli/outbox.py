@@ -0,0 +1,389 @@
+"""Module for the write-behind outbox of card, comment and label writes
+
+A TrelloService given an Outbox queues create_card, create_comment and
+add_card_label instead of sending them and returns at once. The outbox is
+an append-only journal of json lines on disk, every change of an entry is
+appended as a new line and fsynced so queued writes survive crashes and
+network outages:
+
+    {"op": "enqueue", "id": ..., "key": ..., "action": "create_comment", "args": {...}, "created": ...}
+    {"op": "attempt", "id": ..., "error": "trello write error"}
+    {"op": "done", "id": ..., "result": <id of the created card or comment>, "time": ...}
+    {"op": "failed", "id": ..., "error": ...}
+    {"op": "retry", "id": ...}
+
+flush delivers the pending entries through a TrelloService without an
+outbox. Writes to the same card (or created in the same list) are sent one
+after the other in the order they were queued, different cards are
+delivered concurrently. A failed write is retried with a backoff, a write
+still failing after MAX_ATTEMPTS is marked failed and left in the journal
+until retried with retry_failed. A write that keeps failing within a flush
+holds back the later writes of its card until the next flush. The first
+comment of a queued card is queued as a create_comment entry of its own
+once the card is created, and delivered within the same flush.
+
+Every entry carries an idempotency key, queueing a write with the key of
+an entry already in the journal returns that entry instead of queueing it
+twice, and only one process flushes at a time. Compaction drops delivered
+entries only KEY_RETENTION seconds after their delivery, so a write queued
+again with its key within that window returns the delivered entry and its
+result. Delivery is at least once,
+a crash between Trello's answer and journaling it sends the write again
+on the next flush.
+"""
+
+# local imports
+from trello_cli import ERRORS, SUCCESS
+
+# standard library imports
+import fcntl
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+# required and optional arguments of the writes that can be queued
+ACTIONS = {
+    'create_card': (('name', 'list_id'), ('desc', 'label_ids', 'pos', 'due', 'member_ids', 'comment')),
+    'create_comment': (('card_id', 'text'), ()),
+    'add_card_label': (('card_id', 'label_id'), ()),
+}
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+# deliveries of an entry before it is marked failed
+MAX_ATTEMPTS = 5
+
+# retries of an entry within a flush and seconds before the first one, doubled per retry
+RETRIES = 2
+RETRY_DELAY = 0.5
+
+# number of cards delivered at once by a flush
+FLUSH_MAX_WORKERS = 8
+
+# seconds a delivered entry and its idempotency key are kept in the journal
+KEY_RETENTION = 7 * 24 * 60 * 60
+
+
+def outbox_path() -> str:
+    """Returns the path of the outbox journal
+
+    Can be overridden with the TRELLO_CLI_OUTBOX environment variable
+    """
+    state_home = os.getenv("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.getenv("TRELLO_CLI_OUTBOX") or os.path.join(state_home, "trello_cli", "outbox.jsonl")
+
+
+class OutboxEntry(NamedTuple):
+    """Model of a queued write
+
+    Attributes
+        entry_id (str): id of the entry
+        key (str): idempotency key of the write
+        action (str): service method of the write e.g. create_comment
+        args (dict): arguments of the service method
+        created (float): unix time the write was queued at
+        status (str): pending, done or failed
+        attempts (int): number of failed deliveries
+        error (str): error of the last failed delivery
+        result (str): id of the created card or comment once delivered
+        delivered (float): unix time the write was delivered at
+    """
+    entry_id: str
+    key: str
+    action: str
+    args: dict
+    created: float
+    status: str = PENDING
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[str] = None
+    delivered: Optional[float] = None
+
+    @property
+    def target(self) -> str:
+        """Returns the card, or list for new cards, whose writes are delivered in order"""
+        if self.action == 'create_card':
+            return f"list:{self.args['list_id']}"
+        return f"card:{self.args['card_id']}"
+
+
+class Outbox:
+    """
+    Append-only journal of queued writes
+
+    Attributes
+    ----------
+        path: str
+            path of the journal, outbox_path() by default
+    """
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or outbox_path()
+
+    @contextmanager
+    def _locked(self, suffix: str = ".lock", blocking: bool = True):
+        """Holds a lock file next to the journal, yields False if not blocking and already held"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + suffix, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _append(self, *records: dict) -> None:
+        with open(self.path, "a") as journal:
+            journal.write("".join(json.dumps(record) + "\n" for record in records))
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _read(self) -> dict:
+        """Replays the journal, returns the entries by id in the order they were queued"""
+        entries = {}
+        try:
+            journal = open(self.path)
+        except FileNotFoundError:
+            return entries
+        with journal:
+            for number, line in enumerate(journal, 1):
+                try:
+                    record = json.loads(line)
+                    op = record['op']
+                    if op == 'enqueue':
+                        entries[record['id']] = OutboxEntry(
+                            record['id'], record['key'], record['action'], record['args'], record['created'],
+                            record.get('status', PENDING), record.get('attempts', 0), record.get('error'),
+                            record.get('result'), record.get('delivered'))
+                        continue
+                    entry = entries[record['id']]
+                except (ValueError, KeyError):
+                    # a torn last line of a crashed writer or a line of an unknown entry
+                    logging.warning("skipping line %d of outbox %s", number, self.path)
+                    continue
+                if op == 'attempt':
+                    entries[entry.entry_id] = entry._replace(attempts=entry.attempts + 1, error=record['error'])
+                elif op == 'done':
+                    entries[entry.entry_id] = entry._replace(status=DONE, result=record.get('result'),
+                                                             delivered=record.get('time'))
+                elif op == 'failed':
+                    entries[entry.entry_id] = entry._replace(status=FAILED, error=record['error'])
+                elif op == 'retry':
+                    entries[entry.entry_id] = entry._replace(status=PENDING, attempts=0)
+        return entries
+
+    def entries(self, status: str = None) -> list:
+        """Returns the entries of the journal, only those with status if given"""
+        with self._locked():
+            entries = list(self._read().values())
+        return [entry for entry in entries if status is None or entry.status == status]
+
+    def enqueue(self, action: str, args: dict, key: str = None) -> OutboxEntry:
+        """
+        Queues a write
+
+        Parameters
+        ----------
+        action: str
+            service method of the write, one of ACTIONS
+        args: dict
+            arguments of the service method
+        key: str
+            idempotency key, a write with the key of an entry in the journal,
+            pending, failed or delivered within KEY_RETENTION, is not queued
+            again
+
+        Returns
+        -------
+        entry: OutboxEntry
+            queued entry, or the existing entry of key e.g. a delivered one
+            with its result
+
+        Raises
+        ------
+        ValueError
+            for unknown actions or missing arguments
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"ERROR - Unknown outbox action: {action}")
+        required, optional = ACTIONS[action]
+        if not set(required) <= set(args) <= set(required + optional) or \
+                not all(isinstance(args[name], str) for name in required):
+            raise ValueError(f"ERROR - Action {action} takes the str arguments {', '.join(required)} "
+                             f"and optionally {', '.join(optional) or 'nothing else'}")
+
+        entry = OutboxEntry(uuid.uuid4().hex, key or uuid.uuid4().hex, action, dict(args), time.time())
+        with self._locked():
+            if key is not None:
+                for existing in self._read().values():
+                    if existing.key == key:
+                        return existing
+            self._append({'op': 'enqueue', 'id': entry.entry_id, 'key': entry.key, 'action': action,
+                          'args': entry.args, 'created': entry.created})
+        return entry
+
+    def _record(self, record: dict) -> None:
+        with self._locked():
+            self._append(record)
+
+    def retry_failed(self) -> list:
+        """Queues the failed entries again, returns them"""
+        with self._locked():
+            failed = [entry for entry in self._read().values() if entry.status == FAILED]
+            if failed:
+                self._append(*({'op': 'retry', 'id': entry.entry_id} for entry in failed))
+        return failed
+
+    def compact(self, retention: float = KEY_RETENTION) -> None:
+        """Rewrites the journal without the entries delivered more than retention seconds ago"""
+        now = time.time()
+        with self._locked():
+            remaining = [entry for entry in self._read().values()
+                         if entry.status != DONE or now - (entry.delivered or 0) < retention]
+            temporary = self.path + ".tmp"
+            with open(temporary, "w") as journal:
+                for entry in remaining:
+                    journal.write(json.dumps({
+                        'op': 'enqueue', 'id': entry.entry_id, 'key': entry.key, 'action': entry.action,
+                        'args': entry.args, 'created': entry.created, 'status': entry.status,
+                        'attempts': entry.attempts, 'error': entry.error, 'result': entry.result,
+                        'delivered': entry.delivered}) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(temporary, self.path)
+
+    @staticmethod
+    def _deliver(service, entry: OutboxEntry) -> tuple:
+        """Sends a write, returns (status code, id of the created object)"""
+        args = dict(entry.args)
+        if entry.action == 'create_card':
+            # the first comment is queued as an entry of its own once the card exists
+            args.pop('comment', None)
+        response = getattr(service, entry.action)(**args)
+        if response.status_code != SUCCESS:
+            return response.status_code, None
+        return SUCCESS, getattr(response.res, 'card_id', None) or getattr(response.res, 'comment_id', None)
+
+    def _enqueue_comment(self, entry: OutboxEntry) -> OutboxEntry:
+        """
+        Queues the first comment of a delivered card, returns the card's
+        entry with the error if the comment could not be queued
+
+        The card is done either way, retrying it would create it twice.
+        """
+        try:
+            self.enqueue('create_comment', {'card_id': entry.result, 'text': entry.args['comment']},
+                         key=f"{entry.key}:comment")
+        except Exception as err:
+            error = f"could not queue the first comment: {type(err).__name__}: {err}"
+            logging.error("card %s of outbox entry %s was created but %s", entry.result, entry.entry_id, error)
+            return entry._replace(error=error)
+        return entry
+
+    def _deliver_target(self, service, entries: list, max_attempts: int, retries: int,
+                        retry_delay: float) -> list:
+        delivered = []
+        for entry in entries:
+            for retry in range(retries + 1):
+                try:
+                    status_code, result = self._deliver(service, entry)
+                    error = None if status_code == SUCCESS else ERRORS[status_code]
+                except Exception as err:
+                    error = f"{type(err).__name__}: {err}"
+                if error is None:
+                    entry = entry._replace(status=DONE, result=result, delivered=time.time())
+                    self._record({'op': 'done', 'id': entry.entry_id, 'result': result, 'time': entry.delivered})
+                    if entry.action == 'create_card' and 'comment' in entry.args:
+                        entry = self._enqueue_comment(entry)
+                    break
+                entry = entry._replace(attempts=entry.attempts + 1, error=error)
+                self._record({'op': 'attempt', 'id': entry.entry_id, 'error': error})
+                if entry.attempts >= max_attempts:
+                    entry = entry._replace(status=FAILED)
+                    self._record({'op': 'failed', 'id': entry.entry_id, 'error': error})
+                    break
+                if retry < retries:
+                    time.sleep(retry_delay * 2 ** retry)
+            delivered.append(entry)
+            if entry.status == PENDING:
+                # later writes to the target wait for this one
+                break
+        return delivered
+
+    def flush(self, service, max_attempts: int = MAX_ATTEMPTS, retries: int = RETRIES,
+              retry_delay: float = RETRY_DELAY, max_workers: int = FLUSH_MAX_WORKERS) -> Optional[list]:
+        """
+        Delivers the pending entries
+
+        Parameters
+        ----------
+        service: TrelloService
+            service without an outbox the writes are sent through
+        max_attempts: int
+            failed deliveries after which an entry is marked failed
+        retries: int
+            retries of a failed entry within this flush
+        retry_delay: float
+            seconds before the first retry, doubled for every further retry
+        max_workers: int
+            number of cards delivered at once
+
+        Returns
+        -------
+        entries: list
+            the entries delivery was attempted for with their new status,
+            None if another process is flushing the outbox
+        """
+        if getattr(service, 'outbox', None) is not None:
+            raise ValueError("ERROR - An outbox is flushed through a service without an outbox")
+
+        with self._locked(".flush.lock", blocking=False) as acquired:
+            if not acquired:
+                return None
+
+            def deliver(entries):
+                return self._deliver_target(service, entries, max_attempts, retries, retry_delay)
+
+            results, attempted, held_back = [], set(), set()
+            # writes queued while delivering are picked up before the lock is released
+            while True:
+                targets = {}
+                for entry in self.entries(PENDING):
+                    if entry.entry_id not in attempted and entry.target not in held_back:
+                        targets.setdefault(entry.target, []).append(entry)
+                if not targets:
+                    break
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as executor:
+                    for entries in executor.map(deliver, targets.values()):
+                        for entry in entries:
+                            attempted.add(entry.entry_id)
+                            if entry.status == PENDING:
+                                held_back.add(entry.target)
+                        results.extend(entries)
+            if results:
+                self.compact()
+            return results
+
+
+def start_background_flush(path: str = None) -> subprocess.Popen:
+    """
+    Flushes the outbox in a detached `trello_cli outbox-flush` process which
+    outlives the calling command
+    """
+    # a daemon would flush the outbox of its own environment instead of path
+    env = dict(os.environ, TRELLO_CLI_NO_DAEMON="1")
+    if path:
+        env["TRELLO_CLI_OUTBOX"] = path
+    return subprocess.Popen([sys.executable, "-m", "trello_cli", "outbox-flush"], env=env,
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
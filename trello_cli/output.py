@@ -0,0 +1,141 @@
+"""Module for the machine readable output formats of the CLI
+
+The default text output goes through rich, which parses markup and applies
+the theme for every row. The writers of this module write plain records
+through a buffer instead, for piping into other tools:
+
+    jsonl   one json object per line
+    tsv     a header line followed by one tab separated line per record,
+            repeated after an empty line when the keys of the records change
+    json    a single json array of all records
+"""
+
+# standard library imports
+import json
+import sys
+from enum import Enum
+
+# records buffered before they are written to the stream
+BUFFER_RECORDS = 512
+
+
+class OutputFormat(str, Enum):
+    """Output formats of the --output option"""
+
+    text = "text"
+    jsonl = "jsonl"
+    tsv = "tsv"
+    json = "json"
+
+
+class RecordWriter:
+    """
+    Base class of the buffered record writers
+
+    Attributes
+    ----------
+        stream: file object
+            text stream the records are written to
+        columns: list
+            keys of each record to write, every key by default
+    """
+
+    def __init__(self, stream=None, columns=None) -> None:
+        self.stream = stream or sys.stdout
+        self.columns = list(columns) if columns else None
+        self._buffer = []
+
+    def _select(self, record: dict) -> dict:
+        """Returns the selected columns of a record"""
+        if self.columns is None:
+            return record
+        return {column: record.get(column) for column in self.columns}
+
+    def _format(self, record: dict) -> str:
+        """Returns the text written for a record"""
+        raise NotImplementedError
+
+    def write(self, record: dict) -> None:
+        """Writes a record"""
+        self._buffer.append(self._format(self._select(record)))
+        if len(self._buffer) >= BUFFER_RECORDS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered records to the stream"""
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer.clear()
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Writes any pending output, the stream is left open"""
+        self.flush()
+
+
+class JsonLinesWriter(RecordWriter):
+    """Writes one json object per line"""
+
+    def _format(self, record: dict) -> str:
+        return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+class TsvWriter(RecordWriter):
+    """Writes a header line with the columns and one tab separated line per record
+
+    Without explicit columns the keys of each record are used, a record with
+    other keys than the one before starts a new table: an empty line and a
+    header line with its keys, so mixed streams e.g. a card, its comments
+    and labels keep every field.
+    """
+
+    _escapes = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+    _header = None
+
+    def _cell(self, value) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, (list, tuple)):
+            value = ",".join(map(str, value))
+        return str(value).translate(self._escapes)
+
+    def _format(self, record: dict) -> str:
+        header = ""
+        columns = self.columns if self.columns is not None else list(record)
+        if columns != self._header:
+            header = ("\n" if self._header is not None else "") + "\t".join(columns) + "\n"
+            self._header = columns
+        return header + "\t".join(self._cell(record.get(column)) for column in columns) + "\n"
+
+
+class JsonWriter(RecordWriter):
+    """Writes every record into one json array, streamed as records arrive"""
+
+    _started = False
+
+    def _format(self, record: dict) -> str:
+        prefix = ",\n" if self._started else "[\n"
+        self._started = True
+        return prefix + json.dumps(record, ensure_ascii=False, default=str)
+
+    def close(self) -> None:
+        self._buffer.append("\n]\n" if self._started else "[]\n")
+        self._started = False
+        super().close()
+
+
+WRITERS = {
+    OutputFormat.jsonl: JsonLinesWriter,
+    OutputFormat.tsv: TsvWriter,
+    OutputFormat.json: JsonWriter,
+}
+
+
+def make_writer(output_format: OutputFormat, columns=None, stream=None):
+    """
+    Returns the record writer of an output format
+
+    Returns None for the text format, which is rendered with rich
+    """
+    writer_class = WRITERS.get(OutputFormat(output_format))
+    return writer_class(stream, columns) if writer_class else None
@@ -0,0 +1,196 @@
+"""Module for paging long command output on a terminal
+
+The Pager shows one screen of lines at a time on the terminal's alternate
+screen. Lines are added while the command is still producing them, e.g.
+while cards are streamed page by page from Trello. Once a screen is full
+add() waits for the user to scroll on, so the command only fetches and
+renders as far as the user has scrolled.
+
+Keys:
+    space, f, page down   next screen
+    b, page up            previous screen
+    j, down, enter        next line
+    k, up                 previous line
+    g, home / G, end      first / last line
+    q, escape             quit
+"""
+
+# local imports
+from trello_cli.stats import phase
+
+# standard library imports
+import os
+import sys
+
+# 3rd party imports
+from rich.console import Console, Group
+from rich.rule import Rule
+from rich.text import Text
+
+# terminal escape sequences of the navigation keys
+ESCAPE_KEYS = {
+    "\x1b[A": "up",
+    "\x1b[B": "down",
+    "\x1b[5~": "page_up",
+    "\x1b[6~": "page_down",
+    "\x1b[H": "home",
+    "\x1b[F": "end",
+    "\x1b": "escape",
+}
+
+KEY_ACTIONS = {
+    " ": "page_down", "f": "page_down", "page_down": "page_down",
+    "b": "page_up", "page_up": "page_up",
+    "j": "down", "\r": "down", "\n": "down", "down": "down",
+    "k": "up", "up": "up",
+    "g": "home", "home": "home",
+    "G": "end", "end": "end",
+    "q": "quit", "escape": "quit",
+}
+
+FOOTER = "space/b screen  j/k line  g/G first/last  q quit"
+
+
+class PagerQuit(Exception):
+    """Raised by Pager.add() once the user quit the pager"""
+
+
+def read_key() -> str:
+    """
+    Reads one key press from the terminal without waiting for enter
+
+    Returns
+    -------
+    key: str
+        the character typed, or the name of a navigation key in ESCAPE_KEYS
+    """
+    import termios
+    import tty
+
+    fd = sys.stdin.fileno()
+    attributes = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        key = os.read(fd, 8).decode(errors="ignore")
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, attributes)
+    return ESCAPE_KEYS.get(key, key[:1])
+
+
+def can_page(console: Console) -> bool:
+    """Returns True if the console and stdin are an interactive terminal"""
+    return console.is_terminal and sys.stdin.isatty() and os.name == "posix"
+
+
+class Pager:
+    """
+    Pages lines of rich markup on the terminal
+
+    Attributes
+    ----------
+        console: Console
+            console the pager renders to
+        lines: list
+            lines added so far, markup strings or rich renderables
+        top: int
+            index of the first line on screen
+    """
+
+    def __init__(self, console: Console, read_key=read_key) -> None:
+        self.console = console
+        self.read_key = read_key
+        self.lines = []
+        self.top = 0
+        self._screen = None
+        self._quit = False
+
+    @property
+    def height(self) -> int:
+        """Returns the number of lines shown per screen, the last terminal line is the footer"""
+        return max(1, self.console.size.height - 1)
+
+    def add(self, line) -> None:
+        """
+        Adds a line, waiting for the user to scroll on while the screen is full
+
+        Raises
+        ------
+        PagerQuit
+            once the user quit the pager
+        """
+        self.lines.append(line)
+        while len(self.lines) > self.top + self.height:
+            self._show(complete=False)
+
+    def rule(self, title: str) -> None:
+        """Adds a section title"""
+        self.add(Rule(title))
+
+    def close(self) -> None:
+        """
+        Shows the remaining lines once the command has finished
+
+        Output that fits on one screen is printed without paging.
+        """
+        if self._quit:
+            return
+        if self._screen is None and len(self.lines) <= self.height:
+            with phase("render"):
+                for line in self.lines:
+                    self.console.print(line)
+            return
+        try:
+            while not self._quit:
+                self._show(complete=True)
+        except PagerQuit:
+            pass
+
+    def _show(self, complete: bool) -> None:
+        """Renders the screen and applies the next key press"""
+        if self._screen is None:
+            self._screen = self.console.screen()
+            self._screen.__enter__()
+        if complete:
+            self.top = max(0, min(self.top, len(self.lines) - self.height))
+
+        # waiting for the key press below is the user's time, not rendering
+        with phase("render"):
+            end = min(len(self.lines), self.top + self.height)
+            rows = [self._render(line) for line in self.lines[self.top:end]]
+            rows += [Text("")] * (self.height - len(rows))
+            total = f"{len(self.lines)}" if complete else f"{len(self.lines)}+"
+            rows.append(Text(f" {self.top + 1}-{end} of {total}  {FOOTER}", style="reverse", no_wrap=True))
+            self._screen.update(Group(*rows))
+
+        try:
+            action = KEY_ACTIONS.get(self.read_key())
+        except KeyboardInterrupt:
+            action = "quit"
+        if action == "quit":
+            self._quit = True
+            self._screen.__exit__(None, None, None)
+            raise PagerQuit()
+
+        if action == "page_down":
+            self.top += self.height
+        elif action == "page_up":
+            self.top -= self.height
+        elif action == "down":
+            self.top += 1
+        elif action == "up":
+            self.top -= 1
+        elif action == "home":
+            self.top = 0
+        elif action == "end":
+            # while streaming this keeps add() from waiting until the last line arrived
+            self.top = sys.maxsize
+        self.top = max(0, self.top)
+
+    @staticmethod
+    def _render(line):
+        """Returns the renderable of a line, cut to the terminal width"""
+        if isinstance(line, str):
+            text = Text.from_markup(line, overflow="ellipsis")
+            text.no_wrap = True
+            return text
+        return line
@@ -0,0 +1,170 @@
+"""Module for profiling a command with the --profile option
+
+Two profilers are available, chosen by the extension of the output path:
+
+    *.collapsed   a sampling profiler recording the stacks of every thread,
+                  including the thread pools of bulk operations and
+                  prefetching, written as collapsed stacks for flame graph
+                  tools e.g. `flamegraph.pl trello_cli.collapsed`
+    anything else cProfile, deterministic but limited to the command's
+                  thread, written as a pstats file for `python -m pstats`
+
+Either way a summary of the hottest functions is printed, with the frames of
+trello_api, trello_data and rich rendering grouped separately.
+"""
+
+# standard library imports
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# seconds between two samples of the sampling profiler
+SAMPLE_INTERVAL = 0.001
+
+# functions listed per group in the summary
+TOP_FUNCTIONS = 5
+
+# summary groups and the path fragments identifying their frames
+GROUPS = (
+    ("trello_api", os.path.join("trello_cli", "trello_api.py")),
+    ("trello_data", os.path.join("trello_cli", "trello_data.py")),
+    ("rich", os.path.join("rich", "")),
+)
+
+
+def frame_group(filename: str) -> str:
+    """Returns the summary group of a frame's file"""
+    for group, fragment in GROUPS:
+        if fragment in filename:
+            return group
+    return "other"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads in a background thread
+
+    Attributes
+    ----------
+        stacks: Counter
+            number of samples per stack, a stack is a tuple of
+            (filename, function) from the outermost frame
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def enable(self) -> None:
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append((frame.f_code.co_filename, frame.f_code.co_name))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def self_times(self) -> dict:
+        """Returns the seconds spent in each (filename, function) itself"""
+        times = Counter()
+        for stack, samples in self.stacks.items():
+            times[stack[-1]] += samples * self.interval
+        return times
+
+    def write(self, path: str) -> None:
+        """Writes the samples as collapsed stacks, one `frame;frame;... count` line per stack"""
+        with open(path, "w") as output:
+            for stack, samples in self.stacks.items():
+                frames = ";".join(f"{function} ({os.path.basename(filename)})" for filename, function in stack)
+                output.write(f"{frames} {samples}\n")
+
+
+class DeterministicProfiler:
+    """Profiles the calling thread with cProfile"""
+
+    def __init__(self) -> None:
+        import cProfile
+        self._profile = cProfile.Profile()
+
+    def enable(self) -> None:
+        self._profile.enable()
+
+    def disable(self) -> None:
+        self._profile.disable()
+
+    def self_times(self) -> dict:
+        """Returns the seconds spent in each (filename, function) itself"""
+        import pstats
+        times = Counter()
+        for (filename, _, function), (_, _, self_time, _, _) in pstats.Stats(self._profile).stats.items():
+            times[(filename, function)] += self_time
+        return times
+
+    def write(self, path: str) -> None:
+        """Writes a pstats file"""
+        self._profile.dump_stats(path)
+
+
+def start_profile(path: str):
+    """
+    Starts the profiler matching the extension of path
+
+    Returns
+    -------
+    profiler: SamplingProfiler | DeterministicProfiler
+        the running profiler
+    """
+    profiler = SamplingProfiler() if path.endswith(".collapsed") else DeterministicProfiler()
+    profiler.enable()
+    return profiler
+
+
+def summary(self_times: dict, top: int = TOP_FUNCTIONS):
+    """
+    Returns a rich table of the hottest functions of each group
+
+    Parameters
+    ----------
+    self_times: dict
+        seconds spent in each (filename, function)
+    top: int
+        number of functions listed per group
+    """
+    from rich.table import Table
+
+    groups = {}
+    for (filename, function), seconds in self_times.items():
+        groups.setdefault(frame_group(filename), []).append((seconds, function, filename))
+
+    table = Table(title="profile, self time", title_justify="left")
+    table.add_column("group / function", no_wrap=True)
+    table.add_column("ms", justify="right")
+    for group, _ in GROUPS + (("other", None),):
+        functions = sorted(groups.get(group, ()), reverse=True)
+        table.add_row(f"[bold]{group}[/bold]", f"[bold]{sum(f[0] for f in functions) * 1000:.1f}[/bold]")
+        for seconds, function, filename in functions[:top]:
+            table.add_row(f"  {function} ({os.path.basename(filename)})", f"{seconds * 1000:.1f}")
+    return table
+
+
+def stop_profile(profiler, path: str, console) -> None:
+    """Stops the profiler, writes its output to path and prints the summary to console"""
+    started = time.perf_counter()
+    profiler.disable()
+    profiler.write(path)
+    console.print(summary(profiler.self_times()))
+    console.print(f"profile written to {path} in {(time.perf_counter() - started) * 1000:.0f} ms")
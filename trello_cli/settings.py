@@ -0,0 +1,160 @@
+"""Module for loading the user's trello_cli settings
+
+The settings are read once per process from the environment and the user's
+.env file, and handed to TrelloService / TrelloAPI as an immutable Settings
+object instead of being looked up with os.getenv on every call.
+
+Setting TRELLO_CLI_SETTINGS_CACHE=1 additionally caches the parsed .env file
+on disk, keyed on the file's path, size and modification time, so a new
+process does not have to import dotenv and parse the file again.
+"""
+
+# standard library imports
+import json
+import os
+import threading
+from typing import NamedTuple, Optional
+
+# dotenv is imported where it is used so that commands which never touch the
+# settings, e.g. `trello_cli --help`, do not pay for it
+
+ENV_FILE = ".env"
+
+# environment variable names of the Settings fields
+ENV_VARS = {
+    'api_key': "TRELLO_API_KEY",
+    'api_secret': "TRELLO_API_SECRET",
+    'api_token': "TRELLO_API_TOKEN",
+    'oauth_token': "TRELLO_OAUTH_TOKEN",
+    'oauth_secret': "TRELLO_OAUTH_SECRET",
+    'base_url': "TRELLO_API_BASE_URL",
+}
+
+
+class Settings(NamedTuple):
+    """Model to store the user's trello_cli settings
+
+    Attributes
+        api_key (str): trello API key
+        api_secret (str): trello API secret
+        api_token (str): trello API token
+        oauth_token (str): trello oauth token
+        oauth_secret (str): trello oauth secret
+        base_url (str): root url of the trello API, api.trello.com by default
+    """
+    api_key: Optional[str] = None
+    api_secret: Optional[str] = None
+    api_token: Optional[str] = None
+    oauth_token: Optional[str] = None
+    oauth_secret: Optional[str] = None
+    base_url: Optional[str] = None
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def find_env_file() -> Optional[str]:
+    """
+    Returns the path of the closest .env file above the package directory,
+    the same file dotenv's find_dotenv() locates for this package
+    """
+    path = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(path, ENV_FILE)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _cache_path() -> str:
+    """
+    Returns the path of the on-disk settings cache
+    """
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "trello_cli", "settings.json")
+
+
+def _read_env_file(env_file: str, use_cache: bool) -> dict:
+    """
+    Returns the variables defined in env_file, from the on-disk cache when
+    it is enabled and still matches the file
+    """
+    stat = os.stat(env_file)
+    cache_key = [env_file, stat.st_size, stat.st_mtime_ns]
+    cache_path = _cache_path()
+    if use_cache:
+        try:
+            with open(cache_path) as cache_file:
+                cached = json.load(cache_file)
+            if cached['key'] == cache_key:
+                return cached['values']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    from dotenv import dotenv_values
+    values = {key: value for key, value in dotenv_values(env_file).items() if value is not None}
+
+    if use_cache:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # the file holds credentials so it is only readable by the user
+            fd = os.open(cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump({'key': cache_key, 'values': values}, cache_file)
+        except OSError:
+            pass
+    return values
+
+
+def load_settings(env_file: str = None, use_cache: bool = None) -> Settings:
+    """
+    Parses the settings from the environment and the .env file
+
+    Variables set in the environment take precedence over the .env file,
+    matching dotenv's load_dotenv()
+
+    Parameters
+    ----------
+    env_file: str
+        path of the .env file, located with find_env_file() by default
+    use_cache: bool
+        uses the on-disk cache, defaults to the TRELLO_CLI_SETTINGS_CACHE variable
+
+    Returns
+    -------
+    settings: Settings
+        the parsed settings
+    """
+    if use_cache is None:
+        use_cache = os.getenv("TRELLO_CLI_SETTINGS_CACHE", "") not in ("", "0")
+    env_file = env_file or find_env_file()
+    file_values = _read_env_file(env_file, use_cache) if env_file else {}
+    return Settings(**{
+        field: os.getenv(env_var, file_values.get(env_var))
+        for field, env_var in ENV_VARS.items()
+    })
+
+
+def get_settings() -> Settings:
+    """
+    Returns the settings of this process, parsed on the first call
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+
+def reset_settings() -> None:
+    """
+    Discards the settings of this process e.g. after app-init wrote new tokens
+    """
+    global _settings
+    with _settings_lock:
+        _settings = None
@@ -0,0 +1,180 @@
+"""Interactive shell running trello_cli commands in a single process
+
+Every command typed in the shell reuses the same TrelloService, connection
+pool and response cache, so only the first command pays for startup.
+
+The shell keeps a context of the current board, list and card. Options of
+a command that are not given on the line are filled in from it, e.g.
+
+    trello_cli> use board 65352f31c09f6a38f8df1d0a
+    trello_cli (board 65352f31)> get-board
+    trello_cli (board 65352f31)> get-cards --list-id 65352f31c09f6a38f8df1d0d
+    trello_cli (board 65352f31, list 65352f31)> bulk-label --label-id ...
+"""
+
+# standard library imports
+import os
+import shlex
+
+# seconds GET responses are cached for during a shell session
+CACHE_TTL = 30
+
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".trello_cli_history")
+
+# context keys and the command option each one fills in
+CONTEXT_OPTIONS = {
+    "board": "board_id",
+    "list": "list_id",
+    "card": "card_id",
+}
+
+HELP = """shell commands:
+  use board|list|card <id>   set the current board, list or card
+  context                    show the current board, list and card
+  help                       show this message and the trello_cli commands
+  exit, quit                 leave the shell
+any other line runs a trello_cli command e.g. get-board --board-id <id>"""
+
+
+class Shell:
+    """
+    Interactive shell for trello_cli commands
+
+    Attributes
+    ----------
+        context: dict
+            current board, list and card ids
+    """
+
+    def __init__(self, prog_name: str = "trello_cli") -> None:
+        # deferred so importing this module stays cheap
+        import typer
+        from trello_cli import cli, trello_api
+
+        self.prog_name = prog_name
+        self.context = {}
+        self.command = typer.main.get_command(cli.app)
+        if trello_api.response_cache is None:
+            trello_api.enable_cache(CACHE_TTL)
+
+    def prompt(self) -> str:
+        """
+        Returns the prompt showing the current context
+        """
+        current = ", ".join(f"{key} {value[:8]}" for key, value in self.context.items())
+        return f"{self.prog_name} ({current})> " if current else f"{self.prog_name}> "
+
+    def _with_context(self, args: list) -> list:
+        """
+        Adds the options of the current context that the command accepts
+        but that are missing from args
+        """
+        sub_command = self.command.commands.get(args[0]) if args else None
+        if sub_command is None:
+            return args
+
+        args = list(args)
+        for param in sub_command.params:
+            for key, option in CONTEXT_OPTIONS.items():
+                if param.name != option or key not in self.context:
+                    continue
+                if any(arg == opt or arg.startswith(opt + "=") for arg in args for opt in param.opts):
+                    continue
+                args += [param.opts[0], self.context[key]]
+        return args
+
+    def _update_context(self, args: list) -> None:
+        """
+        Makes the ids passed to a successful command the current context
+        """
+        options = {f"--{option.replace('_', '-')}": key for key, option in CONTEXT_OPTIONS.items()}
+        for index, arg in enumerate(args):
+            name, _, value = arg.partition("=")
+            if name not in options:
+                continue
+            if not value and index + 1 < len(args):
+                value = args[index + 1]
+            if value:
+                self.context[options[name]] = value
+
+    def execute(self, line: str) -> bool:
+        """
+        Runs one line of input
+
+        Returns
+        -------
+        running: bool
+            False once the user asked to leave the shell
+        """
+        # deferred so importing this module stays cheap
+        import click
+
+        try:
+            args = shlex.split(line)
+        except ValueError as err:
+            print(f"Error: {err}")
+            return True
+        if not args:
+            return True
+
+        if args[0] in ("exit", "quit"):
+            return False
+        if args[0] == "help":
+            print(HELP)
+            args = ["--help"]
+        elif args[0] == "context":
+            for key, value in self.context.items():
+                print(f"{key}: {value}")
+            return True
+        elif args[0] == "use":
+            if len(args) != 3 or args[1] not in CONTEXT_OPTIONS:
+                print("usage: use board|list|card <id>")
+            else:
+                self.context[args[1]] = args[2]
+            return True
+        elif args[0] == "shell":
+            print("already in the shell")
+            return True
+
+        args = self._with_context(args)
+        try:
+            exit_code = self.command.main(args, prog_name=self.prog_name, standalone_mode=False)
+        except click.exceptions.Abort:
+            print("Aborted!")
+        except click.ClickException as err:
+            err.show()
+        except Exception as err:
+            # a failing command must not end the session
+            print(f"Error: {type(err).__name__}: {err}")
+        else:
+            if not exit_code:
+                self._update_context(args)
+        return True
+
+    def run(self) -> None:
+        """
+        Reads and runs commands until exit or end of input
+        """
+        try:
+            import readline
+        except ImportError:
+            readline = None
+        if readline is not None and os.path.exists(HISTORY_FILE):
+            readline.read_history_file(HISTORY_FILE)
+
+        print("trello_cli shell, type help for the available commands")
+        try:
+            while True:
+                try:
+                    line = input(self.prompt())
+                except KeyboardInterrupt:
+                    print()
+                    continue
+                except EOFError:
+                    print()
+                    break
+                if not self.execute(line):
+                    break
+        finally:
+            if readline is not None:
+                readline.write_history_file(HISTORY_FILE)
@@ -0,0 +1,195 @@
+"""Module for the network statistics of the --stats option
+
+While a StatsCollector is enabled TrelloAPI.call_api records every request
+per endpoint, and the data layer and CLI time the phases of a command:
+
+    throttle   waiting for the rate limiter
+    decode     parsing json response bodies, response bodies are decoded
+               with decode() for this
+    entity     building trello objects from the decoded json
+    render     writing the command's output, paged or not
+
+When stats are disabled `collector` is None and the instrumented code only
+pays for that check.
+"""
+
+# standard library imports
+import math
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+# enabled collector of this process, None while stats are disabled
+collector = None
+
+# trello object ids in request paths, replaced by {id} to group endpoints
+_ID_PATTERN = re.compile(r"\b[0-9a-f]{24}\b")
+
+
+def endpoint_template(method: str, url: str) -> str:
+    """
+    Returns the endpoint of a request with ids and query strings removed
+    e.g. GET cards/{id}/actions
+    """
+    path = url.split("?", 1)[0].split("/1/", 1)[-1].strip("/")
+    path = re.sub(r"/{2,}", "/", path)
+    return f"{method} {_ID_PATTERN.sub('{id}', path)}"
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Returns the nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class EndpointStats:
+    """
+    Requests made to one endpoint
+
+    Attributes
+    ----------
+        latencies: list
+            seconds taken by each request that reached the API
+        bytes_in: int
+            bytes of the response bodies
+        bytes_out: int
+            bytes of the request urls and bodies
+        statuses: Counter
+            number of responses per status code, 'cached' and 'error'
+    """
+
+    __slots__ = ('latencies', 'bytes_in', 'bytes_out', 'statuses')
+
+    def __init__(self) -> None:
+        self.latencies = []
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.statuses = Counter()
+
+    @property
+    def count(self) -> int:
+        return sum(self.statuses.values())
+
+
+class StatsCollector:
+    """
+    Collects the requests and phase timings of a command
+
+    Attributes
+    ----------
+        endpoints: dict
+            EndpointStats per endpoint template
+        phases: Counter
+            seconds spent in each phase
+    """
+
+    def __init__(self) -> None:
+        self.endpoints = {}
+        self.phases = Counter()
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _endpoint(self, method: str, url: str) -> EndpointStats:
+        key = endpoint_template(method, url)
+        endpoint = self.endpoints.get(key)
+        if endpoint is None:
+            endpoint = self.endpoints[key] = EndpointStats()
+        return endpoint
+
+    def record_response(self, method: str, url: str, latency: float, response) -> None:
+        """Records a response of the API"""
+        request = getattr(response, 'request', None)
+        body = getattr(request, 'body', None) or b""
+        with self._lock:
+            endpoint = self._endpoint(method, url)
+            endpoint.latencies.append(latency)
+            endpoint.bytes_in += len(response.content or b"")
+            endpoint.bytes_out += len(getattr(request, 'url', None) or url) + len(body)
+            endpoint.statuses[response.status_code] += 1
+
+    def record_cached(self, method: str, url: str) -> None:
+        """Records a request answered by the response cache"""
+        with self._lock:
+            self._endpoint(method, url).statuses['cached'] += 1
+
+    def record_error(self, method: str, url: str, latency: float) -> None:
+        """Records a request that failed without a response"""
+        with self._lock:
+            endpoint = self._endpoint(method, url)
+            endpoint.latencies.append(latency)
+            endpoint.bytes_out += len(url)
+            endpoint.statuses['error'] += 1
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Adds seconds to a phase"""
+        with self._lock:
+            self.phases[name] += seconds
+
+    @contextmanager
+    def timer(self, name: str):
+        """Context manager adding the time spent in its block to a phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def report(self):
+        """Returns the rich renderable of the collected statistics"""
+        from rich.console import Group
+        from rich.table import Table
+
+        requests = Table(title="requests", title_justify="left")
+        for column in ("endpoint", "count", "p50 ms", "p95 ms", "max ms", "bytes in", "bytes out", "statuses"):
+            text_column = column in ("endpoint", "statuses")
+            requests.add_column(column, justify="left" if text_column else "right", no_wrap=text_column)
+        for key, endpoint in sorted(self.endpoints.items()):
+            latencies = sorted(endpoint.latencies)
+            statuses = ", ".join(f"{status}: {count}" for status, count in sorted(endpoint.statuses.items(),
+                                                                                  key=lambda item: str(item[0])))
+            requests.add_row(
+                key, str(endpoint.count),
+                f"{percentile(latencies, 0.5) * 1000:.0f}",
+                f"{percentile(latencies, 0.95) * 1000:.0f}",
+                f"{(latencies[-1] if latencies else 0) * 1000:.0f}",
+                str(endpoint.bytes_in), str(endpoint.bytes_out), statuses,
+            )
+
+        phases = Table(title="time", title_justify="left")
+        phases.add_column("phase")
+        phases.add_column("ms", justify="right")
+        for name in ("throttle", "decode", "entity", "render"):
+            phases.add_row(name, f"{self.phases[name] * 1000:.1f}")
+        phases.add_row("total", f"{(time.perf_counter() - self.started) * 1000:.1f}")
+        return Group(requests, phases)
+
+
+def decode(response):
+    """Returns the decoded json body of a response, timed as the decode phase"""
+    if collector is None:
+        return response.json()
+    with collector.timer("decode"):
+        return response.json()
+
+
+def enable_stats() -> StatsCollector:
+    """Starts collecting statistics and returns the collector"""
+    global collector
+    collector = StatsCollector()
+    return collector
+
+
+def disable_stats() -> None:
+    """Stops collecting statistics"""
+    global collector
+    collector = None
+
+
+def phase(name: str):
+    """Returns a context manager timing its block as a phase, a no-op while stats are disabled"""
+    if collector is None:
+        return nullcontext()
+    return collector.timer(name)
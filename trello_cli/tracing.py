@@ -0,0 +1,241 @@
+"""Module for tracing a command with the --trace option
+
+Spans are opened by the cli command, the TrelloService methods, the entity
+getters of trello_data and TrelloAPI.call_api, so a trace shows which
+service method requested which endpoints, in what order and how concurrent
+requests overlapped. The current span is kept in a contextvar and carried
+into worker threads with propagate().
+
+The finished spans are written to a local file in the OTLP/JSON format of
+OpenTelemetry, which trace viewers and collectors can import, e.g.
+
+    python3 -m trello_cli --trace trace.json get-board --board-id ...
+
+When tracing is disabled `tracer` is None and traced code only pays for
+that check.
+"""
+
+# standard library imports
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# enabled tracer of this process, None while tracing is disabled
+tracer = None
+
+# span the code running in the current context belongs to
+_current_span = contextvars.ContextVar("trello_cli_span", default=None)
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """
+    A timed operation of a trace
+
+    Attributes
+    ----------
+        name: str
+            name of the operation e.g. TrelloService.get_board
+        trace_id: str
+            hex id shared by every span of a command
+        span_id: str
+            hex id of the span
+        parent_id: str
+            span_id of the enclosing span, None for the root span
+        attributes: dict
+            str, bool, int or float values describing the operation
+    """
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'kind', 'start', 'end',
+                 'attributes', 'status', 'message')
+
+    def __init__(self, name, trace_id, parent_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_OK
+        self.message = ""
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.message = message
+
+    def to_otlp(self) -> dict:
+        """Returns the span as an OTLP/JSON span"""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or self.start),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': self.status, 'message': self.message} if self.message else {'code': self.status},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_value(value) -> dict:
+    """Returns an attribute value in the OTLP/JSON encoding"""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Tracer:
+    """
+    Collects the finished spans of a command
+
+    Attributes
+    ----------
+        trace_id: str
+            hex id of the trace
+        spans: list
+            finished spans
+    """
+
+    def __init__(self) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def finish(self, span: Span) -> None:
+        span.end = time.time_ns()
+        with self._lock:
+            self.spans.append(span)
+
+    def to_otlp(self) -> dict:
+        """Returns the finished spans as an OTLP/JSON export request"""
+        from trello_cli import __app_name__, __version__
+
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': __app_name__}},
+                {'key': 'service.version', 'value': {'stringValue': __version__}},
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': 'trello_cli.tracing'},
+                'spans': [span.to_otlp() for span in sorted(self.spans, key=lambda span: span.start)],
+            }],
+        }]}
+
+    def export(self, path: str) -> None:
+        """Writes the finished spans to path as OTLP/JSON"""
+        with open(path, "w") as output:
+            json.dump(self.to_otlp(), output)
+
+
+def enable_tracing() -> Tracer:
+    """Starts tracing and returns the tracer"""
+    global tracer
+    tracer = Tracer()
+    return tracer
+
+
+def disable_tracing() -> None:
+    """Stops tracing"""
+    global tracer
+    tracer = None
+
+
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """
+    Opens a span as the current span, it is closed by end_span()
+
+    Returns
+    -------
+    span: (Span, Token)
+        the span and the token restoring the previous current span,
+        None while tracing is disabled
+    """
+    if tracer is None:
+        return None
+    parent = _current_span.get()
+    span = Span(name, tracer.trace_id, parent.span_id if parent else None, kind, attributes)
+    return span, _current_span.set(span)
+
+
+def end_span(started, error: BaseException = None) -> None:
+    """Closes a span opened by start_span()"""
+    if started is None:
+        return
+    span, token = started
+    if error is not None:
+        span.set_error(f"{type(error).__name__}: {error}")
+    _current_span.reset(token)
+    if tracer is not None:
+        tracer.finish(span)
+
+
+@contextmanager
+def _span(name, kind, attributes):
+    started = start_span(name, kind, **attributes)
+    try:
+        yield started[0]
+    except BaseException as err:
+        end_span(started, err)
+        raise
+    else:
+        end_span(started)
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Returns a context manager timing its block as a span, yielding None while tracing is disabled"""
+    if tracer is None:
+        return nullcontext()
+    return _span(name, kind, attributes)
+
+
+def traced(func):
+    """Decorator opening a span named after the function for each call"""
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if tracer is None:
+            return func(*args, **kwargs)
+        with _span(name, SPAN_KIND_INTERNAL, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def propagate(func):
+    """
+    Returns func running in a copy of the caller's context, so that spans
+    opened in a worker thread are children of the caller's span
+    """
+    if tracer is None:
+        return func
+    context = contextvars.copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
@@ -3,23 +3,20 @@ from __future__ import annotations
 
 # local imports
 from trello_cli import SUCCESS, TRELLO_AUTHENTICATION_ERROR
-
-# 3rd party imports
-from requests_oauthlib import OAuth1
-import requests
-from dotenv import find_dotenv, set_key, load_dotenv
+from trello_cli import stats, tracing
+from trello_cli.hooks import HookRegistry, RequestEvent, redact_params, redact_url
 
 # standard library imports
 from enum import Enum
 import json
 import os
 import logging
+import threading
+import time
+from collections import deque
 
-# set logging
-logging.basicConfig(level=logging.INFO)
-
-# load environment vars
-load_dotenv()
+# requests and requests_oauthlib are imported where they are used so that
+# importing this module, e.g. for `trello_cli --help`, stays cheap
 
 
 class RequestType(Enum):
@@ -32,6 +29,143 @@ class RequestType(Enum):
     DELETE = "DELETE"
 
 
+class RateLimiter:
+    """
+    Thread-safe sliding window limiter used to pace calls to the Trello API
+
+    Trello allows 100 requests per 10 second window for each token, calls
+    beyond that are answered with a 429. The limiter blocks the calling
+    thread until a slot in the window is free.
+
+    Attributes
+    ----------
+        max_calls: int
+            maximum number of calls allowed within a window, unlimited when None
+        period: float
+            length of the window in seconds
+    """
+
+    def __init__(self, max_calls: int, period: float) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a call may be made without exceeding the limit
+        """
+        if self.max_calls is None:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+# shared by every TrelloAPI instance as the limit applies per token
+rate_limiter = RateLimiter(max_calls=100, period=10)
+
+DEFAULT_BASE_URL = "https://api.trello.com/1/"
+
+
+class ResponseCache:
+    """
+    Thread-safe time based cache for GET responses
+
+    Used by long-running processes (see trello_cli/daemon.py) so repeated
+    reads are served from memory. Any write clears the cache.
+
+    Attributes
+    ----------
+        ttl: float
+            number of seconds a response stays valid
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint: str, payload) -> str:
+        """
+        Builds the cache key of a request
+        """
+        return endpoint + json.dumps(payload, sort_keys=True, default=str)
+
+    def get(self, key: str):
+        """
+        Returns the cached response for key or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key: str, response) -> None:
+        """
+        Caches a response under key
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+
+    def clear(self) -> None:
+        """
+        Drops every cached response
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+# disabled unless enable_cache is called
+response_cache = None
+
+# connection pool shared by every TrelloAPI instance
+_session = None
+
+
+def enable_cache(ttl: float = 30) -> None:
+    """
+    Caches GET responses in memory for ttl seconds
+    """
+    global response_cache
+    response_cache = ResponseCache(ttl)
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the requests session shared by all API calls of the process
+
+    Reusing the session keeps TLS connections to Trello alive between calls.
+    """
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+
+def use_session(session) -> None:
+    """
+    Replaces the session shared by all API calls of the process, e.g. with
+    the recording or replaying sessions of trello_cli/cassette.py; None
+    goes back to a new requests session
+    """
+    global _session
+    _session = session
+
+
 class TrelloAPI:
     """
     Class to make POST nad GET requests to Trello API
@@ -44,7 +178,10 @@ class TrelloAPI:
 
     """
 
-    def __init__(self, api_key, api_secret, api_token, oauth_token, oauth_secret) -> None:
+    # request lifecycle callbacks shared by every TrelloAPI object, see trello_cli/hooks.py
+    hooks = HookRegistry()
+
+    def __init__(self, api_key, api_secret, api_token, oauth_token, oauth_secret, base_url=None) -> None:
         """
         Initializes the TrelloAPI class for making requests to the Trello API
 
@@ -65,6 +202,9 @@ class TrelloAPI:
             trello oauth token (a 64 character string)
         oauth_secret: str
             trello oauth secret (a 64 character string)
+        base_url: str
+            root url of the API, e.g. a local stand-in server for benchmarks,
+            https://api.trello.com/1/ by default
 
         """
         self.api_key = api_key
@@ -75,6 +215,7 @@ class TrelloAPI:
 
         # client key for oauth1 session
         if self.api_key and self.api_secret and self.oauth_token and self.oauth_secret:
+            from requests_oauthlib import OAuth1
             self.oauth = OAuth1(
                 client_key=self.api_key,
                 client_secret=self.api_secret,
@@ -88,7 +229,24 @@ class TrelloAPI:
         self.headers = {
             "Accept": "application/json"
         }
-        self.base_url = "https://api.trello.com/1/"
+        self.base_url = (base_url.rstrip("/") + "/") if base_url else DEFAULT_BASE_URL
+
+    @classmethod
+    def from_settings(cls, settings) -> TrelloAPI:
+        """
+        Creates a TrelloAPI object from the user's settings
+
+        Parameters
+        ----------
+        settings: Settings
+            settings parsed by trello_cli/settings.py
+        """
+        return cls(api_key=settings.api_key,
+                   api_secret=settings.api_secret,
+                   api_token=settings.api_token,
+                   oauth_token=settings.oauth_token,
+                   oauth_secret=settings.oauth_secret,
+                   base_url=settings.base_url)
 
     def call_api(self, request_type: str, endpoint: str,
                  payload: dict | str = None) -> str:
@@ -109,16 +267,81 @@ class TrelloAPI:
         response: str
             json response from the API call
         """
+        if tracing.tracer is None:
+            return self._request(request_type, endpoint, payload)
+
+        template = stats.endpoint_template(request_type, endpoint)
+        with tracing.span(template, tracing.SPAN_KIND_CLIENT, **{
+            'http.request.method': request_type,
+            'url.template': template.split(" ", 1)[1],
+        }) as span:
+            response = self._request(request_type, endpoint, payload)
+            if response is None:
+                span.set_error("request failed")
+            elif isinstance(response, str):
+                span.set_attribute('http.response.status_code', 401)
+                span.set_error("authorization error")
+            else:
+                span.set_attribute('http.response.status_code', response.status_code)
+                span.set_attribute('http.response.body.size', len(response.content or b""))
+                if response.status_code >= 400:
+                    span.set_error(f"HTTP {response.status_code}")
+            return response
+
+    def _request(self, request_type: str, endpoint: str, payload: dict | str = None):
+        """
+        Sends a request of call_api through the response cache, rate limiter
+        and shared session
+        """
+        import requests
 
+        collector = stats.collector
+        cache = response_cache
+        if cache is not None:
+            if request_type == "GET":
+                cache_key = cache.key(endpoint, payload)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    if collector is not None:
+                        collector.record_cached(request_type, endpoint)
+                    return cached
+            else:
+                cache.clear()
+
+        # checked once so that a hook registered mid-request does not see half of it
+        hooks = self.hooks if self.hooks.active else None
+        if hooks is not None:
+            event = RequestEvent(request_type, redact_url(endpoint), redact_params(payload))
+            hooks.emit("before_request", event)
+
+        response = ""
+        error = None
         try:
-            response = ""
+            if collector is None:
+                rate_limiter.acquire()
+            else:
+                with collector.timer("throttle"):
+                    rate_limiter.acquire()
+            started = time.perf_counter()
+            session = get_session()
             if request_type == "GET":
-                response = requests.get(endpoint, timeout=30, headers=self.headers,
-                                        params=payload, auth=self.oauth)
+                response = session.get(endpoint, timeout=30, headers=self.headers,
+                                       params=payload, auth=self.oauth)
             elif request_type == "POST":
-                response = requests.post(endpoint, self.headers, headers=self.headers, timeout=30,
-                                         params=payload)
+                response = session.post(endpoint, self.headers, headers=self.headers, timeout=30,
+                                        params=payload)
+            elif request_type == "PUT":
+                response = session.put(endpoint, headers=self.headers, timeout=30,
+                                       params=payload)
+            if collector is not None:
+                collector.record_response(request_type, endpoint, time.perf_counter() - started, response)
+            if hooks is not None:
+                event = event._replace(elapsed=time.perf_counter() - started, status_code=response.status_code,
+                                       response_size=len(response.content or b""))
+                hooks.emit("after_response", event)
             if response.status_code in (200, 201):
+                if cache is not None and request_type == "GET":
+                    cache.set(cache_key, response)
                 return response
             elif response.status_code == 401:
                 return json.dumps({"ERROR": "Authorization Error. Please check API Key"})
@@ -128,12 +351,22 @@ class TrelloAPI:
             response.raise_for_status()
         except requests.exceptions.HTTPError as errh:
             logging.error(errh)
+            error = errh
         except requests.exceptions.ConnectionError as errc:
             logging.error(errc)
+            error = errc
         except requests.exceptions.Timeout as errt:
             logging.error(errt)
+            error = errt
         except requests.exceptions.RequestException as err:
             logging.error(err)
+            error = err
+        if collector is not None and response == "":
+            collector.record_error(request_type, endpoint, time.perf_counter() - started)
+        if hooks is not None:
+            if response == "":
+                event = event._replace(elapsed=time.perf_counter() - started)
+            hooks.emit("on_error", event._replace(error=error))
 
     def get_all_boards(self) -> str:
         """
@@ -222,16 +455,29 @@ class TrelloAPI:
 
         return response
 
-    def create_card(self, name: str, id_list: str) -> str:
+    def create_card(self, name: str, id_list: str, desc: str = None, id_labels: list = None,
+                    pos: str | float = None, due: str = None, id_members: list = None) -> str:
         """
         Request for creating a card in a given list
 
+        Every given field is sent in the same request.
+
         Parameters
         ----------
         name: str
             name of the card to create
         id_list: str
             id of the list to create the card in
+        desc: str
+            description of the card
+        id_labels: list
+            ids of the labels to add to the card
+        pos: str | float
+            position of the card in the list, "top", "bottom" or a positive number
+        due: str
+            due date of the card e.g. 2023-11-01T12:00:00Z
+        id_members: list
+            ids of the members to add to the card
 
         Returns
         -------
@@ -240,22 +486,36 @@ class TrelloAPI:
         """
         create_card_url = f"{self.base_url}/cards/"
 
-        if isinstance(name, str) and isinstance(id_list, str):
-            payload = {
-                'name': name,
-                'idList': id_list,
-                'key': self.api_key,
-                'token': self.api_token
-            }
-            response = self.call_api(request_type=RequestType.POST.value,
-                                     endpoint=create_card_url,
-                                     payload=payload)
-        else:
+        if not (isinstance(name, str) and isinstance(id_list, str)):
             raise ValueError("ERROR - Parameters 'name' and 'list_id' should be of type str")
+        if not all(isinstance(value, str) for value in (desc, due) if value is not None):
+            raise ValueError("ERROR - Parameters 'desc' and 'due' should be of type str")
+        for ids in (id_labels, id_members):
+            if ids is not None and not (isinstance(ids, (list, tuple)) and all(isinstance(i, str) for i in ids)):
+                raise ValueError("ERROR - Parameters 'id_labels' and 'id_members' should be lists of str")
+        if pos is not None and pos not in ("top", "bottom") and \
+                not (isinstance(pos, (int, float)) and not isinstance(pos, bool) and pos > 0):
+            raise ValueError("ERROR - Parameter 'pos' should be 'top', 'bottom' or a positive number")
+
+        payload = {
+            'name': name,
+            'idList': id_list,
+            'key': self.api_key,
+            'token': self.api_token
+        }
+        for field, value in (('desc', desc), ('pos', pos), ('due', due)):
+            if value is not None:
+                payload[field] = value
+        for field, ids in (('idLabels', id_labels), ('idMembers', id_members)):
+            if ids:
+                payload[field] = ",".join(ids)
+        response = self.call_api(request_type=RequestType.POST.value,
+                                 endpoint=create_card_url,
+                                 payload=payload)
 
         return response
 
-    def get_all_cards(self, list_id: str) -> str:
+    def get_all_cards(self, list_id: str, limit: int = None, before: str = None) -> str:
         """
         Request for retrieving all the cards from a given trello list
 
@@ -263,6 +523,10 @@ class TrelloAPI:
         ----------
         list_id: str
             id of the list to retrieve cards from
+        limit: int
+            maximum number of cards to return, up to 1000
+        before: str
+            only returns cards created before the card with this id
 
         Returns
         -------
@@ -273,6 +537,10 @@ class TrelloAPI:
 
         if isinstance(list_id, str):
             payload = {'fields': ['id', 'name', 'labels', 'desc', 'badges']}
+            if limit is not None:
+                payload['limit'] = limit
+            if before is not None:
+                payload['before'] = before
             response = self.call_api(request_type=RequestType.GET.value,
                                      endpoint=get_cards_url,
                                      payload=payload)
@@ -280,6 +548,39 @@ class TrelloAPI:
             raise ValueError("ERROR - Parameter 'list_id' should be of type str")
         return response
 
+    def get_board_cards(self, board_id: str, limit: int = None, before: str = None) -> str:
+        """
+        Request for retrieving all the open cards from a given trello board
+
+        Parameters
+        ----------
+        board_id: str
+            id of the board to retrieve cards from
+        limit: int
+            maximum number of cards to return, up to 1000
+        before: str
+            only returns cards created before the card with this id
+
+        Returns
+        -------
+        response: str
+            response containing the cards from the given board
+        """
+        get_cards_url = f"{self.base_url}/boards/{board_id}/cards"
+
+        if isinstance(board_id, str):
+            payload = {'fields': ['id', 'name', 'labels', 'desc', 'badges', 'idList']}
+            if limit is not None:
+                payload['limit'] = limit
+            if before is not None:
+                payload['before'] = before
+            response = self.call_api(request_type=RequestType.GET.value,
+                                     endpoint=get_cards_url,
+                                     payload=payload)
+        else:
+            raise ValueError("ERROR - Parameter 'board_id' should be of type str")
+        return response
+
     def get_card(self, card_id: str) -> str:
         """
         Request for retrieving a specific card from the user's trello account
@@ -304,18 +605,24 @@ class TrelloAPI:
             raise ValueError("ERROR - Parameter 'card_id' should be of type str")
         return response
 
-    def get_actions(self, card_id: str) -> str:
+    def get_actions(self, card_id: str, limit: int = None, before: str = None) -> str:
         """
         Request for retrieving all the actions from a given trello card.
 
         The actions are filtered so that only a commentCard action type
         is returned, containing the comment text and any metadata about the
-        comment such as the author and date created.
+        comment such as the author and date created. Actions are returned
+        newest first, a page at a time.
 
         Parameters
         ----------
         card_id: str
             id of the card to retrieve actions from
+        limit: int
+            maximum number of actions to return (Trello allows up to 1000,
+            the default is 50)
+        before: str
+            only returns actions older than this action id or date
 
         Returns
         -------
@@ -328,12 +635,50 @@ class TrelloAPI:
             payload = {
                 'filter': 'commentCard',
             }
+            if limit is not None:
+                payload['limit'] = limit
+            if before is not None:
+                payload['before'] = before
             response = self.call_api(request_type=RequestType.GET.value,
                                      endpoint=get_actions_url, payload=payload)
         else:
             raise ValueError("ERROR - Parameter 'card_id' should be of type str")
         return response
 
+    def get_board_actions(self, board_id: str, limit: int = None, before: str = None) -> str:
+        """
+        Request for retrieving the comments of every card of a given trello
+        board, as commentCard actions returned newest first, a page at a time
+
+        Parameters
+        ----------
+        board_id: str
+            id of the board to retrieve actions from
+        limit: int
+            maximum number of actions to return, up to 1000
+        before: str
+            only returns actions older than this action id or date
+
+        Returns
+        -------
+        response: str
+            response containing the actions from the given board
+        """
+        get_actions_url = f"{self.base_url}/boards/{board_id}/actions"
+        if isinstance(board_id, str):
+            payload = {
+                'filter': 'commentCard',
+            }
+            if limit is not None:
+                payload['limit'] = limit
+            if before is not None:
+                payload['before'] = before
+            response = self.call_api(request_type=RequestType.GET.value,
+                                     endpoint=get_actions_url, payload=payload)
+        else:
+            raise ValueError("ERROR - Parameter 'board_id' should be of type str")
+        return response
+
     def create_comment(self, card_id: str, text: str) -> str:
         """
         Request for creating a comment on a given trello card
@@ -425,3 +770,51 @@ class TrelloAPI:
             raise ValueError("ERROR - Parameters 'card_id' and 'label_id' should be of type str")
         return response
 
+    def update_card(self, card_id: str, fields: dict) -> str:
+        """
+        Request for updating the fields of a given trello card in a single PUT
+
+        Parameters
+        ----------
+        card_id: str
+            id of the card to update
+        fields: dict
+            card fields to set e.g. {'idLabels': '<id>,<id>'}
+
+        Returns
+        -------
+        response: str
+            response containing the updated card
+        """
+        update_card_url = f"{self.base_url}/cards/{card_id}"
+
+        if isinstance(card_id, str) and isinstance(fields, dict):
+            payload = {
+                **fields,
+                'key': self.api_key,
+                'token': self.api_token,
+            }
+            response = self.call_api(request_type=RequestType.PUT.value,
+                                     endpoint=update_card_url,
+                                     payload=payload)
+        else:
+            raise ValueError("ERROR - Parameters 'card_id' should be of type str and 'fields' of type dict")
+        return response
+
+    def set_card_labels(self, card_id: str, label_ids: list) -> str:
+        """
+        Request for replacing the labels of a given trello card
+
+        Parameters
+        ----------
+        card_id: str
+            id of the card to set the labels on
+        label_ids: list
+            ids of every label the card should carry
+
+        Returns
+        -------
+        response: str
+            response containing the updated card
+        """
+        return self.update_card(card_id, {'idLabels': ','.join(label_ids)})
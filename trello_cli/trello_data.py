@@ -1,35 +1,161 @@
 """Module for representing trello data"""
 
-# third party imports
-from dotenv import find_dotenv, set_key, load_dotenv
-
 # local imports
-from trello_cli.models import *
 from trello_cli.trello_api import TrelloAPI
+from trello_cli.settings import get_settings
+from trello_cli import stats
+from trello_cli.tracing import propagate, span, traced
+
 
 # standard library imports
-import os
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from weakref import WeakValueDictionary
+
+# largest page Trello returns for paginated requests
+MAX_PAGE_SIZE = 1000
+
+# (settings, client) pair shared by every trello object
+_client = None
+
+# label dicts shared by the cards carrying the same label, an entry is
+# dropped once no card holds its label any more
+_labels = WeakValueDictionary()
+
+
+def _shared_client() -> TrelloAPI:
+    """Returns the TrelloAPI object used by all trello objects
+
+    A new client is created when the settings of the process change
+    """
+    global _client
+    settings = get_settings()
+    if _client is None or _client[0] is not settings:
+        _client = (settings, TrelloAPI.from_settings(settings))
+    return _client[1]
+
+
+class _SharedLabel(dict):
+    """Read-only label dict shared between cards"""
+
+    __slots__ = ('__weakref__',)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("ERROR - Labels shared between cards are read-only")
 
-# load environment vars
-load_dotenv()
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+
+def _intern_labels(labels: list) -> list:
+    """Replaces label dicts by an equal read-only dict shared between cards
+
+    Boards reuse a handful of labels across all of their cards, so sharing
+    the dicts keeps a card from holding its own copy of each label. The
+    table only holds labels weakly, long-running processes such as the
+    daemon do not accumulate the labels of every board they have read.
+    """
+    interned = []
+    for label in labels:
+        try:
+            key = tuple(label.items())
+            shared = _labels.get(key)
+            if shared is None:
+                shared = _labels.setdefault(key, _SharedLabel(label))
+            interned.append(shared)
+        except TypeError:
+            interned.append(label)
+    return interned
+
+
+def _iter_pages(fetch_page, page_size=MAX_PAGE_SIZE, prefetch=False):
+    """Yields the pages of a paginated request
+
+    Trello ids grow with the creation time of an object, the before cursor
+    of the next page is the smallest id of the current page.
+
+    Parameters
+    ----------
+        fetch_page: callable
+            makes the request for a page given limit and before keyword
+            arguments
+        page_size: int
+            number of items requested per page
+        prefetch: bool
+            requests and decodes the next page in a background thread while
+            the current page is consumed
+
+    Raises
+    ------
+        ValueError
+            if a page is not answered with 200
+    """
+
+    def fetch(before):
+        with span("page", **{'page.size': page_size, 'page.before': before or ""}):
+            response = fetch_page(limit=page_size, before=before)
+            if getattr(response, 'status_code', None) != 200:
+                raise ValueError(f"ERROR - Could not fetch the page before {before}" if before
+                                 else "ERROR - Could not fetch the first page")
+            return stats.decode(response)
+
+    def next_cursor(page):
+        return min(item['id'] for item in page) if len(page) >= page_size else None
+
+    if not prefetch:
+        page = fetch(None)
+        while True:
+            if page:
+                yield page
+            before = next_cursor(page)
+            if before is None:
+                return
+            page = fetch(before)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        fetch = propagate(fetch)
+        pending = executor.submit(fetch, None)
+        while True:
+            page = pending.result()
+            before = next_cursor(page)
+            if before is not None:
+                pending = executor.submit(fetch, before)
+            if page:
+                yield page
+            if before is None:
+                return
+
+
+def _build(entity_class, items) -> list:
+    """Builds trello objects from json dicts, timed as the entity phase of --stats"""
+    with stats.phase("entity"):
+        return [entity_class.from_json(item) for item in items]
+
+
+def _parse_date(date: str) -> datetime:
+    """Parses a Trello timestamp e.g. 2023-10-22T10:00:00.000Z"""
+    return datetime.fromisoformat(date.replace('Z', '+00:00'))
 
 
 class TrelloBase(object):
     """
     Base class for trello objects
 
+    Trello objects define __slots__ so that large boards can be held in
+    memory, they share one TrelloAPI client instead of holding their own.
+
     Attributes
         client (TrelloAPI): TrelloAPI object
             fetches attributes for trello objects from the trello api
     """
 
-    def __init__(self):
-        self.client = TrelloAPI(
-            api_key=os.getenv("TRELLO_API_KEY"),
-            api_secret=os.getenv("TRELLO_API_SECRET"),
-            api_token=os.getenv("TRELLO_API_TOKEN"),
-            oauth_token=os.getenv("TRELLO_OAUTH_TOKEN"),
-            oauth_secret=os.getenv("TRELLO_OAUTH_SECRET"))
+    __slots__ = ()
+
+    @property
+    def client(self) -> TrelloAPI:
+        return _shared_client()
 
 
 class Comment(TrelloBase):
@@ -52,8 +178,9 @@ class Comment(TrelloBase):
         __repr__(self): returns a string representation of a comment object
     """
 
+    __slots__ = ('comment_id', 'data', 'member_creator', 'date')
+
     def __init__(self, comment_id, data, member_creator, date):
-        super().__init__()
         self.comment_id = comment_id
         self.data = data
         self.member_creator = member_creator
@@ -74,6 +201,13 @@ class Comment(TrelloBase):
                    member_creator=data['memberCreator']['fullName'],
                    date=data['date'])
 
+    @property
+    def timestamp(self) -> datetime:
+        """
+        Returns the date the comment was created as a datetime
+        """
+        return _parse_date(self.date)
+
     def __repr__(self):
         """
         Creates a string representation of a comment object
@@ -109,8 +243,9 @@ class Label(TrelloBase):
 
     """
 
+    __slots__ = ('label_id', 'name', 'color', 'board_id')
+
     def __init__(self, label_id, name, color, board_id):
-        super().__init__()
         self.label_id = label_id
         self.name = name
         self.color = color
@@ -170,17 +305,20 @@ class Card(TrelloBase):
     Methods
     -------
         from_json(cls, data): creates a card object from json data
+        iter_comments(self, page_size): lazily yields every comment on a card
         get_comments(self): returns a list of comments on a card in reverse
         chronological order
+        get_latest_comments(self, count): returns the latest comments on a card
         __repr__(self): returns a string representation of a card object
 
     """
 
+    __slots__ = ('name', 'card_id', 'labels', 'desc', 'comments')
+
     def __init__(self, name, card_id, labels, desc, comments):
-        super().__init__()
         self.name = name
         self.card_id = card_id
-        self.labels = labels
+        self.labels = _intern_labels(labels)
         self.desc = desc
         self.comments = comments
 
@@ -211,6 +349,22 @@ class Card(TrelloBase):
             f' (id = {self.card_id}, name={self.name}, labels={self.labels})'
         )
 
+    def iter_comments(self, page_size=MAX_PAGE_SIZE):
+        """
+        Lazily yields every comment on a card, newest first
+
+        Comments are fetched a page at a time, the next page is only
+        requested once the previous one has been consumed.
+
+        Parameters
+        ----------
+            page_size: int
+                number of comments requested per page
+        """
+        for page in _iter_pages(partial(self.client.get_actions, self.card_id), page_size):
+            yield from _build(Comment, page)
+
+    @traced
     def get_comments(self):
         """
         Returns a list of comments on a card in reverse chronological order
@@ -218,14 +372,35 @@ class Card(TrelloBase):
         Returns
         -------
             comments: list
-                list of comments on a card in reverse chronological order
+                every comment on a card in reverse chronological order
 
         """
-        json_payload = self.client.get_actions(self.card_id)
-        comments = [Comment.from_json(comment) for comment in json_payload.json()]
-        comments = sorted(comments, key=lambda comment: comment.date, reverse=True)
+        comments = sorted(self.iter_comments(), key=lambda comment: comment.timestamp, reverse=True)
         return comments
 
+    @traced
+    def get_latest_comments(self, count):
+        """
+        Returns the latest comments on a card in reverse chronological order
+
+        Only as many comments as needed are requested.
+
+        Parameters
+        ----------
+            count: int
+                number of comments to return
+
+        Returns
+        -------
+            comments: list
+                the latest count comments on a card
+        """
+        if count <= 0:
+            return []
+        comments = islice(self.iter_comments(page_size=min(count, MAX_PAGE_SIZE)), count)
+        return heapq.nlargest(count, comments, key=lambda comment: comment.timestamp)
+
+    @traced
     def get_labels(self):
         """
         Returns a list of labels on a card in reverse chronological order
@@ -239,6 +414,84 @@ class Card(TrelloBase):
         return Label.from_json_list(self.labels)
 
 
+def _json_field(*path):
+    """Returns a read-only property looking up path in a view's json dict"""
+
+    def getter(self):
+        value = self._data
+        for key in path:
+            value = value[key]
+        return value
+
+    return property(getter)
+
+
+class CardView(TrelloBase):
+    """
+    Read-only view of a trello card backed by its decoded json dict
+
+    Unlike Card.from_json nothing is copied when the view is created, each
+    attribute is looked up in the json dict when it is accessed and the
+    Label objects of get_labels are only built on the first call. Listing
+    commands that render a few fields of many cards use views.
+
+    A view does not subclass Card, whose slots it would carry unused, the
+    comment methods and __repr__ are shared with Card instead.
+
+    Attributes
+    ----------
+        same as Card
+
+    Methods
+    -------
+        same as Card
+    """
+
+    __slots__ = ('_data', '_labels')
+
+    name = _json_field('name')
+    card_id = _json_field('id')
+    labels = _json_field('labels')
+    desc = _json_field('desc')
+    comments = _json_field('badges', 'comments')
+
+    __repr__ = Card.__repr__
+    iter_comments = Card.iter_comments
+    get_comments = Card.get_comments
+    get_latest_comments = Card.get_latest_comments
+
+    def __init__(self, data):
+        self._data = data
+        self._labels = None
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Creates a card view of json data
+
+        Parameters
+        ----------
+            data: dict
+                json dict containing data for a card object
+
+        """
+        return cls(data)
+
+    @traced
+    def get_labels(self):
+        """
+        Returns the labels on a card, built on the first call
+
+        Returns
+        -------
+            labels: list
+                list of labels on a card
+        """
+        if self._labels is None:
+            self._labels = Label.from_json_list(self.labels)
+        return self._labels
+
+
 class TrelloList(TrelloBase):
     """
     Class representing a Trello List
@@ -253,13 +506,15 @@ class TrelloList(TrelloBase):
     Methods
     -------
         from_json(cls, data): creates a TrelloList object from json data
-        get_all_cards(self): returns a list of cards associated with the list
+        iter_cards(self, page_size, view, prefetch): lazily yields the cards of the list
+        get_all_cards(self, view): returns a list of cards associated with the list
         __repr__(self): returns a string representation of a TrelloList object
 
     """
 
+    __slots__ = ('list_id', 'name')
+
     def __init__(self, list_id, name):
-        super().__init__()
         self.list_id = list_id
         self.name = name
 
@@ -284,12 +539,37 @@ class TrelloList(TrelloBase):
             f'(id= {self.list_id}, name={self.name})'
         )
 
-    def get_all_cards(self):
+    def iter_cards(self, page_size=MAX_PAGE_SIZE, view=False, prefetch=True):
+        """
+        Lazily yields the cards of a list a page at a time
+
+        Parameters
+        ----------
+            page_size: int
+                number of cards requested per page
+            view: bool
+                yields lazy CardView objects instead of Card objects
+            prefetch: bool
+                fetches the next page while the current one is consumed
+        """
+        card_class = CardView if view else Card
+        fetch_page = partial(self.client.get_all_cards, self.list_id)
+        for page in _iter_pages(fetch_page, page_size, prefetch):
+            yield from _build(card_class, page)
+
+    @traced
+    def get_all_cards(self, view=False):
         """
         Returns all cards associated with a list
+
+        Parameters
+        ----------
+            view: bool
+                returns lazy CardView objects instead of Card objects
         """
+        card_class = CardView if view else Card
         json_payload = self.client.get_all_cards(self.list_id)
-        cards = [Card.from_json(card) for card in json_payload.json()]
+        cards = _build(card_class, stats.decode(json_payload))
         return cards
 
 
@@ -308,13 +588,15 @@ class Board(TrelloBase):
     -------
         from_json(cls, data): creates a Board object from json data
         get_all_lists(self): returns a list of TrelloLists associated with a board
+        iter_cards(self, page_size, view, prefetch): lazily yields the open cards of a board
         get_labels(self): returns a list of labels associated with a board
         __repr__(self): returns a string representation of a Board object
 
     """
 
+    __slots__ = ('board_id', 'name')
+
     def __init__(self, board_id, name):
-        super().__init__()
         self.board_id = board_id
         self.name = name
 
@@ -338,19 +620,41 @@ class Board(TrelloBase):
         """
         return f'(id= {self.board_id}, name={self.name})'
 
+    @traced
     def get_all_lists(self):
         """
         Returns all lists associated with a board
         """
 
         json_payload = self.client.get_all_lists(self.board_id)
-        trello_lists = [TrelloList.from_json(trello_list) for trello_list in json_payload.json()]
+        trello_lists = _build(TrelloList, stats.decode(json_payload))
         return trello_lists
 
+    def iter_cards(self, page_size=MAX_PAGE_SIZE, view=False, prefetch=True):
+        """
+        Lazily yields the open cards of a board a page at a time
+
+        Parameters
+        ----------
+            page_size: int
+                number of cards requested per page
+            view: bool
+                yields lazy CardView objects instead of Card objects
+            prefetch: bool
+                fetches the next page while the current one is consumed
+        """
+        card_class = CardView if view else Card
+        fetch_page = partial(self.client.get_board_cards, self.board_id)
+        for page in _iter_pages(fetch_page, page_size, prefetch):
+            yield from _build(card_class, page)
+
+    @traced
     def get_labels(self):
         """
         Returns all labels associated with a board
         """
         json_payload = self.client.get_labels(self.board_id)
-        labels = Label.from_json_list(json_payload.json())
+        data = stats.decode(json_payload)
+        with stats.phase("entity"):
+            labels = Label.from_json_list(data)
         return labels
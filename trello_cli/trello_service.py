@@ -1,18 +1,70 @@
 """ This module contains the business logic needed to interact Trello API"""
 from __future__ import annotations
 
-# third party imports
-from dotenv import find_dotenv, set_key, load_dotenv
-
 # local imports
+from trello_cli.settings import Settings, get_settings
 from trello_cli.trello_api import TrelloAPI
 from trello_cli.models import *
 from trello_cli.trello_data import Board, TrelloList, Card, Comment, Label
 from trello_cli import (
     SUCCESS, TRELLO_READ_ERROR, TRELLO_WRITE_ERROR)
+from trello_cli import stats
+from trello_cli.tracing import propagate, traced
 
 # standard library imports
-import os
+import string
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# number of cards processed at once by bulk operations, requests are
+# additionally paced by trello_api.rate_limiter
+BULK_MAX_WORKERS = 8
+
+# card attributes that can be substituted into bulk comment and rename templates
+CARD_TEMPLATE_FIELDS = ('card_id', 'name', 'desc', 'comments')
+
+
+def _template_fields(template) -> set:
+    """Returns the fields referenced by a card template
+
+    Raises a ValueError if a field is not one of CARD_TEMPLATE_FIELDS
+    """
+    fields = {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+    unknown = fields.difference(CARD_TEMPLATE_FIELDS)
+    if unknown:
+        raise ValueError(f"ERROR - Unknown template field(s): {', '.join(sorted(unknown))}")
+    return fields
+
+
+def _format_card(template, card_id, card) -> str:
+    """Fills in a card template for the given card"""
+    values = {'card_id': card_id}
+    if card is not None:
+        values.update(name=card.name, desc=card.desc, comments=card.comments)
+    return template.format_map(values)
+
+
+def _decode(response):
+    """Returns the json body of a call_api result
+
+    Raises a ValueError if call_api returned no response, e.g. after a 5xx,
+    or the error message it returns for a 401
+    """
+    if response is None or isinstance(response, str):
+        raise ValueError("ERROR - No response from the Trello API")
+    return stats.decode(response)
+
+
+def _run_concurrently(func, items, max_workers=BULK_MAX_WORKERS) -> list:
+    """Applies func to every item using a thread pool
+
+    Returns the results in the same order as items
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(propagate(func), items))
 
 
 class TrelloService:
@@ -29,17 +81,35 @@ class TrelloService:
         create_card: method to create a card from a trello board
         create_comment: method to create a comment from a trello card
         add_card_label: method to add a label to a trello card
+        bulk_add_card_labels: method to set labels on many trello cards
+        bulk_create_comments: method to comment on many trello cards
+        bulk_update_cards: method to move, archive or rename many trello cards
+        get_card_table: method to load the cards of a board into a CardTable
     """
 
-    def __init__(self):
-        self.__client = TrelloAPI(
-            api_key=os.getenv("TRELLO_API_KEY"),
-            api_secret=os.getenv("TRELLO_API_SECRET"),
-            api_token=os.getenv("TRELLO_API_TOKEN"),
-            oauth_token=os.getenv("TRELLO_OAUTH_TOKEN"),
-            oauth_secret=os.getenv("TRELLO_OAUTH_SECRET")
-        )
+    def __init__(self, settings: Settings = None, outbox=None):
+        """
+        Parameters
+        ----------
+        settings : Settings
+            credentials for the Trello API, the process' settings by default
+        outbox : Outbox
+            if given create_card, create_comment and add_card_label queue
+            their write in this outbox (see trello_cli/outbox.py) and return
+            the queued OutboxEntry as res
+        """
+        self.__client = TrelloAPI.from_settings(settings or get_settings())
+        self.outbox = outbox
 
+    def _enqueue(self, response_class, action, key, **args):
+        """Queues a write in the outbox, returns response_class with the queued entry"""
+        try:
+            entry = self.outbox.enqueue(action, args, key)
+        except (OSError, ValueError):
+            return response_class(res=None, status_code=TRELLO_WRITE_ERROR)
+        return response_class(res=entry, status_code=SUCCESS)
+
+    @traced
     def get_trello_boards(self) -> GetAllBoardsResponse:
         """
         Method to handle the get_all_boards response from Trello API
@@ -53,7 +123,9 @@ class TrelloService:
         """
         try:
             response = self.__client.get_all_boards()
-            boards = [Board.from_json(board) for board in response.json()]
+            data = _decode(response)
+            with stats.phase("entity"):
+                boards = [Board.from_json(board) for board in data]
             return GetAllBoardsResponse(
                 res=boards,
                 status_code=SUCCESS
@@ -64,6 +136,7 @@ class TrelloService:
                 status_code=TRELLO_READ_ERROR
             )
 
+    @traced
     def get_board(self, board_id) -> GetBoardResponse:
         """
         Method to handle the get_board response from Trello API
@@ -82,7 +155,7 @@ class TrelloService:
         """
         try:
             response = self.__client.get_board(board_id)
-            board = Board.from_json(response.json())
+            board = Board.from_json(_decode(response))
             return GetBoardResponse(
                 res=board,
                 status_code=SUCCESS
@@ -93,6 +166,7 @@ class TrelloService:
                 status_code=TRELLO_READ_ERROR
             )
 
+    @traced
     def get_list(self, list_id) -> GetListResponse:
         """Method to hande the get_list response from Trello API
 
@@ -110,7 +184,7 @@ class TrelloService:
         """
         try:
             response = self.__client.get_list(list_id)
-            trello_list = TrelloList.from_json(response.json())
+            trello_list = TrelloList.from_json(_decode(response))
             return GetListResponse(
                 res=trello_list,
                 status_code=SUCCESS
@@ -121,6 +195,7 @@ class TrelloService:
                 status_code=TRELLO_READ_ERROR
             )
 
+    @traced
     def get_card(self, card_id) -> GetCardResponse:
         """Method to handle the get_card response from Trello API
 
@@ -138,7 +213,7 @@ class TrelloService:
         """
         try:
             response = self.__client.get_card(card_id)
-            card = Card.from_json(response.json())
+            card = Card.from_json(_decode(response))
             return GetCardResponse(
                 res=card,
                 status_code=SUCCESS
@@ -149,36 +224,70 @@ class TrelloService:
                 status_code=TRELLO_READ_ERROR
             )
 
-    def create_card(self, name, list_id) -> CreateCardResponse:
+    @traced
+    def create_card(self, name, list_id, idempotency_key=None, desc=None, label_ids=None, pos=None,
+                    due=None, member_ids=None, comment=None) -> CreateCardResponse:
         """ Method for handling the create_card response from Trello API
 
+        The card is created with all of its fields in a single request, only
+        a first comment needs a second request once the card exists.
+
         Parameters
         ----------
         name : str
             name of the card to be created
         list_id : str
             id of the list where the card will be created
+        idempotency_key : str
+            with an outbox, the write is not queued again if an entry with
+            this key is in the outbox, delivered ones included
+        desc : str
+            description of the card
+        label_ids : list
+            ids of the labels of the card
+        pos : str | float
+            position of the card in the list, "top", "bottom" or a positive number
+        due : str
+            due date of the card e.g. 2023-11-01T12:00:00Z
+        member_ids : list
+            ids of the members of the card
+        comment : str
+            text of a first comment on the card
 
         Returns
         -------
         CreateCardResponse : named tuple
             res: card created
-            status_code: status code of the response
+            status_code: status code of the response, a write error with res
+                set if the card was created but its comment was not
+            comment: comment created, None if none was requested or it failed
         """
+        fields = {'desc': desc, 'label_ids': label_ids, 'pos': pos, 'due': due, 'member_ids': member_ids,
+                  'comment': comment}
+        fields = {field: value for field, value in fields.items() if value is not None}
+        if self.outbox is not None:
+            return self._enqueue(CreateCardResponse, 'create_card', idempotency_key, name=name, list_id=list_id,
+                                 **fields)
         try:
-            json_response = self.__client.create_card(name, list_id)
-            card = Card.from_json(json_response.json())
-            return CreateCardResponse(
-                res=card,
-                status_code=SUCCESS
-            )
+            json_response = self.__client.create_card(name, list_id, desc=desc, id_labels=label_ids, pos=pos,
+                                                      due=due, id_members=member_ids)
+            card = Card.from_json(_decode(json_response))
         except (ValueError, KeyError):
             return CreateCardResponse(
                 res=None,
                 status_code=TRELLO_WRITE_ERROR
             )
+        created_comment = None
+        if comment is not None:
+            created_comment = self.create_comment(card.card_id, comment).res
+        return CreateCardResponse(
+            res=card,
+            status_code=SUCCESS if comment is None or created_comment is not None else TRELLO_WRITE_ERROR,
+            comment=created_comment
+        )
 
-    def create_comment(self, card_id, text) -> CreateCommentResponse:
+    @traced
+    def create_comment(self, card_id, text, idempotency_key=None) -> CreateCommentResponse:
         """ Method for handling the create_comment response from Trello API
 
         Parameters
@@ -187,6 +296,9 @@ class TrelloService:
             id of the card where the comment will be created
         text : str
             text of the comment to be created
+        idempotency_key : str
+            with an outbox, the write is not queued again if an entry with
+            this key is in the outbox, delivered ones included
 
         Returns
         -------
@@ -194,9 +306,11 @@ class TrelloService:
             res: comment created
             status_code: status code of the response
         """
+        if self.outbox is not None:
+            return self._enqueue(CreateCommentResponse, 'create_comment', idempotency_key, card_id=card_id, text=text)
         try:
             response = self.__client.create_comment(card_id, text)
-            comment = Comment.from_json(response.json())
+            comment = Comment.from_json(_decode(response))
             return CreateCommentResponse(
                 res=comment,
                 status_code=SUCCESS
@@ -207,7 +321,8 @@ class TrelloService:
                 status_code=TRELLO_WRITE_ERROR
             )
 
-    def add_card_label(self, card_id, label_id) -> AddCardLabelResponse:
+    @traced
+    def add_card_label(self, card_id, label_id, idempotency_key=None) -> AddCardLabelResponse:
         """Method for handling the add_card_label response from Trello API
 
         Parameters
@@ -216,6 +331,9 @@ class TrelloService:
             id of the card where the label will be added
         label_id : str
             id of the label to be added
+        idempotency_key : str
+            with an outbox, the write is not queued again if an entry with
+            this key is in the outbox, delivered ones included
 
         Returns
         -------
@@ -224,14 +342,296 @@ class TrelloService:
             status_code: status code of the response
 
         """
+        if self.outbox is not None:
+            return self._enqueue(AddCardLabelResponse, 'add_card_label', idempotency_key,
+                                 card_id=card_id, label_id=label_id)
+        # deferred like in trello_api.py so that startup does not import requests
+        import requests
+
         try:
             response = self.__client.add_card_label(card_id, label_id)
+        except requests.exceptions.RequestException:
+            response = None
+        if getattr(response, 'status_code', None) not in (200, 201):
             return AddCardLabelResponse(
-                res=response,
+                res=None,
+                status_code=TRELLO_WRITE_ERROR
+            )
+        return AddCardLabelResponse(
+            res=response,
+            status_code=SUCCESS
+        )
+
+    def _get_cards(self, card_ids=None, list_id=None, board_id=None, label_id=None) -> list:
+        """Fetches the cards targeted by a bulk operation
+
+        Cards of a list or board are fetched in a single request, individual
+        card ids are fetched concurrently.
+
+        Parameters
+        ----------
+        card_ids : list
+            ids of the cards to fetch
+        list_id : str
+            id of a list, every card in it is fetched
+        board_id : str
+            id of a board, every open card on it is fetched
+        label_id : str
+            only keeps the cards of the list or board carrying this label
+
+        Returns
+        -------
+        cards : list
+            (card_id, Card) tuples, the card is None when it could not be read
+        """
+        cards = []
+        for container_id, get_cards in ((list_id, self.__client.get_all_cards),
+                                        (board_id, self.__client.get_board_cards)):
+            if not container_id:
+                continue
+            response = get_cards(container_id)
+            try:
+                data = _decode(response)
+                with stats.phase("entity"):
+                    selected = [Card.from_json(card) for card in data]
+            except (ValueError, KeyError):
+                cards.append((container_id, None))
+                continue
+            if label_id:
+                selected = [card for card in selected
+                            if any(label['id'] == label_id for label in card.labels)]
+            cards.extend((card.card_id, card) for card in selected)
+
+        def fetch(card_id):
+            try:
+                return card_id, Card.from_json(_decode(self.__client.get_card(card_id)))
+            except (ValueError, KeyError):
+                return card_id, None
+
+        cards.extend(_run_concurrently(fetch, card_ids or []))
+        return cards
+
+    @traced
+    def bulk_add_card_labels(self, label_ids, card_ids=None, list_id=None,
+                             replace=False) -> BulkResponse:
+        """Method for setting labels on many cards with one PUT per card
+
+        Cards that already carry the labels are skipped without a request.
+
+        Parameters
+        ----------
+        label_ids : list
+            ids of the labels to add
+        card_ids : list
+            ids of the cards to label
+        list_id : str
+            id of a list, every card in it is labelled
+        replace : bool
+            replaces the card's labels with label_ids instead of merging them
+
+        Returns
+        -------
+        BulkResponse : named tuple
+            res: outcome for every card
+            status_code: status code of the whole operation
+        """
+
+        def label_card(item):
+            card_id, card = item
+            if card is None:
+                return BulkCardResult(card_id=card_id, status_code=TRELLO_READ_ERROR)
+
+            current = [label['id'] for label in card.labels]
+            if replace:
+                target = list(dict.fromkeys(label_ids))
+                if set(target) == set(current):
+                    return BulkCardResult(card_id=card_id, status_code=SUCCESS, skipped=True)
+            else:
+                missing = [label_id for label_id in dict.fromkeys(label_ids) if label_id not in current]
+                if not missing:
+                    return BulkCardResult(card_id=card_id, status_code=SUCCESS, skipped=True)
+                target = current + missing
+
+            response = self.__client.set_card_labels(card_id, target)
+            if getattr(response, 'status_code', None) in (200, 201):
+                return BulkCardResult(card_id=card_id, status_code=SUCCESS)
+            return BulkCardResult(card_id=card_id, status_code=TRELLO_WRITE_ERROR)
+
+        results = _run_concurrently(label_card, self._get_cards(card_ids, list_id))
+        failed = any(result.status_code != SUCCESS for result in results)
+        return BulkResponse(
+            res=results,
+            status_code=TRELLO_WRITE_ERROR if failed else SUCCESS
+        )
+
+    @traced
+    def bulk_create_comments(self, template, card_ids=None, list_id=None) -> BulkResponse:
+        """Method for posting a templated comment on many cards concurrently
+
+        The template is formatted for every card with str.format, the fields
+        listed in CARD_TEMPLATE_FIELDS are available e.g. "{name} is done".
+        Cards are only fetched when the template needs more than the card_id.
+
+        Parameters
+        ----------
+        template : str
+            text of the comment with optional {field} placeholders
+        card_ids : list
+            ids of the cards to comment on
+        list_id : str
+            id of a list, every card in it is commented on
+
+        Returns
+        -------
+        BulkResponse : named tuple
+            res: outcome for every card
+            status_code: status code of the whole operation
+
+        Raises
+        ------
+        ValueError
+            if the template references an unknown field
+        """
+        fields = _template_fields(template)
+        fetched = bool(list_id or fields - {'card_id'})
+        if fetched:
+            targets = self._get_cards(card_ids, list_id)
+        else:
+            targets = [(card_id, None) for card_id in card_ids or []]
+
+        def comment_card(item):
+            card_id, card = item
+            if fetched and card is None:
+                return BulkCardResult(card_id=card_id, status_code=TRELLO_READ_ERROR)
+
+            response = self.__client.create_comment(card_id, _format_card(template, card_id, card))
+            if getattr(response, 'status_code', None) in (200, 201):
+                return BulkCardResult(card_id=card_id, status_code=SUCCESS)
+            return BulkCardResult(card_id=card_id, status_code=TRELLO_WRITE_ERROR)
+
+        results = _run_concurrently(comment_card, targets)
+        failed = any(result.status_code != SUCCESS for result in results)
+        return BulkResponse(
+            res=results,
+            status_code=TRELLO_WRITE_ERROR if failed else SUCCESS
+        )
+
+    @traced
+    def bulk_update_cards(self, list_id=None, board_id=None, label_id=None, card_ids=None,
+                          id_list=None, closed=None, name=None, dry_run=False) -> BulkResponse:
+        """Method for moving, archiving and renaming many cards concurrently
+
+        Cards are selected by list, board, label and/or card ids, each selected
+        card is then updated with a single PUT.
+
+        Parameters
+        ----------
+        list_id : str
+            selects every card in this list
+        board_id : str
+            selects every open card on this board
+        label_id : str
+            narrows the cards of list_id / board_id to those carrying this label
+        card_ids : list
+            selects these cards
+        id_list : str
+            id of the list the cards are moved to
+        closed : bool
+            archives (True) or unarchives (False) the cards
+        name : str
+            template for the new card name, see CARD_TEMPLATE_FIELDS
+        dry_run : bool
+            reports the changes without sending any update
+
+        Returns
+        -------
+        BulkResponse : named tuple
+            res: outcome and changes for every card
+            status_code: status code of the whole operation
+            calls: number of requests made
+            elapsed: duration of the operation in seconds
+
+        Raises
+        ------
+        ValueError
+            if no update or no selector is given, or the name template is invalid
+        """
+        if id_list is None and closed is None and name is None:
+            raise ValueError("ERROR - One of 'id_list', 'closed' or 'name' is required")
+        if not (list_id or board_id or card_ids):
+            raise ValueError("ERROR - One of 'list_id', 'board_id' or 'card_ids' is required")
+        if name is not None:
+            _template_fields(name)
+
+        start = time.perf_counter()
+        targets = self._get_cards(card_ids, list_id, board_id, label_id)
+        reads = bool(list_id) + bool(board_id) + len(card_ids or [])
+
+        def update_card(item):
+            card_id, card = item
+            if card is None:
+                return BulkCardResult(card_id=card_id, status_code=TRELLO_READ_ERROR)
+
+            changes = {}
+            if id_list is not None:
+                changes['idList'] = id_list
+            if closed is not None:
+                changes['closed'] = 'true' if closed else 'false'
+            if name is not None:
+                new_name = _format_card(name, card_id, card)
+                if new_name != card.name:
+                    changes['name'] = new_name
+            if not changes:
+                return BulkCardResult(card_id=card_id, status_code=SUCCESS, skipped=True)
+            if dry_run:
+                return BulkCardResult(card_id=card_id, status_code=SUCCESS, changes=changes)
+
+            response = self.__client.update_card(card_id, changes)
+            if getattr(response, 'status_code', None) in (200, 201):
+                return BulkCardResult(card_id=card_id, status_code=SUCCESS, changes=changes)
+            return BulkCardResult(card_id=card_id, status_code=TRELLO_WRITE_ERROR, changes=changes)
+
+        results = _run_concurrently(update_card, targets)
+        writes = 0 if dry_run else sum(result.changes is not None for result in results)
+        failed = any(result.status_code != SUCCESS for result in results)
+        return BulkResponse(
+            res=results,
+            status_code=TRELLO_WRITE_ERROR if failed else SUCCESS,
+            calls=reads + writes,
+            elapsed=time.perf_counter() - start
+        )
+
+    @traced
+    def get_card_table(self, board_id) -> GetCardTableResponse:
+        """Method for loading the cards of a board into a columnar CardTable
+
+        The board's lists, labels and cards are fetched concurrently.
+
+        Parameters
+        ----------
+        board_id : str
+            id of the board
+
+        Returns
+        -------
+        GetCardTableResponse : named tuple
+            res: table of the board's cards
+            status_code: status code of the response
+        """
+        from trello_cli.card_table import CardTable
+
+        requests = (self.__client.get_all_lists, self.__client.get_labels, self.__client.get_board_cards)
+        try:
+            lists, labels, cards = [_decode(response) for response in
+                                    _run_concurrently(lambda request: request(board_id), requests)]
+            with stats.phase("entity"):
+                table = CardTable.from_json(cards, lists, labels)
+            return GetCardTableResponse(
+                res=table,
                 status_code=SUCCESS
             )
-        except (TRELLO_WRITE_ERROR):
-            return AddCardLabelResponse(
+        except (ValueError, KeyError, TypeError):
+            return GetCardTableResponse(
                 res=None,
-                status_code=TRELLO_WRITE_ERROR
+                status_code=TRELLO_READ_ERROR
             )